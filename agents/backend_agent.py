@@ -1,9 +1,6 @@
-import json
-import re
-import os
 from typing import Dict, Any
 from langchain_core.prompts import ChatPromptTemplate
-from agents.base_agent import BaseAgent
+from agents.base_agent import BaseAgent, EDIT_MODE_INSTRUCTIONS
 from core.state_manager import ProjectState
 
 class BackendAgent(BaseAgent):
@@ -44,7 +41,6 @@ OUTPUT REQUIREMENTS:
 
     async def execute_task(self, task: str, state: ProjectState) -> Dict[str, Any]:
         """Execute backend development task"""
-        existing_files = self._get_project_context(state.root_path)
         prompt = ChatPromptTemplate.from_messages([
             ("system", self.create_system_prompt()),
             ("human", """
@@ -60,6 +56,8 @@ ROOT PATH: {root_path}
 
 EXISTING PROJECT FILES: {existing_files}
 
+{edit_instructions}
+
 Requirements:
 1. Analyze task requirements and project flow
 2. Create robust backend architecture
@@ -71,7 +69,7 @@ Requirements:
 
 For each file you create, provide:
 - File path (relative to root)
-- Complete file content  
+- Complete file content for new files, or edits/patch for existing files
 - Brief description of purpose
 
 Return response in JSON format:
@@ -81,6 +79,11 @@ Return response in JSON format:
             "path": "relative/path/to/file",
             "content": "complete file content",
             "description": "file purpose"
+        }},
+        {{
+            "path": "relative/path/to/existing/file",
+            "edits": [{{"search": "exact current lines", "replace": "new lines"}}],
+            "description": "what changed"
         }}
     ],
     "api_endpoints": [
@@ -96,63 +99,10 @@ Return response in JSON format:
 """)
         ])
         
-        response = await self.llm.ainvoke(
-            prompt.format_messages(
-                task=task,
-                flow=state.flow,
-                design_config=state.design_config,
-                root_path=state.root_path,
-                existing_files=existing_files
-            )
-        )
-        # --- New logic: check if files exist and are correct ---
-        try:
-            json_match = re.search(r'\{.*\}', response.content, re.DOTALL)
-            result = json.loads(json_match.group()) if json_match else {"files": []}
-        except Exception:
-            result = {"files": []}
-        files_to_fix = []
-        for file_info in result.get('files', []):
-            file_path = os.path.join(state.root_path, file_info['path'])
-            if not os.path.exists(file_path):
-                files_to_fix.append(file_info)
-            else:
-                content = self.file_manager.read_file(file_path)
-                if content and not self.is_content_correct(content, file_info):
-                    files_to_fix.append(file_info)
-        if not files_to_fix:
-            return {
-                "files": [],
-                "summary": "All files already exist and are correct. Skipping task.",
-                "created_files": [],
-                "next_steps": []
-            }
-        # --- End new logic ---
-        for file_info in files_to_fix:
-            file_path = os.path.join(state.root_path, file_info['path'])
-            self.file_manager.write_file(file_path, file_info['content'])
-        created_files = [f['path'] for f in files_to_fix]
-        return {
-            "files": files_to_fix,
-            "summary": result.get('summary', 'Task completed'),
-            "created_files": created_files,
-            "next_steps": result.get('next_steps', [])
-        }
-    
-    def is_content_correct(self, content: str, file_info: dict) -> bool:
-        # Placeholder: always returns False (always rewrites). Replace with LLM or custom logic.
-        return False
-    
-    def _get_project_context(self, root_path: str) -> str:
-        """Get context from existing project files"""
-        try:
-            files = self.file_manager.list_files(root_path, ['.py', '.js', '.json', '.sql'])
-            context = []
-            for file_path in files[:15]:  # Limit to prevent token overflow
-                content = self.file_manager.read_file(file_path)
-                if content:
-                    rel_path = os.path.relpath(file_path, root_path)
-                    context.append(f"File: {rel_path}\n{content[:600]}...")
-            return "\n\n".join(context)
-        except Exception as e:
-            return f"Error reading project context: {e}" 
\ No newline at end of file
+        inputs, packed = self._pack_prompt(prompt, state, task, {
+            "task": task,
+            "root_path": state.root_path,
+            "edit_instructions": EDIT_MODE_INSTRUCTIONS,
+        }, ['.py', '.js', '.json', '.sql'])
+        messages = prompt.format_messages(**inputs)
+        return await self._generate_files(messages, state, packed)
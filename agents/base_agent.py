@@ -1,14 +1,83 @@
-from typing import Dict, Any
-from core.file_manager import FileManager
+import hashlib
+import os
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+from core.blob_store import get_blob_store
+from core.file_manager import FileManager, SKIPPED, WRITTEN
+from core.flow_parser import get_flow_tree
+from core.json_extract import extract_json
+from core.json_stream import FileEntryStreamParser
+from core.patch import PatchError, apply_edit
+from core.project_index import get_project_index
+from core.prompt_packer import PackedPrompt, PromptPacker, PromptSection, get_token_estimator, truncate
+from core.response_cache import render_messages
 from core.state_manager import ProjectState
 
+TOKEN_LIMIT_FINISH_REASONS = ("MAX_TOKENS", "max_tokens", "length")
+
+CONTINUATION_PROMPT = """Your previous response was cut off at the output length limit.
+These {count} files were received completely and must NOT be repeated:
+{paths}
+
+Continue with the remaining files only, starting after {last}.
+Use exactly the same JSON format as before (a "files" array plus "summary" and "next_steps")."""
+
+EDIT_MODE_INSTRUCTIONS = """EDITING EXISTING FILES:
+- Files listed under EXISTING PROJECT FILES already exist. To change one, do NOT resend the whole file.
+  Instead give "path" plus either:
+  - "edits": a list of {"search": "exact lines copied from the current file", "replace": "new lines"}
+    blocks; each search text must occur exactly once in the file, or
+  - "patch": a unified diff of that single file (@@ -start,count +start,count @@ hunks with 3 lines of context)
+- Search text must be copied from a file shown with "(full content)". Files shown only as an "(outline)"
+  list their signatures, not their exact lines: to change one, send its complete new "content".
+- Use "content" with the complete file only for NEW files (or if most of an existing file changes)."""
+
+PATCH_RETRY_PROMPT = """Some of your edits could not be applied because their search text or diff context
+does not match the current files. Return the COMPLETE new content ("content") for each of these files,
+using the same JSON format as before:
+
+{failures}"""
+
+
+def _hit_token_limit(message) -> bool:
+    metadata = getattr(message, "response_metadata", None) or {}
+    return str(metadata.get("finish_reason", "")).split(".")[-1] in TOKEN_LIMIT_FINISH_REASONS
+
+
+def _prompt_text(messages) -> str:
+    return "\n".join(str(message["content"]) for message in render_messages(messages))
+
+
+def _entry_size(file_info: Dict[str, Any]) -> int:
+    """Characters the model spent on a files[] entry's payload"""
+    if 'content' in file_info:
+        return len(file_info['content'])
+    edits = file_info.get('edits') or []
+    return len(file_info.get('patch') or '') + sum(len(str(e)) for e in edits if isinstance(e, dict))
+
+
 class BaseAgent:
     """Base class for all agents"""
+
+    # Prompt size target in tokens; AGENT_PROMPT_TOKENS overrides it for every agent
+    default_prompt_tokens = 24000
+    # Bump when a task prompt template changes, so the build cache stops reusing old results
+    prompt_version = 1
     
-    def __init__(self, name: str, llm):
+    def __init__(self, name: str, llm, streaming: Optional[bool] = None,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
         self.name = name
         self.llm = llm
         self.file_manager = FileManager()
+        # Streaming writes each file as soon as its JSON entry is complete (AGENT_STREAMING=1)
+        if streaming is None:
+            streaming = os.getenv("AGENT_STREAMING", "0").lower() in ("1", "true", "on")
+        self.streaming = streaming
+        self.progress_callback = progress_callback
+        self.max_continuations = 3
+        self.prompt_token_budget = int(os.getenv("AGENT_PROMPT_TOKENS", "0")) or self.default_prompt_tokens
+        # Send the flow sections linked to the task plus an outline instead of the whole flow
+        self.flow_slicing = os.getenv("AGENT_FLOW_SLICING", "1").lower() in ("1", "true", "on")
     
     def create_system_prompt(self) -> str:
         """Create system prompt for the agent"""
@@ -30,6 +99,263 @@ CAPABILITIES:
 
 Always provide detailed, high-quality implementations that demonstrate professional software development standards."""
 
+    def prompt_fingerprint(self) -> str:
+        """Identifies the prompts this agent sends; part of the build cache key"""
+        text = f"{type(self).__name__}:{self.prompt_version}:{EDIT_MODE_INSTRUCTIONS}:{self.create_system_prompt()}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
     async def execute_task(self, task: str, state: ProjectState) -> Dict[str, Any]:
         """Execute assigned task - to be implemented by subclasses"""
-        raise NotImplementedError 
\ No newline at end of file
+        raise NotImplementedError
+
+    def _pack_prompt(self, prompt, state: ProjectState, query: str, fixed: Dict[str, Any],
+                     extensions: Optional[List[str]] = None, full_files: int = 3, outline_files: int = 25,
+                     include_structure: bool = False, full_chars: int = 6000, slice_flow: bool = True):
+        """Fit flow, design config and project files into the agent's token budget.
+
+        Returns (format_messages kwargs, PackedPrompt). The few files most relevant to `query`
+        may be sent in full (verbatim, so search/replace edits can quote them) or as outlines;
+        the rest only as outlines. A structured flow is sliced down to the requirements linked
+        to the task (state.flow_nodes, else matched against `query`) under a global outline;
+        otherwise flow and design config fall back to truncated heads.
+        """
+        tree = get_flow_tree(state.flow)
+        if slice_flow and self.flow_slicing and tree.structured:
+            flow_variants = [("slice", tree.slice(query, state.flow_nodes, self.name.lower()), 1.0),
+                             ("summary", tree.summary(), 0.4)]
+        else:
+            flow_variants = [("full", state.flow, 1.0), ("head", truncate(state.flow, 6000), 0.55)]
+        sections = [
+            PromptSection("flow", "flow", 100, flow_variants, required=True),
+            PromptSection("design_config", "design_config", 60,
+                          [("full", state.design_config, 1.0), ("head", truncate(state.design_config, 3000), 0.5)],
+                          required=True),
+        ]
+        sections += self._context_sections(state.root_path, query, extensions, full_files, outline_files,
+                                           include_structure, full_chars)
+        empty = {name: "" for name in prompt.input_variables}
+        estimator = get_token_estimator()
+        fixed_tokens = estimator.estimate(_prompt_text(prompt.format_messages(**{**empty, **fixed})))
+        packed = PromptPacker(self.prompt_token_budget, estimator).pack(sections, fixed_tokens)
+        inputs = {
+            **fixed,
+            "flow": packed.text("flow"),
+            "design_config": packed.text("design_config"),
+            "existing_files": packed.text("existing_files"),
+        }
+        self._emit_progress({"event": "prompt_packed", "description": packed.describe(), **packed.summary()})
+        return inputs, packed
+
+    def _context_sections(self, root_path: str, query: str, extensions: Optional[List[str]],
+                          full_files: int, outline_files: int, include_structure: bool,
+                          full_chars: int) -> List[PromptSection]:
+        index = get_project_index(root_path)
+        ranked = index.rank(query, extensions)
+        sections: List[PromptSection] = []
+        if include_structure:
+            paths = [entry.path for entry in index.entries()]
+            sections.append(PromptSection("structure", "existing_files", 15, [
+                ("full", "Project Structure:\n" + "\n".join(paths[:300]), 1.0),
+                ("head", "Project Structure:\n" + "\n".join(paths[:30]), 0.6),
+            ]))
+        top_score = max((score for _, score in ranked), default=0.0) or 1.0
+        relevant = [(entry, score) for entry, score in ranked if score > 0][:full_files]
+        for entry, score in relevant:
+            content = self.file_manager.read_file(os.path.join(root_path, entry.path)) or ""
+            if len(content) > full_chars:
+                content = content[:full_chars] + f"\n... ({len(content) - full_chars} more characters)"
+            sections.append(PromptSection(entry.path, "existing_files", 40 * (0.5 + 0.5 * score / top_score), [
+                ("full", f"File: {entry.path} (full content)\n{content}" if content else "", 1.0),
+                ("outline", f"File: {entry.path} (outline)\n{entry.outline}" if entry.outline else "", 0.35),
+            ]))
+        shown = {entry.path for entry, _ in relevant}
+        rest = [entry for entry, _ in ranked if entry.path not in shown and entry.outline][:outline_files]
+        for position, entry in enumerate(rest):
+            sections.append(PromptSection(entry.path, "existing_files", 12 / (1 + 0.15 * position), [
+                ("outline", f"File: {entry.path} (outline)\n{entry.outline}", 1.0),
+            ]))
+        return sections
+
+    async def _generate_files(self, messages, state: ProjectState,
+                              packed: Optional[PackedPrompt] = None) -> Dict[str, Any]:
+        """Run a file-producing prompt and write the returned files under the project root.
+
+        If the response is cut off at the output-token limit, follow-up requests ask the
+        model to resume after the last complete file and the parts are stitched together.
+        """
+        result, completed, produced, truncated, text = await self._request_files(messages, state)
+        conversation = list(messages)
+        continuations = 0
+        while truncated and continuations < self.max_continuations:
+            continuations += 1
+            done_paths = [f['path'] for f in completed if isinstance(f, dict) and 'path' in f]
+            print(f"✂️ {self.name} Agent: response truncated after {len(done_paths)} complete files, "
+                  f"requesting continuation {continuations}/{self.max_continuations}")
+            # The cut-off output goes back as the assistant turn so the model continues from it
+            conversation += [("ai", text), ("human", CONTINUATION_PROMPT.format(
+                count=len(done_paths),
+                paths="\n".join(f"- {path}" for path in done_paths) or "- (none)",
+                last=done_paths[-1] if done_paths else "the beginning",
+            ))]
+            part, part_completed, part_produced, truncated, text = await self._request_files(conversation, state)
+            completed += part_completed
+            produced += part_produced
+            # Later parts carry the summary/next_steps the truncated first part never reached
+            result.update({k: v for k, v in part.items() if k != 'files'})
+        if truncated:
+            print(f"⚠️ {self.name} Agent: output still truncated after {continuations} continuations")
+        failed = [f for f in completed if f.get('patch_errors')]
+        if failed:
+            # One round trip asking for full content of files whose edits did not apply
+            print(f"🩹 {self.name} Agent: edits rejected for {len(failed)} files, requesting full content")
+            retry = list(messages) + [("human", PATCH_RETRY_PROMPT.format(
+                failures="\n\n".join(self._describe_patch_failure(state, f) for f in failed)
+            ))]
+            part, _, part_produced, _, _ = await self._request_files(retry, state)
+            produced += part_produced
+            result.update({k: v for k, v in part.items() if k not in ('files', 'summary', 'next_steps')})
+        if not produced:
+            outcome = {
+                "files": [],
+                "summary": "All files already exist and are correct. Skipping task.",
+                "created_files": [],
+                "next_steps": []
+            }
+        else:
+            # Files identical to what is on disk were not rewritten but are still this task's output
+            files = [f for f, _ in produced]
+            outcome = {
+                "files": files,
+                "summary": result.get('summary', 'Task completed'),
+                "created_files": [f['path'] for f in files],
+                "next_steps": result.get('next_steps', []),
+                "continuations": continuations,
+                "files_written": sum(1 for _, status in produced if status == WRITTEN),
+                "files_unchanged": sum(1 for _, status in produced if status == SKIPPED),
+            }
+        if packed is not None:
+            outcome["prompt"] = packed.summary()
+        return outcome
+
+    async def _request_files(self, messages, state: ProjectState):
+        """One LLM round trip: returns (result, complete entries, (entry, write status) pairs, truncated, raw text)"""
+        if self.streaming:
+            return await self._stream_files(messages, state)
+        response = await self.llm.ainvoke(messages)
+        self._calibrate(messages, getattr(response, "usage_metadata", None))
+        extraction = extract_json(response.content, expected_keys=("files",))
+        if extraction.repairs:
+            print(f"[{self.name} Agent] Repaired JSON response: {', '.join(extraction.repairs)}")
+        result = extraction.data if extraction.ok else {"files": []}
+        completed = [f for f in result.get('files', []) if isinstance(f, dict) and 'path' in f]
+        FileManager.ensure_directories(os.path.join(state.root_path, f['path']) for f in completed)
+        produced = [(f, status) for f, status in ((f, self._write_file_entry(state, f)) for f in completed)
+                    if status is not None]
+        truncated = extraction.truncated or (not extraction.ok and _hit_token_limit(response))
+        return result, completed, produced, truncated, response.content
+
+    async def _stream_files(self, messages, state: ProjectState):
+        """Stream the response and write each files[] entry to disk as soon as it is complete"""
+        parser = FileEntryStreamParser()
+        completed: List[Dict[str, Any]] = []
+        produced: List[Tuple[Dict[str, Any], str]] = []
+        started = time.monotonic()
+        received = 0
+        last_chunk = None
+        parts: List[str] = []
+        self._emit_progress({"event": "stream_started"})
+        usage = None
+        async for chunk in self.llm.astream(messages):
+            last_chunk = chunk
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = chunk.content if isinstance(chunk.content, str) else "".join(
+                part.get("text", "") if isinstance(part, dict) else str(part) for part in chunk.content
+            )
+            received += len(text)
+            parts.append(text)
+            for file_info in parser.feed(text):
+                completed.append(file_info)
+                status = self._write_file_entry(state, file_info)
+                if status is not None:
+                    produced.append((file_info, status))
+                if status == WRITTEN:
+                    self._emit_progress({
+                        "event": "file_written",
+                        "path": file_info['path'],
+                        "index": len(produced),
+                        "bytes": _entry_size(file_info),
+                        "elapsed": round(time.monotonic() - started, 2),
+                    })
+        self._calibrate(messages, usage)
+        for error in parser.errors:
+            print(f"[{self.name} Agent] Skipped unparsable {error}")
+        truncated = bool(parser.stack) or (not parser.finished and _hit_token_limit(last_chunk))
+        self._emit_progress({
+            "event": "stream_finished",
+            "files": len(produced),
+            "unchanged_files": sum(1 for _, status in produced if status == SKIPPED),
+            "received_chars": received,
+            "truncated": truncated,
+            "elapsed": round(time.monotonic() - started, 2),
+        })
+        return parser.skeleton(), completed, produced, truncated, "".join(parts)
+
+    def _write_file_entry(self, state: ProjectState, file_info: Dict[str, Any]) -> Optional[str]:
+        """Write one files[] entry (full content or an edit of the current file) unless nothing changes.
+
+        Returns WRITTEN, or SKIPPED if the file on disk already has this content; either way the
+        entry gets its blob hash and byte size. None means the entry produced no content.
+        """
+        if not isinstance(file_info, dict) or 'path' not in file_info:
+            return None
+        file_path = os.path.join(state.root_path, file_info['path'])
+        if 'content' in file_info:
+            content = file_info['content']
+        elif file_info.get('patch') or file_info.get('edits'):
+            original = self.file_manager.read_file(file_path) if os.path.exists(file_path) else None
+            try:
+                patched = apply_edit(original, file_info)
+            except PatchError as e:
+                file_info['patch_errors'] = [str(e)]
+                print(f"[{self.name} Agent] Rejected edit for {file_info['path']}: {e}")
+                return None
+            if patched.rejected:
+                file_info['patch_errors'] = patched.rejected
+                print(f"[{self.name} Agent] {file_info['path']}: {len(patched.rejected)} hunks rejected "
+                      f"({patched.applied} applied)")
+            if not patched.applied:
+                return None
+            content = patched.content
+        else:
+            return None
+        status = self.file_manager.write_file_if_changed(
+            file_path, content, root_path=state.root_path, task_id=state.current_task
+        )
+        if status not in (WRITTEN, SKIPPED):
+            return None
+        # Results only carry the content hash from here on; see core/blob_store.py
+        file_info['blob'] = get_blob_store(state.root_path).put(content)
+        file_info['size'] = len(content.encode("utf-8"))
+        return status
+
+    def _describe_patch_failure(self, state: ProjectState, file_info: Dict[str, Any]) -> str:
+        file_path = os.path.join(state.root_path, file_info['path'])
+        current = self.file_manager.read_file(file_path) if os.path.exists(file_path) else None
+        reasons = "\n".join(f"  - {reason}" for reason in file_info['patch_errors'])
+        if current is None:
+            return f"File: {file_info['path']} (does not exist yet)\nProblems:\n{reasons}"
+        return f"File: {file_info['path']}\nProblems:\n{reasons}\nCurrent content:\n{current}"
+
+    def _calibrate(self, messages, usage: Optional[Dict[str, Any]]) -> None:
+        """Feed the billed prompt size back into the shared token estimator"""
+        if usage and usage.get("input_tokens"):
+            get_token_estimator().observe(len(_prompt_text(messages)), usage["input_tokens"])
+
+    def _emit_progress(self, event: Dict[str, Any]) -> None:
+        event = {"agent": self.name, **event}
+        if self.progress_callback is not None:
+            self.progress_callback(event)
+        elif event["event"] == "file_written":
+            print(f"📄 {self.name} Agent: wrote {event['path']} ({event['index']}, {event['elapsed']}s)")
+        elif event["event"] == "prompt_packed":
+            print(f"📦 {self.name} Agent: prompt {event['description']}")
@@ -1,14 +1,14 @@
-import json
-import re
-import os
 from typing import Dict, Any
 from langchain_core.prompts import ChatPromptTemplate
 from agents.base_agent import BaseAgent
+from core.json_extract import extract_json
 from core.state_manager import ProjectState
 
 class FlowValidatorAgent(BaseAgent):
     """Flow validator agent to ensure complete implementation"""
     
+    default_prompt_tokens = 32000
+
     def __init__(self, llm):
         super().__init__("FlowValidator", llm)
     
@@ -44,8 +44,6 @@ OUTPUT REQUIREMENTS:
     async def validate_implementation(self, state: ProjectState) -> Dict[str, Any]:
         """Validate the complete implementation against flow requirements"""
         
-        existing_files = self._get_complete_project_context(state.root_path)
-        
         prompt = ChatPromptTemplate.from_messages([
             ("system", self.create_system_prompt()),
             ("human", """
@@ -85,52 +83,27 @@ Return detailed validation results in JSON format:
 """)
         ])
         
-        response = await self.llm.ainvoke(
-            prompt.format_messages(
-                flow=state.flow,
-                design_config=state.design_config,
-                root_path=state.root_path,
-                existing_files=existing_files,
-                completed_tasks=state.completed_tasks or []
-            )
-        )
+        # Outlines of key files (signatures, routes, tables) show what is implemented;
+        # the whole flow is needed here, not a per-task slice
+        inputs, _ = self._pack_prompt(prompt, state, state.flow, {
+            "root_path": state.root_path,
+            "completed_tasks": state.completed_tasks or [],
+        }, ['.py', '.js', '.html', '.css', '.json', '.md', '.sql'], full_files=0, outline_files=80,
+            include_structure=True, slice_flow=False)
+        messages = prompt.format_messages(**inputs)
+        response = await self.llm.ainvoke(messages)
+        self._calibrate(messages, getattr(response, "usage_metadata", None))
         
         return self._process_validation_response(response.content)
     
-    def _get_complete_project_context(self, root_path: str) -> str:
-        """Get comprehensive context from all project files"""
-        try:
-            files = self.file_manager.list_files(root_path)
-            context = []
-            
-            # Project structure
-            structure = []
-            for file_path in files:
-                rel_path = os.path.relpath(file_path, root_path)
-                structure.append(rel_path)
-            
-            context.append(f"Project Structure:\n" + "\n".join(structure))
-            
-            # File contents (prioritize key files)
-            priority_extensions = ['.py', '.js', '.html', '.css', '.json', '.md']
-            priority_files = [f for f in files if any(f.endswith(ext) for ext in priority_extensions)]
-            
-            for file_path in priority_files[:20]:  # Limit to prevent token overflow
-                content = self.file_manager.read_file(file_path)
-                if content:
-                    rel_path = os.path.relpath(file_path, root_path)
-                    context.append(f"File: {rel_path}\n{content[:800]}...")
-                    
-            return "\n\n".join(context)
-        except Exception as e:
-            return f"Error reading project context: {e}"
-    
     def _process_validation_response(self, response_content: str) -> Dict[str, Any]:
         """Process validation response"""
         try:
-            json_match = re.search(r'\{.*\}', response_content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
+            extraction = extract_json(response_content, expected_keys=("validation_status",))
+            if extraction.ok:
+                result = extraction.data
+                if extraction.repairs:
+                    print(f"Repaired validation response: {', '.join(extraction.repairs)}")
             else:
                 result = {
                     "validation_status": "FAIL",
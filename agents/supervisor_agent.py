@@ -1,15 +1,24 @@
 import json
-import re
+import os
 from typing import Dict, Any, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from agents.base_agent import BaseAgent
+from core.flow_parser import link_plan
+from core.json_extract import extract_json
+from core.plan_analyzer import analyze_plan
+from core.replanner import (
+    affected_tasks, diff_flows, flow_hash, load_plan, merge_revision, save_plan, uncovered_sections
+)
 from core.state_manager import ProjectState
+from core.task_graph import TASK_GROUPS, TaskGraph, plan_digest, plan_tasks
 
 class SupervisorAgent(BaseAgent):
     """Supervisor agent that coordinates all other agents"""
     
     def __init__(self, llm):
         super().__init__("Supervisor", llm)
+        self._graph: Optional[TaskGraph] = None
+        self.replanning = os.getenv("SUPERVISOR_REPLAN", "1").lower() in ("1", "true", "on")
     
     def create_system_prompt(self) -> str:
         return """You are the Supervisor Agent, acting as a senior project manager for software development.
@@ -37,6 +46,108 @@ Always provide clear, specific task descriptions that agents can execute indepen
 
     async def analyze_and_plan(self, state: ProjectState) -> Dict[str, Any]:
         """Analyze flow and create comprehensive task plan"""
+        plan = None
+        previous = load_plan(state.root_path) if self.replanning else None
+        if previous:
+            plan = await self._revise_plan(state, previous)
+        if plan is None:
+            plan = await self._request_plan(state)
+        # Repair ids, dependencies and cycles before any worker runs, so no task is left unreachable
+        report = analyze_plan(plan)
+        if not report.ok:
+            problems = "; ".join(issue.detail for issue in report.issues if not issue.repaired)
+            print(f"⚠️ Supervisor: Plan unusable ({problems}), using default plan")
+            plan = self._create_default_plan(state)
+            report = analyze_plan(plan)
+        for issue in report.issues:
+            print(f"🔧 Supervisor: {issue.kind} {issue.task_id or ''}: {issue.detail}")
+        print(f"🔍 Supervisor: Plan has {report.describe()}")
+        plan['plan_analysis'] = report.summary()
+        # Link each task to the flow sections it implements so workers get only those slices
+        linked = link_plan(plan, state.flow)
+        if linked:
+            print(f"🔍 Supervisor: Linked {linked} tasks to flow sections")
+        save_plan(state.root_path, state.flow, plan)
+        return plan
+
+    async def _revise_plan(self, state: ProjectState, previous: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update the project's previous plan for a changed flow; None means plan from scratch.
+
+        Only tasks linked to changed sections are sent to the LLM. Every other task keeps its
+        id, description and links, so its build cache entry stays valid.
+        """
+        old_plan = json.loads(json.dumps(previous["plan"]))
+        old_plan.pop('plan_analysis', None)
+        if previous.get("flow_sha256") == flow_hash(state.flow):
+            print("♻️ Supervisor: Flow unchanged, reusing previous plan")
+            return old_plan
+        diff = diff_flows(previous.get("flow", ""), state.flow)
+        if not (diff.old.structured and diff.new.structured) or not set(diff.old.nodes) & set(diff.new.nodes):
+            # Nothing to anchor the old tasks to: a different or unstructured flow
+            return None
+        if diff.empty:
+            print("♻️ Supervisor: Flow sections unchanged, reusing previous plan")
+            return old_plan
+        affected = affected_tasks(old_plan, diff)
+        uncovered = uncovered_sections(old_plan, diff)
+        print(f"🔍 Supervisor: Flow changed ({len(diff.added)} added, {len(diff.removed)} removed, "
+              f"{len(diff.changed)} changed sections), {len(affected)} tasks affected")
+        if not affected and not uncovered:
+            return old_plan
+
+        affected_set = set(affected)
+        others = [{"id": task['id'], "agent": task.get('agent'), "description": task.get('description', '')}
+                  for task in plan_tasks(old_plan) if task['id'] not in affected_set]
+        revise = [{k: v for k, v in task.items() if k != 'flow_nodes'}
+                  for task in plan_tasks(old_plan) if task['id'] in affected_set]
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", self.create_system_prompt()),
+            ("human", """
+The project flow has changed since the task plan below was made. Revise the plan for these changes only.
+
+FLOW CHANGES:
+{changes}
+
+SECTIONS NOT COVERED BY ANY TASK: {uncovered}
+
+TASKS AFFECTED BY THE CHANGES:
+{affected}
+
+UNCHANGED TASKS (keep as they are, may be used as dependencies):
+{others}
+
+DESIGN CONFIG: {design_config}
+
+Return a JSON object with:
+- "updated_tasks": affected tasks that need changes, as full task objects with their original "id"
+- "new_tasks": tasks for requirements no existing task covers (id, description, agent, dependencies, deliverables)
+- "removed_task_ids": ids of affected tasks that are no longer needed
+
+Leave affected tasks that still fit the new flow out of all three lists.
+""")
+        ])
+        response = await self.llm.ainvoke(
+            prompt.format_messages(
+                changes=diff.describe(),
+                uncovered=", ".join(uncovered) or "none",
+                affected=json.dumps(revise, indent=1),
+                others=json.dumps(others),
+                design_config=state.design_config
+            )
+        )
+        extraction = extract_json(response.content, expected_keys=("updated_tasks", "new_tasks", "removed_task_ids"))
+        if not extraction.ok or not isinstance(extraction.data, dict):
+            print("⚠️ Supervisor: Could not parse plan revision, planning from scratch")
+            return None
+        revision = extraction.data
+        plan = merge_revision(old_plan, revision, affected)
+        print(f"♻️ Supervisor: Revised plan: {len(revision.get('updated_tasks') or [])} updated, "
+              f"{len(revision.get('new_tasks') or [])} new, {len(revision.get('removed_task_ids') or [])} removed, "
+              f"{len(others)} kept")
+        return plan
+
+    async def _request_plan(self, state: ProjectState) -> Dict[str, Any]:
+        """Ask the LLM for the task plan, falling back to a default plan"""
         
         print("🔍 Supervisor: Starting project analysis...")
         
@@ -70,7 +181,7 @@ Return your analysis as a JSON object with:
 Each task should include:
 - "id": unique identifier
 - "description": detailed task description
-- "agent": target agent (database/backend/frontend)
+- "agent": target agent (database/backend/frontend/documentation)
 - "dependencies": list of task IDs this depends on
 - "deliverables": expected outputs/files
 """)
@@ -89,17 +200,17 @@ Each task should include:
         print("🔍 Supervisor: Received LLM response, processing...")
         
         try:
-            # Extract JSON from response
-            content = response.content
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
+            # Extract JSON from response, repairing fences, trailing commas and truncation
+            extraction = extract_json(response.content, expected_keys=TASK_GROUPS)
+            if extraction.ok:
+                if extraction.repairs:
+                    print(f"🔍 Supervisor: Repaired JSON response ({', '.join(extraction.repairs)})")
                 print("🔍 Supervisor: Successfully parsed JSON response")
-                return result
+                return extraction.data
             else:
                 # Fallback parsing
                 print("🔍 Supervisor: JSON parsing failed, using fallback")
-                return self._parse_response_fallback(content)
+                return self._parse_response_fallback(response.content)
         except Exception as e:
             print(f"🔍 Supervisor: Error parsing response: {e}")
             return self._create_default_plan(state)
@@ -160,23 +271,19 @@ Each task should include:
         if state.task_plan is None:
             # Create initial plan
             state.task_plan = await self.analyze_and_plan(state)
+            state.plan_revision = plan_digest(state.task_plan)
         
-        # Find next available task based on dependencies
-        all_tasks = (
-            state.task_plan.get('database_tasks', []) +
-            state.task_plan.get('backend_tasks', []) +
-            state.task_plan.get('frontend_tasks', [])
-        )
-        
-        for task in all_tasks:
-            task_id = task['id']
-            if (state.completed_tasks is not None and task_id not in state.completed_tasks and 
-                state.pending_tasks is not None and task_id not in state.pending_tasks):
-                # Check if dependencies are met
-                dependencies = task.get('dependencies', [])
-                if state.completed_tasks is not None and all(dep in state.completed_tasks for dep in dependencies):
-                    if state.pending_tasks is not None:
-                        state.pending_tasks.append(task_id)
-                    return task
+        # Ready queue over the plan, built once and synced with newly completed tasks
+        if not state.plan_revision:
+            state.plan_revision = plan_digest(state.task_plan)
+        if self._graph is None or self._graph.revision != state.plan_revision:
+            self._graph = TaskGraph.from_state(state)
+        else:
+            self._graph.sync(state.completed_tasks or [])
         
-        return None 
\ No newline at end of file
+        task = self._graph.peek()
+        if task is not None:
+            self._graph.claim(task['id'])
+            if state.pending_tasks is not None:
+                state.pending_tasks.append(task['id'])
+        return task
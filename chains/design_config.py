@@ -1,5 +1,5 @@
 from langchain.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
+from core.llm_utils import get_gemini_llm
 
 design_prompt = PromptTemplate(
     template="""
@@ -85,7 +85,7 @@ This output will be passed directly to a frontend agent. Keep it clean, precise,
     input_variables=["flow"],
 )
 
-llm = ChatGoogleGenerativeAI(model = "gemini-2.0-flash",temperature=0.1)
+llm = get_gemini_llm(["gemini-2.0-flash"], temperature=0.1, max_retries=6).as_runnable()
 
 
 design_chain = design_prompt | llm
\ No newline at end of file
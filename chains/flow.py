@@ -1,10 +1,10 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from dotenv import load_dotenv
+from core.llm_utils import get_gemini_llm
 
 load_dotenv() 
 
-llm = ChatGoogleGenerativeAI(model = "gemini-2.0-flash")
+llm = get_gemini_llm(["gemini-2.0-flash"], temperature=0.7, max_retries=6).as_runnable()
 
 
 flow_prompt =  ChatPromptTemplate.from_messages([
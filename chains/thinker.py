@@ -1,13 +1,13 @@
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from core.llm_utils import get_gemini_llm
 
 
 load_dotenv()
 # Instance of the llm used in the thinker chain
-llm = ChatGoogleGenerativeAI(model = "gemini-2.0-flash-exp")
+llm = get_gemini_llm(["gemini-2.0-flash-exp"], temperature=0.7, max_retries=6).as_runnable()
 # Define the structured output model
 class ThinkerOutput(BaseModel):
     clarification_needed: bool = Field(description="True if clarification is still needed")
@@ -1,5 +1,17 @@
-from .llm_utils import get_gemini_llm, LoggingGeminiLLM
-from .file_manager import FileManager
+from .llm_utils import get_gemini_llm, get_llm_registry, LLMRegistry, LoggingGeminiLLM
+from .response_cache import ResponseCache, get_response_cache
+from .model_health import ModelHealthTracker
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .concurrency import AdaptiveConcurrency, get_adaptive_concurrency
+from .file_manager import FileManager, WriteLedger
+from .blob_store import BlobStore, OutputLog, get_blob_store, get_output_log
+from .project_index import ProjectIndex, get_project_index
+from .flow_parser import FlowTree, get_flow_tree, link_plan
+from .prompt_packer import PromptPacker, TokenEstimator, get_token_estimator
+from .task_graph import TaskGraph, plan_digest, plan_tasks
+from .plan_analyzer import PlanError, PlanReport, analyze_plan, validate_plan
+from .build_cache import BuildCache, get_build_cache
+from .checkpointing import CompressedSerializer, open_checkpointer
 from .state_manager import ProjectState, State
 
-__all__ = ['get_gemini_llm', 'LoggingGeminiLLM', 'FileManager', 'ProjectState', 'State'] 
\ No newline at end of file
+__all__ = ['get_gemini_llm', 'get_llm_registry', 'LLMRegistry', 'LoggingGeminiLLM', 'ResponseCache', 'get_response_cache', 'ModelHealthTracker', 'RateLimiter', 'get_rate_limiter', 'AdaptiveConcurrency', 'get_adaptive_concurrency', 'FileManager', 'WriteLedger', 'BlobStore', 'OutputLog', 'get_blob_store', 'get_output_log', 'ProjectIndex', 'get_project_index', 'FlowTree', 'get_flow_tree', 'link_plan', 'PromptPacker', 'TokenEstimator', 'get_token_estimator', 'TaskGraph', 'plan_digest', 'plan_tasks', 'PlanError', 'PlanReport', 'analyze_plan', 'validate_plan', 'BuildCache', 'get_build_cache', 'CompressedSerializer', 'open_checkpointer', 'ProjectState', 'State']
\ No newline at end of file
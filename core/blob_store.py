@@ -0,0 +1,186 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from core.project_index import INDEX_DIR
+
+BLOB_DIR = "blobs"
+OUTPUT_LOG_FILE = "outputs.jsonl"
+
+# Result keys that can be large or hold file payloads; everything else is kept as task metadata
+_PAYLOAD_KEYS = ("files", "content", "patch", "edits")
+
+
+class BlobStore:
+    """Content-addressed file store under <root>/.multicode/blobs/<sha[:2]>/<sha>.
+
+    Blobs are written once (atomically) and never modified, so identical content produced
+    by several tasks is stored once and reads can use read-only memory maps.
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = os.path.abspath(root_path)
+        self.path = os.path.join(self.root_path, INDEX_DIR, BLOB_DIR)
+        self._known: set = set()
+        self._lock = threading.Lock()
+
+    def _blob_path(self, sha256: str) -> str:
+        return os.path.join(self.path, sha256[:2], sha256)
+
+    def put(self, data: Union[str, bytes]) -> str:
+        """Store content and return its sha256"""
+        raw = data.encode("utf-8") if isinstance(data, str) else data
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest in self._known:
+            return digest
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._known.add(digest)
+        return digest
+
+    def has(self, sha256: str) -> bool:
+        return sha256 in self._known or os.path.exists(self._blob_path(sha256))
+
+    def view(self, sha256: str):
+        """Read-only memory map of a blob (bytes for empty blobs); use as a context manager"""
+        with open(self._blob_path(sha256), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return _EmptyView()
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, sha256: str) -> bytes:
+        with self.view(sha256) as view:
+            return view[:]
+
+    def read_text(self, sha256: str) -> str:
+        return self.read(sha256).decode("utf-8")
+
+
+class _EmptyView(bytes):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class OutputLog:
+    """Append-only JSON-lines log of task results, indexed by task id.
+
+    Each record holds a task's metadata and, for every file it produced, the path, size in bytes and
+    blob hash. File contents live in the BlobStore, so graph state and checkpoints only carry
+    these small records, and every attempt of a task stays in the history.
+    """
+
+    def __init__(self, root_path: str, blobs: Optional[BlobStore] = None):
+        self.root_path = os.path.abspath(root_path)
+        self.path = os.path.join(self.root_path, INDEX_DIR, OUTPUT_LOG_FILE)
+        self.blobs = blobs or BlobStore(self.root_path)
+        self._offsets: Dict[str, List[int]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    task_id = json.loads(line)["task"]
+                except (ValueError, KeyError, TypeError):
+                    break
+                self._offsets.setdefault(task_id, []).append(offset)
+                self._count += 1
+                offset += len(line)
+        if offset < os.path.getsize(self.path):
+            # A torn last line from a crash mid-append; drop it so the next append starts clean
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, task_id: str, agent: str, result: Dict[str, Any], run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Move file contents into the blob store and log the task's metadata; returns the record"""
+        files = []
+        for file_info in (result or {}).get("files") or []:
+            if not isinstance(file_info, dict) or "path" not in file_info:
+                continue
+            sha256, size = file_info.get("blob"), file_info.get("size")
+            if sha256 is None and isinstance(file_info.get("content"), str):
+                raw = file_info["content"].encode("utf-8")
+                sha256, size = self.blobs.put(raw), len(raw)
+            files.append({"path": file_info["path"], "sha256": sha256, "size": size})
+        metadata = {key: value for key, value in (result or {}).items() if key not in _PAYLOAD_KEYS}
+        with self._lock:
+            record = {"seq": self._count, "task": task_id, "agent": agent, "run": run_id,
+                      "time": round(time.time(), 3), **metadata, "files": files}
+            line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line)
+            self._offsets.setdefault(task_id, []).append(offset)
+            self._count += 1
+        return record
+
+    def _read_at(self, offset: int) -> Dict[str, Any]:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def latest(self, task_id: str) -> Optional[Dict[str, Any]]:
+        offsets = self._offsets.get(task_id)
+        return self._read_at(offsets[-1]) if offsets else None
+
+    def history(self, task_id: str) -> List[Dict[str, Any]]:
+        return [self._read_at(offset) for offset in self._offsets.get(task_id, [])]
+
+    def task_ids(self) -> List[str]:
+        return list(self._offsets)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def file_contents(self, record: Dict[str, Any]) -> Dict[str, str]:
+        """path -> content for the files of a record"""
+        return {f["path"]: self.blobs.read_text(f["sha256"]) for f in record.get("files", [])
+                if f.get("sha256") and self.blobs.has(f["sha256"])}
+
+
+_logs: Dict[str, OutputLog] = {}
+_logs_lock = threading.Lock()
+
+
+def get_output_log(root_path: str) -> OutputLog:
+    """Process-wide output log (and blob store) per project root"""
+    key = os.path.abspath(root_path)
+    with _logs_lock:
+        log = _logs.get(key)
+        if log is None:
+            log = OutputLog(key)
+            _logs[key] = log
+        return log
+
+
+def get_blob_store(root_path: str) -> BlobStore:
+    return get_output_log(root_path).blobs
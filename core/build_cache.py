@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.blob_store import get_output_log
+from core.file_manager import FileManager, WRITTEN
+from core.flow_parser import get_flow_tree
+from core.project_index import INDEX_DIR
+
+BUILD_CACHE_FILE = "build_cache.jsonl"
+
+REUSED = "reused"
+REBUILT = "rebuilt"
+
+
+def _digest(*parts: Any) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def output_digest(record: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Hash of what a task produced (file paths and content hashes), None if it has no output"""
+    if not isinstance(record, dict):
+        return None
+    files = sorted((f.get("path"), f.get("sha256")) for f in record.get("files") or [] if isinstance(f, dict))
+    return _digest(files)
+
+
+class BuildCache:
+    """Task results memoized by a hash of their inputs, like an incremental build.
+
+    The inputs of a task are its description, the flow sections it is linked to, the design
+    config, the agent's prompt fingerprint and the output digests of its dependencies. A task
+    whose inputs hash to a known key is restored from the blob store without an LLM call.
+    Dependants of a rebuilt task are only rebuilt if its output actually changed.
+    Entries are appended to <root>/.multicode/build_cache.jsonl; the last one per key wins.
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = os.path.abspath(root_path)
+        self.path = os.path.join(self.root_path, INDEX_DIR, BUILD_CACHE_FILE)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._latest_by_task: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if not isinstance(entry, dict) or "key" not in entry or "task" not in entry:
+                    continue
+                self._entries[entry["key"]] = entry
+                self._latest_by_task[entry["task"]] = entry
+
+    def inputs(self, task: Dict[str, Any], agent, flow: str, design_config: str,
+               dependency_outputs: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """The hashed inputs of one task; a missing dependency output makes it uncacheable"""
+        tree = get_flow_tree(flow)
+        description = task.get('description', '')
+        if tree.structured:
+            # Only the task's own sections count, not the outline: adding a section elsewhere
+            # in the flow must not invalidate every task
+            node_ids = [n for n in task.get('flow_nodes') or [] if n in tree.nodes]
+            flow_input = tree.render(node_ids or tree.link(description, agent.name.lower()))
+        else:
+            flow_input = flow
+        return {
+            "description": _digest(description, task.get('deliverables')),
+            "flow": _digest(flow_input),
+            "design_config": _digest(design_config),
+            "prompt": agent.prompt_fingerprint(),
+            "dependencies": {dep: dependency_outputs.get(dep) for dep in sorted(task.get('dependencies') or [])},
+        }
+
+    @staticmethod
+    def key(inputs: Dict[str, Any]) -> Optional[str]:
+        if any(value is None for value in inputs["dependencies"].values()):
+            return None
+        return _digest(inputs)
+
+    def lookup(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        blobs = get_output_log(self.root_path).blobs
+        if not all(f.get("sha256") and blobs.has(f["sha256"]) for f in entry["record"].get("files", [])):
+            return None
+        return entry
+
+    def explain(self, task_id: str, inputs: Dict[str, Any]) -> str:
+        """Why a task must be rebuilt, compared with its last cached build"""
+        previous = self._latest_by_task.get(task_id)
+        if previous is None:
+            return "not built before"
+        changed = [name for name in ("description", "flow", "design_config", "prompt")
+                   if previous["inputs"].get(name) != inputs[name]]
+        old_deps = previous["inputs"].get("dependencies", {})
+        for dep, digest in inputs["dependencies"].items():
+            if digest is None:
+                changed.append(f"dependency {dep} has no output")
+            elif old_deps.get(dep) != digest:
+                changed.append(f"dependency {dep} output")
+        return "changed: " + ", ".join(changed) if changed else "previous result no longer available"
+
+    def store(self, key: Optional[str], task_id: str, inputs: Dict[str, Any], record: Dict[str, Any]) -> None:
+        if key is None:
+            return
+        kept = {k: v for k, v in record.items() if k not in ("seq", "run", "time", "cached", "build")}
+        entry = {"key": key, "task": task_id, "inputs": inputs, "record": kept}
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            self._entries[key] = entry
+            self._latest_by_task[task_id] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def restore(self, entry: Dict[str, Any], task_id: str) -> Tuple[Dict[str, Any], int]:
+        """Write a cached task's files back (unchanged ones are skipped); returns (result, files written)"""
+        blobs = get_output_log(self.root_path).blobs
+        files: List[Dict[str, Any]] = []
+        written = 0
+        for file_info in entry["record"].get("files", []):
+            content = blobs.read_text(file_info["sha256"])
+            file_path = os.path.join(self.root_path, file_info["path"])
+            FileManager.ensure_directory(os.path.dirname(file_path))
+            status = FileManager.write_file_if_changed(file_path, content, root_path=self.root_path, task_id=task_id)
+            written += status == WRITTEN
+            files.append({"path": file_info["path"], "blob": file_info["sha256"], "size": file_info.get("size")})
+        result = {k: v for k, v in entry["record"].items() if k not in ("task", "agent", "files")}
+        result["files"] = files
+        return result, written
+
+
+_caches: Dict[str, BuildCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_build_cache(root_path: str) -> BuildCache:
+    key = os.path.abspath(root_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = BuildCache(key)
+            _caches[key] = cache
+        return cache
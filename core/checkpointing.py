@@ -0,0 +1,132 @@
+import os
+import zlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Tuple
+
+import aiosqlite
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from core.project_index import INDEX_DIR
+
+try:
+    import zstandard
+except ImportError:  # optional: zlib is used when zstandard is not installed
+    zstandard = None
+
+CHECKPOINT_FILE = "checkpoints.sqlite"
+ZLIB_PREFIX = "zlib+"
+ZSTD_PREFIX = "zstd+"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """Wraps LangGraph's serializer and compresses payloads above min_size.
+
+    The codec is recorded in the type tag ("zstd+msgpack", "zlib+json"...), so checkpoints
+    written with or without zstandard installed stay readable.
+    """
+
+    def __init__(self, inner: Optional[SerializerProtocol] = None, level: int = 6, min_size: int = 256):
+        self.inner = inner or JsonPlusSerializer()
+        self.level = level
+        self.min_size = min_size
+        self._compressor = zstandard.ZstdCompressor(level=level) if zstandard else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        if self._compressor is not None:
+            return ZSTD_PREFIX + type_, self._compressor.compress(data)
+        return ZLIB_PREFIX + type_, zlib.compress(data, self.level)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.startswith(ZSTD_PREFIX):
+            if self._decompressor is None:
+                raise RuntimeError("checkpoint was written with zstandard compression; install zstandard")
+            return self.inner.loads_typed((type_[len(ZSTD_PREFIX):], self._decompressor.decompress(payload)))
+        if type_.startswith(ZLIB_PREFIX):
+            return self.inner.loads_typed((type_[len(ZLIB_PREFIX):], zlib.decompress(payload)))
+        return self.inner.loads_typed(data)
+
+
+def checkpoint_path(root_path: str) -> str:
+    return os.getenv("CHECKPOINT_DB") or os.path.join(os.path.abspath(root_path), INDEX_DIR, CHECKPOINT_FILE)
+
+
+def project_thread_id(root_path: str) -> str:
+    """Checkpoint thread for a project: its directory name"""
+    return os.path.basename(os.path.abspath(root_path).rstrip(os.sep)) or "main"
+
+
+@asynccontextmanager
+async def open_checkpointer(root_path: str, backend: Optional[str] = None) -> AsyncIterator[Any]:
+    """Durable SQLite checkpointer for a project (WORKFLOW_CHECKPOINTER=memory for in-memory)"""
+    backend = (backend or os.getenv("WORKFLOW_CHECKPOINTER", "sqlite")).lower()
+    if backend == "memory":
+        yield MemorySaver()
+        return
+    path = checkpoint_path(root_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = await aiosqlite.connect(path)
+    try:
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        saver = AsyncSqliteSaver(conn, serde=CompressedSerializer())
+        await saver.setup()
+        yield saver
+    finally:
+        await conn.close()
+
+
+async def has_checkpoint(saver: Any, thread_id: str) -> bool:
+    return await saver.aget_tuple({"configurable": {"thread_id": thread_id}}) is not None
+
+
+async def clear_thread(saver: Any, thread_id: str) -> None:
+    """Forget a thread's history so a fresh run doesn't inherit its reduced state"""
+    if isinstance(saver, AsyncSqliteSaver):
+        await saver.setup()
+        async with saver.lock:
+            await saver.conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            await saver.conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            await saver.conn.commit()
+    elif hasattr(saver, "adelete_thread"):
+        await saver.adelete_thread(thread_id)
+
+
+async def compact_checkpoints(saver: Any, thread_id: str, keep: int = 5) -> int:
+    """Retention: keep the newest `keep` super-steps of a thread, delete older ones and their writes.
+
+    Resuming only needs the latest checkpoint; a few more are kept for inspection.
+    Returns the number of checkpoints removed.
+    """
+    if not isinstance(saver, AsyncSqliteSaver):
+        return 0
+    async with saver.lock:
+        cursor = await saver.conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, max(keep, 1) - 1),
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            return 0
+        oldest_kept = row[0]
+        cursor = await saver.conn.execute(
+            "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id < ?", (thread_id, oldest_kept)
+        )
+        removed = cursor.rowcount
+        await saver.conn.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_id < ?",
+                                 (thread_id, oldest_kept))
+        await saver.conn.commit()
+    return removed
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+RATE_LIMITED = "rate_limited"
+SERVER_ERROR = "server_error"
+SUCCESS = "success"
+OTHER = "other"
+
+_RATE_LIMIT_MARKERS = ("429", "resourceexhausted", "resource_exhausted", "too many requests", "quota")
+_SERVER_ERROR_MARKERS = ("500", "502", "503", "504", "internalservererror", "serviceunavailable",
+                         "unavailable", "deadlineexceeded", "deadline_exceeded", "bad gateway")
+
+
+def classify_error(error: BaseException) -> str:
+    """Map an LLM client exception onto the feedback signals the AIMD controller reacts to"""
+    for attr in ("status_code", "code"):
+        code = getattr(error, attr, None)
+        code = code() if callable(code) else code
+        value = getattr(code, "value", code)
+        if isinstance(value, tuple):
+            value = value[0]
+        if value == 429:
+            return RATE_LIMITED
+        if isinstance(value, int) and 500 <= value < 600:
+            return SERVER_ERROR
+    text = f"{type(error).__name__} {error}".lower()
+    if any(marker in text for marker in _RATE_LIMIT_MARKERS):
+        return RATE_LIMITED
+    if any(marker in text for marker in _SERVER_ERROR_MARKERS):
+        return SERVER_ERROR
+    return OTHER
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease window of in-flight requests for one model"""
+
+    def __init__(self, name: str, initial: float = 4.0, min_limit: float = 1.0, max_limit: float = 64.0,
+                 increase: float = 1.0, decrease: float = 0.5, cooldown: float = 5.0, history_size: int = 200):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.history = deque(maxlen=history_size)
+        self._last_decrease = 0.0
+        self._waiters = deque()  # (loop, future) in arrival order
+        self._lock = threading.Lock()
+
+    @property
+    def window(self) -> int:
+        return max(int(self.min_limit), int(self.limit))
+
+    async def acquire(self) -> None:
+        # Waiters are plain futures on the caller's loop, so one limiter can be
+        # shared by every event loop in the process (batch runs, asyncio.run per project)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < self.window and not self._waiters:
+                self.in_flight += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    # The slot was handed to us just before we were cancelled
+                    self.in_flight -= 1
+                    self._wake()
+            raise
+
+    def release(self, outcome: str) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            now = time.monotonic()
+            old = self.limit
+            if outcome == SUCCESS:
+                # +increase per window's worth of successes, i.e. roughly +1 per round trip
+                self.limit = min(self.max_limit, self.limit + self.increase / max(1.0, self.limit))
+                if int(self.limit) != int(old):
+                    self._record(now, old, "increase")
+            elif outcome in (RATE_LIMITED, SERVER_ERROR) and now - self._last_decrease >= self.cooldown:
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                self._last_decrease = now
+                self._record(now, old, outcome)
+            self._wake()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window": self.window,
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": len(self._waiters),
+                "adjustments": len(self.history),
+            }
+
+    def _record(self, now: float, old: float, reason: str) -> None:
+        self.history.append({"time": time.time(), "from": round(old, 2), "to": round(self.limit, 2), "reason": reason})
+        if reason != "increase":
+            print(f"[Concurrency] {self.name}: {reason}, window {int(old)} -> {self.window}")
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.window:
+            loop, future = self._waiters.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            loop.call_soon_threadsafe(_grant, future)
+
+
+def _grant(future) -> None:
+    if not future.done():
+        future.set_result(True)
+
+
+class AdaptiveConcurrency:
+    """One AIMD limiter per model"""
+
+    def __init__(self, initial: float = 4.0, max_limit: float = 64.0):
+        self.initial = initial
+        self.max_limit = max_limit
+        self._limiters: Dict[str, AIMDLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, model: str) -> AIMDLimiter:
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                limiter = AIMDLimiter(model, initial=self.initial, max_limit=self.max_limit)
+                self._limiters[model] = limiter
+            return limiter
+
+    async def acquire(self, model: str) -> None:
+        await self.limiter(model).acquire()
+
+    def release(self, model: str, error: Optional[BaseException] = None) -> None:
+        self.limiter(model).release(SUCCESS if error is None else classify_error(error))
+
+    def abandon(self, model: str) -> None:
+        """Free the slot of a cancelled call without treating it as feedback"""
+        self.limiter(model).release(OTHER)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.to_dict() for limiter in limiters}
+
+    def history(self, model: str) -> List[Dict[str, Any]]:
+        return list(self.limiter(model).history)
+
+
+_shared_concurrency: Optional[AdaptiveConcurrency] = None
+_shared_concurrency_lock = threading.Lock()
+
+
+def get_adaptive_concurrency() -> Optional[AdaptiveConcurrency]:
+    """Process-wide AIMD controller; disabled with ADAPTIVE_CONCURRENCY=0"""
+    global _shared_concurrency
+    if os.getenv("ADAPTIVE_CONCURRENCY", "1").lower() in ("0", "false", "off"):
+        return None
+    with _shared_concurrency_lock:
+        if _shared_concurrency is None:
+            _shared_concurrency = AdaptiveConcurrency(
+                initial=float(os.getenv("CONCURRENCY_INITIAL", "4")),
+                max_limit=float(os.getenv("CONCURRENCY_MAX", "64")),
+            )
+        return _shared_concurrency
@@ -1,33 +1,144 @@
+import hashlib
 import os
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.project_index import get_project_index
+
+WRITTEN = "written"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class WriteLedger:
+    """Per-run accounting of agent file writes, used to spot tasks that thrash the same files"""
+
+    def __init__(self):
+        self.bytes_written = 0
+        self.bytes_skipped = 0
+        self.files_written = 0
+        self.files_skipped = 0
+        self.writers: Dict[str, List[str]] = {}  # relative path -> task ids that actually rewrote it
+        self._lock = threading.Lock()
+
+    def record(self, path: str, size: int, status: str, task_id: Optional[str] = None) -> None:
+        with self._lock:
+            if status == WRITTEN:
+                self.bytes_written += size
+                self.files_written += 1
+                self.writers.setdefault(path, []).append(task_id or "unknown")
+            elif status == SKIPPED:
+                self.bytes_skipped += size
+                self.files_skipped += 1
+
+    def rewritten_files(self) -> Dict[str, List[str]]:
+        """Files rewritten by more than one task"""
+        with self._lock:
+            return {path: tasks for path, tasks in self.writers.items() if len(set(tasks)) > 1}
+
+    def summary(self) -> Dict[str, object]:
+        rewritten = self.rewritten_files()
+        total = self.bytes_written + self.bytes_skipped
+        return {
+            "files_written": self.files_written,
+            "files_skipped": self.files_skipped,
+            "bytes_written": self.bytes_written,
+            "bytes_skipped": self.bytes_skipped,
+            "skip_ratio": round(self.bytes_skipped / total, 3) if total else 0.0,
+            "files_rewritten_by_multiple_tasks": len(rewritten),
+            "rewritten_files": rewritten,
+        }
+
 
 class FileManager:
     """Handles all file operations for agents"""
-    
+
+    _known_dirs = set()
+    # path -> (size, mtime_ns, sha256) of content we wrote or hashed, so unchanged files are not re-read
+    _hash_cache: Dict[str, Tuple[int, int, str]] = {}
+    _ledgers: Dict[str, WriteLedger] = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def ensure_directory(path: str) -> bool:
         """Create directory if it doesn't exist"""
+        if not path or path in FileManager._known_dirs:
+            return True
         try:
             Path(path).mkdir(parents=True, exist_ok=True)
+            FileManager._known_dirs.add(path)
             return True
         except Exception as e:
             print(f"Error creating directory {path}: {e}")
             return False
-    
+
+    @staticmethod
+    def ensure_directories(file_paths: Iterable[str]) -> None:
+        """Create every parent directory of a batch of files once, deepest paths first"""
+        parents = {os.path.dirname(p) for p in file_paths} - FileManager._known_dirs
+        for parent in sorted(parents, key=len, reverse=True):
+            if parent in FileManager._known_dirs:
+                continue
+            if FileManager.ensure_directory(parent):
+                # mkdir(parents=True) also created every ancestor
+                ancestor = os.path.dirname(parent)
+                while ancestor and ancestor not in FileManager._known_dirs and ancestor != os.path.dirname(ancestor):
+                    FileManager._known_dirs.add(ancestor)
+                    ancestor = os.path.dirname(ancestor)
+
     @staticmethod
     def write_file(file_path: str, content: str) -> bool:
         """Write content to file"""
+        directory = os.path.dirname(file_path)
         try:
             # Ensure directory exists
-            FileManager.ensure_directory(os.path.dirname(file_path))
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            FileManager.ensure_directory(directory)
+            try:
+                with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(content)
+            except FileNotFoundError:
+                # Directory was removed behind our back since we cached it
+                FileManager._known_dirs.discard(directory)
+                FileManager.ensure_directory(directory)
+                with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(content)
+            FileManager._remember_hash(file_path, hashlib.sha256(content.encode('utf-8')).hexdigest())
             return True
         except Exception as e:
             print(f"Error writing file {file_path}: {e}")
             return False
-    
+
+    @staticmethod
+    def write_file_if_changed(file_path: str, content: str, root_path: Optional[str] = None,
+                              task_id: Optional[str] = None) -> str:
+        """Write content unless the file on disk is byte-identical; returns written/skipped/failed"""
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        status = SKIPPED if FileManager._disk_hash(file_path, len(data)) == digest else None
+        if status is None:
+            status = WRITTEN if FileManager.write_file(file_path, content) else FAILED
+        if root_path is not None:
+            rel_path = os.path.relpath(file_path, root_path)
+            FileManager.ledger(root_path).record(rel_path, len(data), status, task_id)
+            if status == WRITTEN:
+                get_project_index(root_path).record_write(rel_path, data, digest)
+        return status
+
+    @staticmethod
+    def ledger(root_path: str) -> WriteLedger:
+        """Write ledger for a project root (one per run)"""
+        key = os.path.abspath(root_path)
+        with FileManager._lock:
+            if key not in FileManager._ledgers:
+                FileManager._ledgers[key] = WriteLedger()
+            return FileManager._ledgers[key]
+
+    @staticmethod
+    def reset_ledger(root_path: str) -> WriteLedger:
+        with FileManager._lock:
+            FileManager._ledgers[os.path.abspath(root_path)] = WriteLedger()
+            return FileManager._ledgers[os.path.abspath(root_path)]
+
     @staticmethod
     def read_file(file_path: str) -> Optional[str]:
         """Read file content"""
@@ -37,7 +148,7 @@ class FileManager:
         except Exception as e:
             print(f"Error reading file {file_path}: {e}")
             return None
-    
+
     @staticmethod
     def list_files(directory: str, extensions: Optional[List[str]] = None) -> List[str]:
         """List files in directory with optional extension filter"""
@@ -50,4 +161,32 @@ class FileManager:
             return files
         except Exception as e:
             print(f"Error listing files in {directory}: {e}")
-            return [] 
\ No newline at end of file
+            return []
+
+    @staticmethod
+    def _disk_hash(file_path: str, expected_size: int) -> Optional[str]:
+        """sha256 of the file on disk, or None if missing or a different size (no read needed)"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if stat.st_size != expected_size:
+            return None
+        cached = FileManager._hash_cache.get(file_path)
+        if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+            return cached[2]
+        try:
+            with open(file_path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+        FileManager._hash_cache[file_path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    @staticmethod
+    def _remember_hash(file_path: str, digest: str) -> None:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        FileManager._hash_cache[file_path] = (stat.st_size, stat.st_mtime_ns, digest)
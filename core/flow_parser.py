@@ -0,0 +1,308 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.lexical_index import LexicalIndex, tokenize
+
+MODULE = "module"
+ENDPOINT = "endpoint"
+COMPONENT = "component"
+TABLE = "table"
+SECTION = "section"
+
+_HEADING = re.compile(r"^\s{0,3}(#{1,6})\s+(.+?)\s*#*\s*$")
+# A line that is nothing but bold text acts as a heading in many LLM-written flows
+_BOLD_HEADING = re.compile(r"^\s{0,3}\*\*([^*]{3,120})\*\*:?\s*$")
+_ENDPOINT = re.compile(r"\b(GET|POST|PUT|PATCH|DELETE)\s+`?(/[^\s`'\")]*)")
+_COMPONENT_FILE = re.compile(r"`?([A-Z][A-Za-z0-9]*)\.(?:jsx?|tsx?|vue|svelte)`?")
+_COMPONENT_WORD = re.compile(r"\b(component|page|screen|view|modal|form|widget|layout)s?\b", re.IGNORECASE)
+_TABLE_NAMES = [
+    re.compile(r"\btable\s+(?:named|called)\s+`?([A-Za-z_][\w]*)`?", re.IGNORECASE),
+    re.compile(r"\btable\s+schema\s*\(\s*`?([A-Za-z_][\w]*)`?\s*\)", re.IGNORECASE),
+    re.compile(r"\bcreate\s+table\s+(?:if\s+not\s+exists\s+)?`?([A-Za-z_][\w]*)`?", re.IGNORECASE),
+    re.compile(r"`([A-Za-z_][\w]*)`\s+table\b", re.IGNORECASE),
+]
+_TABLE_WORD = re.compile(r"\b(table|schema|database|model)s?\b", re.IGNORECASE)
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_MARKUP = re.compile(r"[*`_]+")
+_NUMBERING = re.compile(r"^\s*(?:\d+[.)]|[A-Z][.)])\s+")
+
+# Which top-level modules each worker agent usually cares about
+AGENT_HINTS = {
+    "database": "database db schema table model data storage sql sqlite migration",
+    "backend": "backend api server endpoint route business logic validation middleware",
+    "frontend": "frontend ui client component page view interface style layout user",
+    "documentation": "documentation readme setup install usage overview",
+}
+
+
+def _clean(title: str) -> str:
+    return _NUMBERING.sub("", _MARKUP.sub("", title)).strip(" :")
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")[:48] or "node"
+
+
+class FlowNode:
+    """One heading of the flow and the text directly under it"""
+
+    __slots__ = ("id", "title", "kind", "level", "parent", "children", "lines", "endpoints", "tables",
+                 "components")
+
+    def __init__(self, node_id: str, title: str, level: int, parent: Optional["FlowNode"]):
+        self.id = node_id
+        self.title = title
+        self.kind = SECTION
+        self.level = level
+        self.parent = parent
+        self.children: List["FlowNode"] = []
+        self.lines: List[str] = []
+        self.endpoints: List[str] = []
+        self.tables: List[str] = []
+        self.components: List[str] = []
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines).strip()
+
+    def ancestors(self) -> List["FlowNode"]:
+        chain = []
+        node = self.parent
+        while node is not None and node.level > 0:
+            chain.append(node)
+            node = node.parent
+        return list(reversed(chain))
+
+    def descendants(self) -> Iterable["FlowNode"]:
+        for child in self.children:
+            yield child
+            yield from child.descendants()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "title": self.title, "kind": self.kind, "level": self.level,
+                "endpoints": self.endpoints, "tables": self.tables, "components": self.components,
+                "children": [child.to_dict() for child in self.children]}
+
+
+class FlowTree:
+    """Markdown flow parsed into a heading tree of modules, endpoints, components and tables.
+
+    Tasks are linked to nodes by BM25 over each node's title and text, boosted when the task
+    names a node's endpoint, table or component, so a worker prompt can carry only the parts
+    of the blueprint it implements plus a short outline of the rest.
+    """
+
+    def __init__(self, flow: str):
+        self.flow = flow or ""
+        self.root = FlowNode("root", "", 0, None)
+        self.nodes: Dict[str, FlowNode] = {}
+        self._parse()
+        self._lexical = LexicalIndex(path_weight=2)
+        for node in self.nodes.values():
+            # Ids are title slugs, so the title terms get the path weighting
+            self._lexical.update(node.id, node.text)
+
+    @property
+    def structured(self) -> bool:
+        """False for flows without headings, which are better sent whole"""
+        return len(self.nodes) >= 2
+
+    def _parse(self) -> None:
+        current = self.root
+        in_code = False
+        for line in self.flow.splitlines():
+            if line.lstrip().startswith("```"):
+                in_code = not in_code
+            match = None if in_code else _HEADING.match(line)
+            if match:
+                level, title = len(match.group(1)), match.group(2)
+            else:
+                bold = None if in_code else _BOLD_HEADING.match(line)
+                if not bold:
+                    if not _RULE.match(line):
+                        current.lines.append(line)
+                    continue
+                # Bold lines nest one level below the enclosing heading
+                level, title = (current.level + 1 if current.level else 2), bold.group(1)
+            title = _clean(title)
+            if not title:
+                current.lines.append(line)
+                continue
+            parent = current
+            while parent.level >= level:
+                parent = parent.parent
+            node = FlowNode(self._unique_id(title), title, level, parent)
+            parent.children.append(node)
+            self.nodes[node.id] = node
+            current = node
+        for node in self.nodes.values():
+            self._classify(node)
+
+    def _unique_id(self, title: str) -> str:
+        base = _slug(title)
+        node_id, counter = base, 2
+        while node_id in self.nodes:
+            node_id = f"{base}-{counter}"
+            counter += 1
+        return node_id
+
+    def _classify(self, node: FlowNode) -> None:
+        body = node.text
+        node.endpoints = sorted({f"{m.group(1)} {m.group(2)}" for m in _ENDPOINT.finditer(node.title + "\n" + body)})
+        node.tables = sorted({name for pattern in _TABLE_NAMES for name in pattern.findall(node.title + "\n" + body)})
+        node.components = sorted(set(_COMPONENT_FILE.findall(node.title)))
+        context = " ".join(a.title for a in node.ancestors())
+        if _ENDPOINT.search(node.title):
+            node.kind = ENDPOINT
+        elif node.children and (node.parent is self.root or node.level <= 2 or not node.components):
+            node.kind = MODULE
+        elif node.components or _COMPONENT_WORD.search(node.title) or (
+                node.level >= 3 and _COMPONENT_WORD.search(context) and not node.children):
+            node.kind = COMPONENT
+            if not node.components:
+                node.components = [node.title]
+        elif node.tables or _TABLE_WORD.search(node.title) or (
+                node.level >= 3 and _TABLE_WORD.search(context) and not node.children):
+            node.kind = TABLE
+        elif node.parent is self.root:
+            node.kind = MODULE
+        if node.kind != COMPONENT:
+            node.components = []
+
+    def summary(self, max_chars: int = 2500, max_level: int = 4) -> str:
+        """Intro paragraph plus an indented outline of headings, with endpoint/table/component tags"""
+        intro = self.root.text
+        if len(intro) > 600:
+            intro = intro[:600].rsplit(" ", 1)[0] + " ..."
+        lines = [intro] if intro else []
+        for node in self.root.descendants():
+            if node.level > max_level:
+                continue
+            tags = node.endpoints if node.kind == ENDPOINT and not _ENDPOINT.search(node.title) else []
+            tags += [f"table {name}" for name in node.tables] if node.kind == TABLE else []
+            suffix = f" [{', '.join(tags)}]" if tags else ""
+            lines.append(f"{'  ' * (node.level - 1)}- {node.title}{suffix}")
+        text = "\n".join(lines)
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit("\n", 1)[0] + "\n  ..."
+        return text
+
+    def link(self, query: str, agent: Optional[str] = None, max_nodes: int = 6, threshold: float = 0.35) -> List[str]:
+        """Ids of the nodes a task description is about, most relevant first"""
+        if not self.nodes:
+            return []
+        scores: Dict[str, float] = dict(self._lexical.score(query))
+        lowered = query.lower()
+        top = max(scores.values(), default=1.0)
+        for node in self.nodes.values():
+            if node.kind == ENDPOINT:
+                named = [e for e in node.endpoints if e.split(" ", 1)[1].lower() in lowered]
+            elif node.kind == TABLE:
+                named = [t for t in node.tables if re.search(rf"\b{re.escape(t.lower())}\b", lowered)]
+            elif node.kind == COMPONENT:
+                named = [c for c in node.components if c.lower() in lowered]
+            else:
+                named = []
+            if named:
+                scores[node.id] = scores.get(node.id, 0.0) + top * 0.5 * len(named)
+        if agent in AGENT_HINTS:
+            hint = set(tokenize(AGENT_HINTS[agent]))
+            for node_id in list(scores):
+                node = self.nodes[node_id]
+                trail = " ".join(a.title for a in node.ancestors()) + " " + node.title
+                if hint & set(tokenize(trail)):
+                    scores[node_id] *= 1.3
+        if not scores:
+            return []
+        best = max(scores.values())
+        ranked = sorted((s, node_id) for node_id, s in scores.items() if s >= best * threshold)
+        chosen: List[str] = []
+        for _, node_id in reversed(ranked):
+            # A chosen section already carries its subsections
+            if any(a.id in chosen for a in self.nodes[node_id].ancestors()):
+                continue
+            chosen.append(node_id)
+            if len(chosen) >= max_nodes:
+                break
+        return chosen
+
+    def render(self, node_ids: Iterable[str], max_chars: int = 8000) -> str:
+        """Selected nodes with their subsections, each under its heading breadcrumb"""
+        parts: List[str] = []
+        used = 0
+        for node_id in node_ids:
+            node = self.nodes.get(node_id)
+            if node is None:
+                continue
+            trail = " > ".join(a.title for a in node.ancestors() + [node])
+            body = [node.text] + [f"{'#' * min(6, d.level)} {d.title}\n{d.text}" for d in node.descendants()]
+            block = f"[{trail}]\n" + "\n".join(b for b in body if b).strip()
+            if used + len(block) > max_chars:
+                remaining = max_chars - used
+                if remaining < 400:
+                    break
+                block = block[:remaining].rsplit("\n", 1)[0] + "\n..."
+            parts.append(block)
+            used += len(block)
+        return "\n\n".join(parts)
+
+    def slice(self, query: str, node_ids: Optional[List[str]] = None, agent: Optional[str] = None,
+              max_chars: int = 8000) -> str:
+        """Global summary plus the nodes linked to a task (computed from `query` if not given)"""
+        node_ids = [n for n in (node_ids or []) if n in self.nodes] or self.link(query, agent)
+        relevant = self.render(node_ids, max_chars)
+        summary = self.summary()
+        if not relevant:
+            return summary
+        return f"OVERVIEW:\n{summary}\n\nRELEVANT REQUIREMENTS FOR THIS TASK:\n{relevant}"
+
+
+class FlowTreeCache:
+    """Parsed flows keyed by content hash, so each agent call doesn't reparse the blueprint"""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, FlowTree]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, flow: str) -> FlowTree:
+        key = hashlib.sha256((flow or "").encode("utf-8")).hexdigest()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        tree = FlowTree(flow)
+        with self._lock:
+            self._entries[key] = tree
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return tree
+
+
+_shared_cache = FlowTreeCache()
+
+
+def get_flow_tree(flow: str) -> FlowTree:
+    return _shared_cache.get(flow)
+
+
+def link_plan(plan: Dict[str, Any], flow: str) -> int:
+    """Attach `flow_nodes` to every task in a supervisor plan; returns how many tasks were linked"""
+    tree = get_flow_tree(flow)
+    if not tree.structured or not isinstance(plan, dict):
+        return 0
+    linked = 0
+    for key, tasks in plan.items():
+        if not key.endswith("_tasks") or not isinstance(tasks, list):
+            continue
+        for task in tasks:
+            if not isinstance(task, dict) or task.get("flow_nodes"):
+                continue
+            deliverables = task.get("deliverables") or []
+            query = " ".join([str(task.get("description", ""))] + [str(d) for d in deliverables])
+            task["flow_nodes"] = tree.link(query, task.get("agent") or key[:-len("_tasks")])
+            linked += bool(task["flow_nodes"])
+    return linked
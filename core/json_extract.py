@@ -0,0 +1,244 @@
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_VALID_ESCAPES = set('"\\/bfnrtu')
+_LITERALS = ("true", "false", "null")
+CLOSED_TRUNCATED = "closed truncated output"
+
+
+class JsonExtraction:
+    """Result of pulling a JSON object out of an LLM response"""
+
+    def __init__(self, data: Optional[Any] = None, repairs: Optional[List[str]] = None, truncated: bool = False):
+        self.data = data
+        self.repairs = repairs or []
+        self.truncated = truncated
+
+    @property
+    def ok(self) -> bool:
+        return isinstance(self.data, dict)
+
+    def __repr__(self) -> str:
+        return f"JsonExtraction(ok={self.ok}, repairs={self.repairs}, truncated={self.truncated})"
+
+
+def extract_json(text: str, expected_keys: Sequence[str] = ()) -> JsonExtraction:
+    """Find the JSON object in text and parse it, repairing common LLM defects.
+
+    Handles code fences and prose around the object (including prose containing braces),
+    raw newlines/tabs inside strings, stray unescaped quotes, trailing commas, and output
+    cut off mid-object (the incomplete trailing element is dropped and containers closed).
+    A complete object whose repair still had to close containers means a quote was misread;
+    it is reported as a failure rather than returning silently shortened values.
+
+    When the text holds several objects (say the answer plus an example in prose), the first
+    one having any of `expected_keys` wins, then the first complete non-empty object; only if
+    none parses, or the output was cut off, is the longest span repaired.
+    """
+    if not text:
+        return JsonExtraction()
+    candidates = _top_level_objects(text)
+    if not candidates:
+        return JsonExtraction()
+    if expected_keys:
+        for span, truncated in candidates:
+            extraction = _parse(text[span[0]:span[1]], truncated)
+            if extraction.ok and any(key in extraction.data for key in expected_keys):
+                return extraction
+    longest = max(candidates, key=lambda c: c[0][1] - c[0][0])
+    # A reply cut off at the token limit ends in an unclosed object; that one is the answer
+    if not longest[1]:
+        for span, _ in candidates:
+            try:
+                data = json.loads(text[span[0]:span[1]])
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict) and data:
+                return JsonExtraction(data)
+    span, truncated = longest
+    return _parse(text[span[0]:span[1]], truncated)
+
+
+def _parse(candidate: str, truncated: bool) -> JsonExtraction:
+    if not truncated:
+        try:
+            return JsonExtraction(json.loads(candidate))
+        except json.JSONDecodeError:
+            pass
+    repaired, repairs = _repair(candidate)
+    if not truncated and CLOSED_TRUNCATED in repairs:
+        return JsonExtraction(None, repairs + ["unrecoverable: ambiguous quotes in a complete object"], False)
+    try:
+        return JsonExtraction(json.loads(repaired), repairs, truncated)
+    except json.JSONDecodeError as e:
+        return JsonExtraction(None, repairs + [f"unrecoverable: {e.msg} at {e.pos}"], truncated)
+
+
+def _top_level_objects(text: str) -> List[Tuple[Tuple[int, int], bool]]:
+    """Single scan returning every balanced top-level {...} span in order, plus an unclosed tail.
+
+    Each item is (span, truncated); only the last one can be truncated.
+    """
+    spans: List[Tuple[Tuple[int, int], bool]] = []
+    start = -1
+    depth = 0
+    in_string = False
+    escape = False
+    for i, char in enumerate(text):
+        if depth == 0:
+            if char == "{":
+                start, depth = i, 1
+            continue
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                spans.append(((start, i + 1), False))
+    if depth > 0:
+        spans.append(((start, len(text)), True))
+    return spans
+
+
+def _repair(candidate: str) -> Tuple[str, List[str]]:
+    out: List[str] = []
+    repairs: List[str] = []
+    stack: List[str] = []
+    # Per nesting depth: output length and open containers at the last point where every value was complete
+    safe_points: Dict[int, Tuple[int, List[str]]] = {}
+    latest_safe: Tuple[int, List[str]] = (0, [])
+    in_string = False
+    escape = False
+    # Whether the next string in the current object is a key, and whether the open string is one
+    expect_key = False
+    string_is_key = False
+    n = len(candidate)
+
+    def note(repair: str) -> None:
+        if repair not in repairs:
+            repairs.append(repair)
+
+    for i, char in enumerate(candidate):
+        if in_string:
+            if escape:
+                escape = False
+                if char not in _VALID_ESCAPES:
+                    # Lone backslash (e.g. a regex in generated code): keep it literally
+                    out.append("\\")
+                    note("escaped invalid backslashes")
+                out.append(char)
+            elif char == "\\":
+                escape = True
+                out.append(char)
+            elif char == '"':
+                if _closes_string(candidate, i + 1, stack, string_is_key):
+                    in_string = False
+                    out.append(char)
+                else:
+                    out.append('\\"')
+                    note("escaped stray quotes")
+            elif char in _CONTROL_ESCAPES:
+                out.append(_CONTROL_ESCAPES[char])
+                note("escaped control characters in strings")
+            elif ord(char) < 0x20:
+                out.append(f"\\u{ord(char):04x}")
+                note("escaped control characters in strings")
+            else:
+                out.append(char)
+            continue
+        if char == '"':
+            in_string = True
+            string_is_key = expect_key and bool(stack) and stack[-1] == "{"
+            expect_key = False
+            out.append(char)
+        elif char in "{[":
+            stack.append(char)
+            expect_key = char == "{"
+            out.append(char)
+            safe_points[len(stack)] = (len(out), list(stack))
+        elif char in "}]":
+            if _strip_trailing_comma(out):
+                note("removed trailing commas")
+            if stack:
+                stack.pop()
+            expect_key = False
+            out.append(char)
+            latest_safe = safe_points[len(stack)] = (len(out), list(stack))
+        elif char == ",":
+            latest_safe = safe_points[len(stack)] = (len(out), list(stack))
+            expect_key = bool(stack) and stack[-1] == "{"
+            out.append(char)
+        else:
+            if char == ":":
+                expect_key = False
+            out.append(char)
+
+    if stack or in_string:
+        note(CLOSED_TRUNCATED)
+        length, open_stack = latest_safe
+        # Drop a half-written array element entirely (e.g. a file whose content was cut off)
+        for depth, opener in enumerate(stack[:-1], start=1):
+            if opener == "[" and depth in safe_points:
+                length, open_stack = safe_points[depth]
+                break
+        if length == 0:
+            return "".join(out), repairs
+        out = out[:length]
+        _strip_trailing_comma(out)
+        for opener in reversed(open_stack):
+            out.append("}" if opener == "{" else "]")
+    return "".join(out), repairs
+
+
+def _closes_string(candidate: str, j: int, stack: List[str], is_key: bool) -> bool:
+    """Whether the quote just before candidate[j] ends the open string, judged by what follows it.
+
+    A key must be followed by ':'. A value must be followed by the closer of its container, or by
+    a comma that is itself followed by something that can start the next key or element.
+    Anything else (a word, a colon after a value) means the quote is part of the text.
+    """
+    n = len(candidate)
+    while j < n and candidate[j].isspace():
+        j += 1
+    if j >= n:
+        return True
+    char = candidate[j]
+    top = stack[-1] if stack else None
+    if is_key:
+        return char == ":"
+    if char == "}":
+        return top == "{"
+    if char == "]":
+        return top == "["
+    if char != ",":
+        return False
+    j += 1
+    while j < n and candidate[j].isspace():
+        j += 1
+    if j >= n:
+        return True
+    following = candidate[j]
+    if top == "{":
+        return following in '"}'
+    return following in '"{[]-' or following.isdigit() or candidate.startswith(_LITERALS, j)
+
+
+def _strip_trailing_comma(out: List[str]) -> bool:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+        return True
+    return False
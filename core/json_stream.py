@@ -0,0 +1,115 @@
+import json
+from typing import Any, Dict, List, Optional
+from core.json_extract import extract_json
+
+
+class FileEntryStreamParser:
+    """Incremental parser that yields each `files[]` entry of an agent response as soon as it closes.
+
+    Text before the first `{` (prose, code fences) is ignored. Everything except the
+    file entries is kept as a small JSON skeleton so `summary`, `next_steps` and other
+    top-level keys can still be read once the stream finishes.
+    """
+
+    def __init__(self, array_key: str = "files"):
+        self.array_key = array_key
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.finished = False
+        self.entry_count = 0
+        self.errors: List[str] = []
+        self._string_chars: List[str] = []
+        self._pending_key: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._files_depth: Optional[int] = None
+        self._entry: Optional[List[str]] = None
+        self._skeleton: List[str] = []
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Consume the next chunk of model output and return entries completed by it"""
+        completed = []
+        for char in text:
+            if self.finished:
+                break
+            if not self.stack and char != "{":
+                continue
+            entry = self._step(char)
+            if entry is not None:
+                completed.append(entry)
+        return completed
+
+    def skeleton(self) -> Dict[str, Any]:
+        """Top-level response without the streamed entries (empty dict if unparsable)"""
+        text = "".join(self._skeleton)
+        if not self.finished:
+            open_stack = self.stack
+            if self._entry is not None:
+                open_stack = self.stack[:self._files_depth]
+            elif self.in_string:
+                text += '"'
+            text += "".join("}" if opener == "{" else "]" for opener in reversed(open_stack))
+        try:
+            result = json.loads(text, strict=False)
+        except json.JSONDecodeError:
+            return {}
+        return result if isinstance(result, dict) else {}
+
+    def _step(self, char: str) -> Optional[Dict[str, Any]]:
+        capturing = self._entry is not None
+        if capturing:
+            self._entry.append(char)
+        elif not (self._in_files_array() and (char == "," or char.isspace())):
+            self._skeleton.append(char)
+
+        if self.in_string:
+            if self.escape:
+                self.escape = False
+            elif char == "\\":
+                self.escape = True
+            elif char == '"':
+                self.in_string = False
+                if len(self.stack) == 1:
+                    self._pending_key = "".join(self._string_chars)
+                return None
+            if len(self.stack) == 1:
+                self._string_chars.append(char)
+            return None
+
+        if char == '"':
+            self.in_string = True
+            self._string_chars = []
+        elif char == ":" and len(self.stack) == 1:
+            self._current_key = self._pending_key
+        elif char in "{[":
+            if char == "{" and self._in_files_array() and not capturing:
+                self._skeleton.pop()
+                self._entry = [char]
+            if char == "[" and len(self.stack) == 1 and self._current_key == self.array_key:
+                self._files_depth = 2
+            self.stack.append(char)
+        elif char in "}]":
+            if self.stack:
+                self.stack.pop()
+            if len(self.stack) == 1 and char == "]" and self._files_depth is not None:
+                self._files_depth = None
+            elif capturing and self._in_files_array():
+                return self._close_entry()
+            if not self.stack:
+                self.finished = True
+        elif char == "," and len(self.stack) == 1:
+            self._current_key = None
+        return None
+
+    def _in_files_array(self) -> bool:
+        return self._files_depth is not None and len(self.stack) == self._files_depth
+
+    def _close_entry(self) -> Optional[Dict[str, Any]]:
+        text = "".join(self._entry)
+        self._entry = None
+        self.entry_count += 1
+        extraction = extract_json(text)
+        if not extraction.ok:
+            self.errors.append(f"file entry {self.entry_count}: {', '.join(extraction.repairs) or 'not an object'}")
+            return None
+        return extraction.data
@@ -0,0 +1,145 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9]*")
+_CAMEL_PART = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have if in into is it its of on or that the then this to was
+were will with not no do does can should would all any each other than which when where who how
+what you your we our they their them there these those also only such use using used via per
+""".split())
+
+
+def stem(term: str) -> str:
+    """Light suffix stripping so "products"/"product" and "listing"/"list" meet"""
+    if len(term) > 4 and term.endswith("ies"):
+        return term[:-3] + "y"
+    if len(term) > 5 and term.endswith("ing"):
+        return term[:-3]
+    if len(term) > 4 and term.endswith("ed"):
+        return term[:-2]
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        return term[:-1]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed identifier-aware terms: snake_case splits on '_', camelCase keeps the word and its parts"""
+    terms = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        if len(lower) > 1 and lower not in STOPWORDS:
+            terms.append(stem(lower))
+        parts = _CAMEL_PART.findall(word)
+        if len(parts) > 1:
+            terms.extend(stem(p.lower()) for p in parts if len(p) > 1 and p.lower() not in STOPWORDS)
+    return terms
+
+
+class LexicalIndex:
+    """Incremental BM25 index over project files.
+
+    Postings are kept per term (doc slot -> term frequency) so a file update only touches
+    its own terms; scoring gathers the postings of the query terms into NumPy arrays and
+    accumulates BM25 weights for all matching documents at once.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, path_weight: int = 3):
+        self.k1 = k1
+        self.b = b
+        self.path_weight = path_weight
+        self._slots: Dict[str, int] = {}
+        self._paths: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._lengths = np.zeros(64, dtype=np.float64)
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._shas: Dict[str, Optional[str]] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._slots
+
+    def sha(self, path: str) -> Optional[str]:
+        return self._shas.get(path)
+
+    def update(self, path: str, text: str, sha: Optional[str] = None) -> None:
+        """(Re)index one file from its text; the path's own terms are weighted path_weight times"""
+        counts = Counter(tokenize(text))
+        for term in tokenize(path):
+            counts[term] += self.path_weight
+        self.add_counts(path, dict(counts), sha)
+
+    def add_counts(self, path: str, counts: Dict[str, int], sha: Optional[str] = None) -> None:
+        self.remove(path)
+        slot = self._free.pop() if self._free else len(self._paths)
+        if slot == len(self._paths):
+            self._paths.append(path)
+            if slot >= len(self._lengths):
+                self._lengths = np.concatenate([self._lengths, np.zeros(len(self._lengths))])
+        else:
+            self._paths[slot] = path
+        self._slots[path] = slot
+        self._shas[path] = sha
+        self._doc_terms[slot] = counts
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[slot] = tf
+        length = float(sum(counts.values()))
+        self._lengths[slot] = length
+        self._total_length += length
+
+    def remove(self, path: str) -> None:
+        slot = self._slots.pop(path, None)
+        if slot is None:
+            return
+        self._shas.pop(path, None)
+        for term in self._doc_terms.pop(slot, {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths[slot]
+        self._lengths[slot] = 0.0
+        self._paths[slot] = None
+        self._free.append(slot)
+
+    def score(self, query: str) -> List[Tuple[str, float]]:
+        """Paths matching any query term, best BM25 score first"""
+        n_docs = len(self._slots)
+        terms = set(tokenize(query))
+        if not n_docs or not terms:
+            return []
+        avg_length = max(self._total_length / n_docs, 1.0)
+        lengths = self._lengths[:len(self._paths)]
+        scores = np.zeros(len(self._paths), dtype=np.float64)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+            tf = np.fromiter(postings.values(), dtype=np.float64, count=len(postings))
+            df = len(postings)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[slots] / avg_length)
+            scores[slots] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        hits = np.flatnonzero(scores > 0)
+        order = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self._paths[slot], float(scores[slot])) for slot in order]
+
+    def to_dict(self) -> Dict[str, list]:
+        return {path: [self._shas.get(path), self._doc_terms[slot]] for path, slot in self._slots.items()}
+
+    def load_dict(self, data: Dict[str, list], valid_shas: Dict[str, str]) -> None:
+        """Restore documents whose stored hash still matches the file index"""
+        for path, (sha, counts) in data.items():
+            if sha is not None and valid_shas.get(path) == sha:
+                self.add_counts(path, counts, sha)
@@ -1,54 +1,440 @@
+import asyncio
 import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import RunnableLambda
 from langchain_google_genai import ChatGoogleGenerativeAI
 from dotenv import load_dotenv
+from core.concurrency import AdaptiveConcurrency, get_adaptive_concurrency
+from core.model_health import ModelHealthTracker
+from core.rate_limiter import RateLimiter, estimate_tokens, get_rate_limiter
+from core.response_cache import ResponseCache, get_response_cache, make_cache_key
 
 load_dotenv()
 
+DEFAULT_GEMINI_MODELS = [
+    "gemini-2.5-flash",
+    "gemini-2.0-flash",
+    "gemini-2.0-flash-lite",
+    "gemini-1.5-flash",
+    "gemini-2.5-flash-lite-preview-06-17",
+]
+
 # Gemini LLM utility (inlined from llm_utils.py)
 class LoggingGeminiLLM:
-    def __init__(self, llms, model_names):
+    def __init__(self, llms, model_names, cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 hedge: bool = False, hedge_percentile: float = 0.95,
+                 hedge_min_delay: float = 2.0, hedge_default_delay: float = 30.0):
         self.llms = llms
         self.model_names = model_names
-        self.llm = llms[0].with_fallbacks(llms[1:])
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.health = ModelHealthTracker(model_names)
+        # Hedging: if the primary is slower than its observed percentile latency,
+        # race the same request against the next model and keep the first answer
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0}
+        self._fallback_llm = None
+
+    @property
+    def llm(self):
+        # Built on first use: with_fallbacks needs every client, which defeats lazy construction
+        if self._fallback_llm is None:
+            self._fallback_llm = self.llms[0].with_fallbacks(list(self.llms)[1:])
+        return self._fallback_llm
 
-    def invoke(self, *args, **kwargs):
-        for i, llm in enumerate(self.llms):
+    def invoke(self, *args, use_cache: bool = True, **kwargs):
+        keys = self._cache_keys(args, kwargs) if use_cache else None
+        cached = self._cache_lookup(keys)
+        if cached is not None:
+            return cached
+        tokens = self._estimate_tokens(args)
+        for i in self._call_order():
+            name = self.model_names[i]
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire_sync(name, tokens)
+            self.health.begin(name)
+            started = time.monotonic()
             try:
-                print(f"[Gemini LLM] Trying model: {self.model_names[i]}")
-                result = llm.invoke(*args, **kwargs)
-                print(f"[Gemini LLM] Model succeeded: {self.model_names[i]}")
+                print(f"[Gemini LLM] Trying model: {name}")
+                result = self.llms[i].invoke(*args, **kwargs)
+                self.health.record_success(name, time.monotonic() - started)
+                self._reconcile(name, tokens, result)
+                print(f"[Gemini LLM] Model succeeded: {name}")
+                self._cache_store(keys, i, result)
                 return result
             except Exception as e:
-                print(f"[Gemini LLM] Model failed: {self.model_names[i]} | Error: {e}")
+                self.health.record_failure(name, time.monotonic() - started)
+                self._reconcile(name, tokens, None)
+                print(f"[Gemini LLM] Model failed: {name} | Error: {e}")
         raise RuntimeError("All Gemini fallback models failed.")
 
-    async def ainvoke(self, *args, **kwargs):
-        for i, llm in enumerate(self.llms):
+    async def ainvoke(self, *args, use_cache: bool = True, **kwargs):
+        keys = self._cache_keys(args, kwargs) if use_cache else None
+        cached = self._cache_lookup(keys)
+        if cached is not None:
+            return cached
+        order = self._call_order()
+        if self.hedge and len(order) > 1:
+            return await self._ainvoke_hedged(order, keys, args, kwargs)
+        for i in order:
             try:
-                print(f"[Gemini LLM] Trying model: {self.model_names[i]}")
-                result = await llm.ainvoke(*args, **kwargs)
-                print(f"[Gemini LLM] Model succeeded: {self.model_names[i]}")
-                return result
+                return await self._ainvoke_model(i, keys, args, kwargs)
+            except Exception:
+                continue
+        raise RuntimeError("All Gemini fallback models failed.")
+
+    async def _ainvoke_model(self, i: int, keys, args, kwargs, sent: Optional[asyncio.Event] = None):
+        name = self.model_names[i]
+        tokens = self._estimate_tokens(args)
+        # The token reservation is taken by the limiter, so it must be given back even if we are
+        # cancelled (e.g. a losing hedge) while still queued for quota or a concurrency slot
+        slot = False
+        started = None
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(name, tokens)
+            if self.concurrency is not None:
+                await self.concurrency.acquire(name)
+                slot = True
+            self.health.begin(name)
+            started = time.monotonic()
+            if sent is not None:
+                sent.set()
+            print(f"[Gemini LLM] Trying model: {name}")
+            result = await self.llms[i].ainvoke(*args, **kwargs)
+        except asyncio.CancelledError:
+            if started is not None:
+                self.health.cancel(name)
+            self._reconcile(name, tokens, None)
+            if slot:
+                self.concurrency.abandon(name)
+            raise
+        except Exception as e:
+            if started is not None:
+                self.health.record_failure(name, time.monotonic() - started)
+            self._reconcile(name, tokens, None)
+            if slot:
+                self.concurrency.release(name, e)
+            print(f"[Gemini LLM] Model failed: {name} | Error: {e}")
+            raise
+        if self.concurrency is not None:
+            self.concurrency.release(name)
+        self.health.record_success(name, time.monotonic() - started)
+        self._reconcile(name, tokens, result)
+        print(f"[Gemini LLM] Model succeeded: {name}")
+        self._cache_store(keys, i, result)
+        return result
+
+    async def _ainvoke_hedged(self, order: List[int], keys, args, kwargs):
+        remaining = list(order)
+        self.hedge_counters["requests"] += 1
+        while remaining:
+            primary = remaining.pop(0)
+            sent = asyncio.Event()
+            tasks = {asyncio.ensure_future(self._ainvoke_model(primary, keys, args, kwargs, sent)): primary}
+            try:
+                # Time spent queued for rate-limit quota or a concurrency slot is not model latency,
+                # so the hedge timer only starts once the primary request has actually been sent
+                sending = asyncio.ensure_future(sent.wait())
+                try:
+                    await asyncio.wait(set(tasks) | {sending}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    sending.cancel()
+                delay = self._hedge_delay(primary)
+                done, _ = await asyncio.wait(set(tasks), timeout=delay)
+                if not done and remaining:
+                    backup = remaining.pop(0)
+                    self.hedge_counters["hedged"] += 1
+                    print(f"[Gemini LLM] Hedging {self.model_names[primary]} after {delay:.1f}s "
+                          f"with {self.model_names[backup]}")
+                    tasks[asyncio.ensure_future(self._ainvoke_model(backup, keys, args, kwargs))] = backup
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if len(tasks) > 1:
+                                winner = "primary_wins" if tasks[task] == primary else "hedge_wins"
+                                self.hedge_counters[winner] += 1
+                            return task.result()
+            finally:
+                # Cancel whichever request lost the race (or all of them if we were cancelled)
+                for task in tasks:
+                    if not task.done():
+                        task.cancel()
+        raise RuntimeError("All Gemini fallback models failed.")
+
+    def _hedge_delay(self, i: int) -> float:
+        observed = self.health.latency_percentile(self.model_names[i], self.hedge_percentile)
+        if observed is None:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, observed)
+
+    async def astream(self, *args, use_cache: bool = True, **kwargs):
+        """Stream chunks from the first healthy model; falls back only before any chunk was emitted"""
+        keys = self._cache_keys(args, kwargs) if use_cache else None
+        cached = self._cache_lookup(keys)
+        if cached is not None:
+            yield AIMessageChunk(content=cached.content, response_metadata=cached.response_metadata,
+                                 usage_metadata=cached.usage_metadata)
+            return
+        tokens = self._estimate_tokens(args)
+        for i in self._call_order():
+            name = self.model_names[i]
+            slot = False
+            started = None
+            final = None
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(name, tokens)
+                if self.concurrency is not None:
+                    await self.concurrency.acquire(name)
+                    slot = True
+                self.health.begin(name)
+                started = time.monotonic()
+                print(f"[Gemini LLM] Streaming from model: {name}")
+                async for chunk in self.llms[i].astream(*args, **kwargs):
+                    final = chunk if final is None else final + chunk
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                if started is not None:
+                    self.health.cancel(name)
+                self._reconcile(name, tokens, None)
+                if slot:
+                    self.concurrency.abandon(name)
+                raise
             except Exception as e:
-                print(f"[Gemini LLM] Model failed: {self.model_names[i]} | Error: {e}")
+                if started is not None:
+                    self.health.record_failure(name, time.monotonic() - started)
+                self._reconcile(name, tokens, None)
+                if slot:
+                    self.concurrency.release(name, e)
+                print(f"[Gemini LLM] Model failed: {name} | Error: {e}")
+                if final is not None:
+                    # Part of the answer was already handed to the caller; a different model cannot resume it
+                    raise
+                continue
+            if self.concurrency is not None:
+                self.concurrency.release(name)
+            self.health.record_success(name, time.monotonic() - started)
+            self._reconcile(name, tokens, final)
+            print(f"[Gemini LLM] Model succeeded: {name}")
+            self._cache_store(keys, i, final)
+            return
         raise RuntimeError("All Gemini fallback models failed.")
 
+    def as_runnable(self) -> RunnableLambda:
+        """Expose invoke/ainvoke as a Runnable so chains can pipe into this LLM"""
+        return RunnableLambda(self.invoke, afunc=self.ainvoke)
+
+    def hedge_stats(self) -> Dict[str, Any]:
+        """Hedge rate and which side won, for tuning hedge_percentile"""
+        counters = dict(self.hedge_counters)
+        requests = counters["requests"]
+        counters["hedge_rate"] = counters["hedged"] / requests if requests else 0.0
+        counters["hedge_win_rate"] = counters["hedge_wins"] / counters["hedged"] if counters["hedged"] else 0.0
+        return counters
+
+    def concurrency_stats(self) -> Dict[str, Any]:
+        """Current AIMD window per model plus its adjustment history"""
+        if self.concurrency is None:
+            return {}
+        return {
+            name: {**window, "history": self.concurrency.history(name)}
+            for name, window in self.concurrency.stats().items()
+        }
+
+    def health_stats(self) -> Dict[str, Dict[str, Any]]:
+        return self.health.snapshot()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.summary() if self.cache is not None else {}
+
+    def _estimate_tokens(self, args) -> int:
+        if self.rate_limiter is None or not args:
+            return 0
+        return estimate_tokens(args[0])
+
+    def _reconcile(self, name: str, estimated: int, result) -> None:
+        # A failed or cancelled call gives back its estimated tokens; a success is charged actual usage
+        if self.rate_limiter is None:
+            return
+        if result is None:
+            self.rate_limiter.reconcile(name, estimated, 0)
+            return
+        usage = getattr(result, "usage_metadata", None) or {}
+        self.rate_limiter.reconcile(name, estimated, usage.get("total_tokens"))
+
+    def _call_order(self) -> List[int]:
+        index = {name: i for i, name in enumerate(self.model_names)}
+        return [index[name] for name in self.health.order()]
+
+    def _cache_keys(self, args, kwargs) -> Optional[List[str]]:
+        if self.cache is None or not args:
+            return None
+        extra = {k: v for k, v in kwargs.items() if k != "config"}
+        return [
+            make_cache_key(
+                self.model_names[i],
+                args[0],
+                {"temperature": self._temperature(i), **extra},
+            )
+            for i in range(len(self.model_names))
+        ]
+
+    def _temperature(self, i: int) -> Optional[float]:
+        if isinstance(self.llms, LazyClientList):
+            return self.llms.temperature
+        return getattr(self.llms[i], "temperature", None)
+
+    def _cache_lookup(self, keys: Optional[List[str]]) -> Optional[AIMessage]:
+        # Check every fallback model before touching the network so a replay
+        # of a run that fell through to a later model is still served locally
+        if keys is None:
+            return None
+        found = self.cache.get_first(keys)
+        if found is None:
+            return None
+        i, payload = found
+        print(f"[Gemini LLM] Cache hit: {self.model_names[i]}")
+        return AIMessage(**payload)
+
+    def _cache_store(self, keys: Optional[List[str]], index: int, result) -> None:
+        if keys is None or not isinstance(result, AIMessage):
+            return
+        try:
+            self.cache.put(keys[index], self.model_names[index], {
+                "content": result.content,
+                "additional_kwargs": result.additional_kwargs,
+                "response_metadata": result.response_metadata,
+                "usage_metadata": result.usage_metadata,
+            })
+        except Exception as e:
+            print(f"[Gemini LLM] Cache write failed: {e}")
+
     def bind_tools(self, *args, **kwargs):
         return self.llm.bind_tools(*args, **kwargs)
 
     def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
         return getattr(self.llm, name)
 
-def get_gemini_llm():
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable not set.")
-    models = [
-        "gemini-2.5-flash",
-        "gemini-2.0-flash",
-        "gemini-2.0-flash-lite",
-        "gemini-1.5-flash",
-        "gemini-2.5-flash-lite-preview-06-17",
-    ]
-    llms = [ChatGoogleGenerativeAI(model=m, temperature=0.2, max_retries=3, google_api_key=api_key) for m in models]
-    return LoggingGeminiLLM(llms, models) 
\ No newline at end of file
+
+class LazyClientList(Sequence):
+    """Fallback client list that asks the registry for each client only when it is indexed"""
+
+    def __init__(self, registry: "LLMRegistry", model_names: List[str], temperature: float, max_retries: int):
+        self.registry = registry
+        self.model_names = list(model_names)
+        self.temperature = temperature
+        self.max_retries = max_retries
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self.registry.get_client(self.model_names[index], self.temperature, self.max_retries)
+
+    def __len__(self) -> int:
+        return len(self.model_names)
+
+
+class LLMRegistry:
+    """Process-wide pool of Gemini clients, created on first use and shared by every graph"""
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._clients: Dict[Tuple[str, float, int], ChatGoogleGenerativeAI] = {}
+        self._wrappers: Dict[Tuple[Tuple[str, ...], float, int], LoggingGeminiLLM] = {}
+        self._shared_transport = None
+        self._lock = threading.RLock()
+
+    def get_client(self, model: str, temperature: float = 0.2, max_retries: int = 3) -> ChatGoogleGenerativeAI:
+        key = (model, temperature, max_retries)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                print(f"[LLM Registry] Creating client: {model} (temperature={temperature})")
+                client = ChatGoogleGenerativeAI(
+                    model=model,
+                    temperature=temperature,
+                    max_retries=max_retries,
+                    google_api_key=self._require_api_key(),
+                )
+                self._share_transport(client)
+                self._clients[key] = client
+            return client
+
+    def gemini_llm(self, models: Optional[List[str]] = None, temperature: float = 0.2,
+                   max_retries: int = 3) -> LoggingGeminiLLM:
+        """Shared fallback wrapper, so health, hedging and cache statistics are process-wide"""
+        models = list(models or DEFAULT_GEMINI_MODELS)
+        key = (tuple(models), temperature, max_retries)
+        with self._lock:
+            wrapper = self._wrappers.get(key)
+            if wrapper is None:
+                self._require_api_key()
+                wrapper = LoggingGeminiLLM(
+                    LazyClientList(self, models, temperature, max_retries),
+                    models,
+                    cache=get_response_cache(),
+                    rate_limiter=get_rate_limiter(),
+                    concurrency=get_adaptive_concurrency(),
+                    hedge=os.getenv("LLM_HEDGE", "0").lower() in ("1", "true", "on"),
+                    hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+                )
+                self._wrappers[key] = wrapper
+            return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": [f"{model}@{temperature}" for model, temperature, _ in self._clients],
+                "wrappers": len(self._wrappers),
+                "shared_transport": self._shared_transport is not None,
+            }
+
+    def _require_api_key(self) -> str:
+        api_key = self.api_key or os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError("GOOGLE_API_KEY environment variable not set.")
+        return api_key
+
+    def _share_transport(self, client) -> None:
+        # The generative service client is model-agnostic (the model name travels
+        # with each request), so every chat client can reuse one connection pool.
+        transport = getattr(client, "client", None)
+        if transport is None:
+            return
+        if self._shared_transport is None:
+            self._shared_transport = transport
+            return
+        try:
+            client.client = self._shared_transport
+        except Exception as e:
+            print(f"[LLM Registry] Could not share transport: {e}")
+
+
+_registry: Optional[LLMRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMRegistry()
+        return _registry
+
+
+def get_gemini_llm(models: Optional[List[str]] = None, temperature: float = 0.2, max_retries: int = 3):
+    return get_llm_registry().gemini_llm(models, temperature=temperature, max_retries=max_retries)
@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ModelHealth:
+    """Rolling success/latency window and circuit state for a single model"""
+
+    def __init__(self, name: str, position: int, window: int):
+        self.name = name
+        self.position = position
+        self.samples = deque(maxlen=window)  # (succeeded, latency_seconds)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.cooldown = 0.0
+        self.consecutive_failures = 0
+        self.probes_in_flight = 0
+        self.latency_ewma: Optional[float] = None
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok, _ in self.samples if not ok) / len(self.samples)
+
+    def latencies(self) -> List[float]:
+        return [latency for ok, latency in self.samples if ok]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate, 3),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "samples": len(self.samples),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ModelHealthTracker:
+    """Per-model circuit breakers that reorder the fallback chain by observed health"""
+
+    def __init__(self, model_names: List[str], window: int = 20, min_samples: int = 4,
+                 failure_rate_threshold: float = 0.5, consecutive_failure_threshold: int = 2,
+                 base_cooldown: float = 30.0, max_cooldown: float = 600.0,
+                 half_open_trials: int = 1, latency_scale: float = 30.0):
+        self.window = window
+        self.min_samples = min_samples
+        self.failure_rate_threshold = failure_rate_threshold
+        self.consecutive_failure_threshold = consecutive_failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.half_open_trials = half_open_trials
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self.models = {name: ModelHealth(name, i, window) for i, name in enumerate(model_names)}
+
+    def order(self) -> List[str]:
+        """Models to try for the next call, healthiest first; open circuits are skipped"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = []
+            for health in self.models.values():
+                if health.state == OPEN and now - health.opened_at >= health.cooldown:
+                    health.state = HALF_OPEN
+                    health.probes_in_flight = 0
+                    print(f"[Gemini LLM] Circuit half-open, probing model: {health.name}")
+                if health.state == HALF_OPEN:
+                    if health.probes_in_flight < self.half_open_trials:
+                        # A probe keeps its configured priority so a recovered primary wins back traffic
+                        candidates.append((health.position, health))
+                elif health.state == CLOSED:
+                    candidates.append((self._score(health), health))
+            if not candidates:
+                # Every circuit is open: try everything in the configured order rather than fail outright
+                return [h.name for h in sorted(self.models.values(), key=lambda h: h.position)]
+            candidates.sort(key=lambda item: item[0])
+            return [health.name for _, health in candidates]
+
+    def begin(self, name: str) -> None:
+        with self._lock:
+            health = self.models[name]
+            if health.state == HALF_OPEN:
+                health.probes_in_flight += 1
+
+    def cancel(self, name: str) -> None:
+        """Release a half-open probe slot for a call that was abandoned before it finished"""
+        with self._lock:
+            health = self.models[name]
+            if health.state == HALF_OPEN and health.probes_in_flight > 0:
+                health.probes_in_flight -= 1
+
+    def latency_percentile(self, name: str, percentile: float, min_samples: int = 5) -> Optional[float]:
+        """Observed success latency at the given percentile (0-1), or None without enough samples"""
+        with self._lock:
+            latencies = sorted(self.models[name].latencies())
+        if len(latencies) < min_samples:
+            return None
+        rank = min(len(latencies) - 1, max(0, int(round(percentile * (len(latencies) - 1)))))
+        return latencies[rank]
+
+    def record_success(self, name: str, latency: float) -> None:
+        with self._lock:
+            health = self.models[name]
+            health.samples.append((True, latency))
+            health.consecutive_failures = 0
+            health.latency_ewma = latency if health.latency_ewma is None else 0.8 * health.latency_ewma + 0.2 * latency
+            if health.state != CLOSED:
+                print(f"[Gemini LLM] Circuit closed for model: {name}")
+                health.state = CLOSED
+                health.cooldown = 0.0
+                health.samples.clear()
+                health.samples.append((True, latency))
+
+    def record_failure(self, name: str, latency: float) -> None:
+        with self._lock:
+            health = self.models[name]
+            health.samples.append((False, latency))
+            health.consecutive_failures += 1
+            if health.state == HALF_OPEN:
+                self._open(health, min(self.max_cooldown, max(self.base_cooldown, health.cooldown * 2)))
+            elif health.state == CLOSED and self._should_open(health):
+                self._open(health, self.base_cooldown)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: health.to_dict() for name, health in self.models.items()}
+
+    def _should_open(self, health: ModelHealth) -> bool:
+        if health.consecutive_failures >= self.consecutive_failure_threshold:
+            return True
+        return len(health.samples) >= self.min_samples and health.error_rate >= self.failure_rate_threshold
+
+    def _open(self, health: ModelHealth, cooldown: float) -> None:
+        health.state = OPEN
+        health.opened_at = time.monotonic()
+        health.cooldown = cooldown
+        print(f"[Gemini LLM] Circuit opened for model: {health.name} (cooldown {cooldown:.0f}s)")
+
+    def _score(self, health: ModelHealth) -> float:
+        latency_penalty = (health.latency_ewma or 0.0) / self.latency_scale
+        return health.position + 5.0 * health.error_rate + latency_penalty
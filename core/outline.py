@@ -0,0 +1,408 @@
+import ast
+import io
+import json
+import re
+import threading
+import tokenize as py_tokenize
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+MAX_OUTLINE_LINES = 60
+
+_JS_PATTERNS = [
+    # export default function Name(...) / export async function name(...)
+    (re.compile(r"^\s*(export\s+(?:default\s+)?)?(async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)\s*(\([^)]*\))"),
+     lambda m: f"{m.group(1) or ''}{m.group(2) or ''}function {m.group(3)}{_squash(m.group(4))}"),
+    (re.compile(r"^\s*(export\s+(?:default\s+)?)?(abstract\s+)?class\s+([A-Za-z_$][\w$]*)(\s+extends\s+[\w$.]+)?"),
+     lambda m: f"{m.group(1) or ''}class {m.group(3)}{m.group(4) or ''}"),
+    # const name = (args) => / const name = async function(args)
+    (re.compile(r"^\s*(export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*(?::[^=]+)?=\s*(async\s+)?"
+                r"(?:function\s*)?(\([^)]*\)|[A-Za-z_$][\w$]*)\s*(?::[^=]+)?=>"),
+     lambda m: f"{m.group(1) or ''}const {m.group(2)} = {m.group(3) or ''}{_squash(m.group(4))} =>"),
+    (re.compile(r"^\s*export\s+(?:const|let|var)\s+([A-Za-z_$][\w$]*)"), lambda m: f"export const {m.group(1)}"),
+    (re.compile(r"^\s*export\s+(interface|type|enum)\s+([A-Za-z_$][\w$]*)"), lambda m: f"export {m.group(1)} {m.group(2)}"),
+    (re.compile(r"^\s*export\s*\{([^}]*)\}"), lambda m: f"export {{{_squash(m.group(1))}}}"),
+    (re.compile(r"^\s*module\.exports\s*=\s*(.{0,80})"), lambda m: f"module.exports = {_squash(m.group(1))}"),
+    # Express-style routes: app.get('/path', ...) / router.post("/x")
+    (re.compile(r"\b([A-Za-z_$][\w$]*)\.(get|post|put|patch|delete|use|all)\(\s*(['\"`])([^'\"`]*)\3"),
+     lambda m: f"route {m.group(2).upper()} {m.group(4)} ({m.group(1)})"),
+    (re.compile(r"\bfetch\(\s*(['\"`])([^'\"`]*)\1"), lambda m: f"fetch {m.group(2)}"),
+]
+_JS_METHOD = re.compile(r"^\s{2,}(static\s+)?(async\s+)?(get\s+|set\s+)?([A-Za-z_$][\w$]*)\s*(\([^)]*\))\s*\{")
+_JS_KEYWORDS = {"if", "for", "while", "switch", "catch", "function", "return", "with"}
+
+_SQL_CREATE = re.compile(
+    r"create\s+(?:or\s+replace\s+)?(?:temp(?:orary)?\s+)?(table|view|index|unique\s+index|trigger|type)\s+"
+    r"(?:if\s+not\s+exists\s+)?([\w.\"`\[\]]+)", re.IGNORECASE)
+_CSS_VARIABLE = re.compile(r"(--[\w-]+)\s*:\s*([^;}{]+)")
+_MD_HEADING = re.compile(r"^(#{1,4})\s+(.+)$", re.MULTILINE)
+
+
+def outline(path: str, text: str, language: Optional[str] = None) -> str:
+    """Compact structural summary of a source file: signatures, routes, tables, variables"""
+    language = language or _language_from_path(path)
+    extractor = {
+        "python": _python_outline,
+        "javascript": _js_outline,
+        "typescript": _js_outline,
+        "vue": _js_outline,
+        "svelte": _js_outline,
+        "html": _html_outline,
+        "css": _css_outline,
+        "scss": _css_outline,
+        "sql": _sql_outline,
+        "json": _json_outline,
+        "markdown": _markdown_outline,
+    }.get(language)
+    lines = extractor(text) if extractor else []
+    if not lines:
+        # Nothing structural found: a minified head is the most useful fallback
+        lines = [line for line in minify(text, language).splitlines() if line.strip()][:8]
+    if len(lines) > MAX_OUTLINE_LINES:
+        lines = lines[:MAX_OUTLINE_LINES] + [f"... ({len(lines) - MAX_OUTLINE_LINES} more)"]
+    return "\n".join(lines)
+
+
+def minify(text: str, language: Optional[str] = None) -> str:
+    """Drop comments and blank lines; Python indentation is preserved, other languages are dedented"""
+    if language == "python":
+        return _minify_python(text)
+    if language in ("javascript", "typescript", "css", "scss", "vue", "svelte", "sql", "html"):
+        text = _strip_c_comments(text, line_comments=language not in ("css", "html"), sql=language == "sql")
+        if language == "html":
+            text = re.sub(r"<!--.*?-->", "", text, flags=re.DOTALL)
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+class OutlineCache:
+    """Outlines keyed by content hash, so unchanged or duplicated files are summarised once"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha256: str, path: str, text: str, language: Optional[str] = None) -> str:
+        language = language or _language_from_path(path)
+        key = (sha256, language)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        result = outline(path, text, language)
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+
+_shared_cache = OutlineCache()
+
+
+def cached_outline(sha256: str, path: str, text: str, language: Optional[str] = None) -> str:
+    return _shared_cache.get(sha256, path, text, language)
+
+
+def _python_outline(text: str) -> List[str]:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return _js_outline(text)
+    lines: List[str] = []
+    for node in tree.body:
+        lines.extend(_python_node(node, ""))
+    return lines
+
+
+def _python_node(node: ast.AST, indent: str) -> List[str]:
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        lines = [f"{indent}@{_unparse(d)}" for d in node.decorator_list if _is_route_decorator(d)]
+        prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        returns = f" -> {_unparse(node.returns)}" if node.returns is not None else ""
+        lines.append(f"{indent}{prefix} {node.name}({_unparse(node.args)}){returns}")
+        return lines
+    if isinstance(node, ast.ClassDef):
+        bases = ", ".join(_unparse(b) for b in node.bases + node.keywords)
+        lines = [f"{indent}class {node.name}({bases})" if bases else f"{indent}class {node.name}"]
+        for child in node.body:
+            if isinstance(child, (ast.AnnAssign, ast.Assign)):
+                # Model fields and class constants are part of the API other tasks depend on
+                lines.extend(f"{indent}  {line}" for line in _python_assignment(child, full=True))
+            else:
+                lines.extend(_python_node(child, indent + "  "))
+        return lines
+    if isinstance(node, (ast.Assign, ast.AnnAssign)) and not indent:
+        return _python_assignment(node, full=False)
+    return []
+
+
+def _python_assignment(node: ast.AST, full: bool) -> List[str]:
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    names = [t.id for t in targets if isinstance(t, ast.Name)]
+    if not names:
+        return []
+    value = _unparse(node.value) if node.value is not None else ""
+    if not full:
+        # Module level: constants and app/router/blueprint objects only
+        if not (names[0].isupper() or re.match(r"\w+\(", value)):
+            return []
+    annotation = f": {_unparse(node.annotation)}" if isinstance(node, ast.AnnAssign) else ""
+    return [f"{names[0]}{annotation} = {_shorten(value, 80)}" if value else f"{names[0]}{annotation}"]
+
+
+def _is_route_decorator(node: ast.AST) -> bool:
+    target = node.func if isinstance(node, ast.Call) else node
+    name = _unparse(target)
+    return any(part in name for part in (".route", ".get", ".post", ".put", ".patch", ".delete",
+                                         ".websocket", "login_required", "property", "staticmethod",
+                                         "classmethod", "validator", "app.", "router."))
+
+
+def _js_outline(text: str) -> List[str]:
+    lines: List[str] = []
+    in_class = False
+    for raw in _strip_c_comments(text).splitlines():
+        if not raw.strip():
+            continue
+        matched = False
+        for pattern, render in _JS_PATTERNS:
+            m = pattern.search(raw)
+            if m:
+                rendered = render(m)
+                if rendered.startswith("class") or "class " in rendered[:20]:
+                    in_class = True
+                lines.append(rendered)
+                matched = True
+                break
+        if not matched and in_class:
+            m = _JS_METHOD.match(raw)
+            if m and m.group(4) not in _JS_KEYWORDS:
+                lines.append(f"  {m.group(1) or ''}{m.group(2) or ''}{m.group(3) or ''}{m.group(4)}{_squash(m.group(5))}")
+    return _dedupe(lines)
+
+
+class _HtmlOutliner(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines: List[str] = []
+        self._capture: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("title", "h1", "h2", "h3"):
+            self._capture = tag
+        elif tag == "script" and attrs.get("src"):
+            self.lines.append(f"script {attrs['src']}")
+        elif tag == "link" and attrs.get("href") and "stylesheet" in (attrs.get("rel") or ""):
+            self.lines.append(f"stylesheet {attrs['href']}")
+        elif tag == "form":
+            self.lines.append(f"form {attrs.get('id') or ''} {(attrs.get('method') or 'get').upper()} "
+                              f"{attrs.get('action') or ''}".replace("  ", " ").strip())
+        elif tag in ("input", "select", "textarea", "button") and (attrs.get("name") or attrs.get("id")):
+            self.lines.append(f"  {tag} {attrs.get('name') or '#' + attrs['id']}"
+                              f"{' (' + attrs['type'] + ')' if attrs.get('type') else ''}")
+        elif attrs.get("id"):
+            self.lines.append(f"#{attrs['id']} <{tag}>")
+        elif tag == "a" and (attrs.get("href") or "").startswith("/"):
+            self.lines.append(f"link {attrs['href']}")
+
+    def handle_data(self, data):
+        if self._capture and data.strip():
+            self.lines.append(f"{self._capture}: {_shorten(data.strip(), 60)}")
+            self._capture = None
+
+
+def _html_outline(text: str) -> List[str]:
+    parser = _HtmlOutliner()
+    try:
+        parser.feed(text)
+        parser.close()
+    except Exception:
+        pass
+    inline_scripts = re.findall(r"<script(?![^>]*\bsrc=)[^>]*>(.*?)</script>", text, flags=re.DOTALL | re.IGNORECASE)
+    lines = parser.lines
+    for script in inline_scripts:
+        lines.extend(f"script: {line}" for line in _js_outline(script))
+    return _dedupe(lines)
+
+
+def _css_outline(text: str) -> List[str]:
+    text = _strip_c_comments(text, line_comments=False)
+    lines = [f"{name}: {_shorten(value.strip(), 40)}" for name, value in _CSS_VARIABLE.findall(text)]
+    selectors: List[str] = []
+    stack: List[str] = []
+    buffer: List[str] = []
+    for char in text:
+        if char == "{":
+            selector = _squash("".join(buffer))
+            # Top-level rules and rules directly inside @media/@supports blocks
+            if not stack or (len(stack) == 1 and stack[0].startswith("@")):
+                selectors.append(selector)
+            stack.append(selector)
+            buffer = []
+        elif char in "};":
+            if char == "}" and stack:
+                stack.pop()
+            buffer = []
+        else:
+            buffer.append(char)
+    selectors = [s for s in _dedupe(selectors) if s != ":root"]
+    if selectors:
+        lines.append("selectors: " + ", ".join(_shorten(s, 40) for s in selectors[:40]))
+    return lines
+
+
+def _sql_outline(text: str) -> List[str]:
+    text = _strip_c_comments(text, sql=True)
+    lines: List[str] = []
+    for m in _SQL_CREATE.finditer(text):
+        kind, name = m.group(1).upper(), m.group(2)
+        if kind == "TABLE":
+            body = _balanced_parens(text, m.end())
+            columns = []
+            for column in _split_top_level(body):
+                words = column.split()
+                if not words:
+                    continue
+                if words[0].upper() in ("PRIMARY", "FOREIGN", "UNIQUE", "CONSTRAINT", "CHECK", "INDEX", "KEY"):
+                    columns.append(_shorten(_squash(column), 60))
+                else:
+                    columns.append(" ".join(words[:2] + [w for w in words[2:] if w.upper() in
+                                                         ("PRIMARY", "KEY", "NOT", "NULL", "UNIQUE", "REFERENCES")]))
+            lines.append(f"TABLE {name}({', '.join(columns)})")
+        else:
+            lines.append(f"{kind} {name}")
+    return lines
+
+
+def _json_outline(text: str) -> List[str]:
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return []
+    if isinstance(data, dict):
+        lines = []
+        for key, value in list(data.items())[:30]:
+            if isinstance(value, dict):
+                lines.append(f"{key}: {{{', '.join(list(value)[:12])}}}")
+            elif isinstance(value, list):
+                lines.append(f"{key}: [{len(value)} items]")
+            else:
+                lines.append(f"{key}: {_shorten(json.dumps(value), 50)}")
+        return lines
+    if isinstance(data, list):
+        return [f"[{len(data)} items]"]
+    return []
+
+
+def _markdown_outline(text: str) -> List[str]:
+    return [f"{'  ' * (len(hashes) - 1)}{title.strip()}" for hashes, title in _MD_HEADING.findall(text)]
+
+
+def _minify_python(text: str) -> str:
+    try:
+        tokens = [tok for tok in py_tokenize.generate_tokens(io.StringIO(text).readline)
+                  if tok.type != py_tokenize.COMMENT]
+        text = py_tokenize.untokenize(tokens)
+    except (py_tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return "\n".join(line.rstrip() for line in text.splitlines() if line.strip())
+
+
+def _strip_c_comments(text: str, line_comments: bool = True, sql: bool = False) -> str:
+    """Remove /* */ (and // or SQL --) comments outside string literals in one pass"""
+    out: List[str] = []
+    i, n = 0, len(text)
+    quote = None
+    while i < n:
+        char = text[i]
+        if quote:
+            out.append(char)
+            if char == "\\" and i + 1 < n:
+                out.append(text[i + 1])
+                i += 2
+                continue
+            if char == quote:
+                quote = None
+            i += 1
+            continue
+        if char in "'\"`":
+            quote = char
+            out.append(char)
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+            continue
+        elif (line_comments and not sql and text.startswith("//", i) and (i == 0 or text[i - 1] != ":")) \
+                or (sql and text.startswith("--", i)):
+            end = text.find("\n", i)
+            i = n if end < 0 else end
+            continue
+        else:
+            out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def _balanced_parens(text: str, start: int) -> str:
+    open_at = text.find("(", start)
+    if open_at < 0:
+        return ""
+    depth = 0
+    for i in range(open_at, len(text)):
+        if text[i] == "(":
+            depth += 1
+        elif text[i] == ")":
+            depth -= 1
+            if depth == 0:
+                return text[open_at + 1:i]
+    return text[open_at + 1:]
+
+
+def _split_top_level(body: str) -> List[str]:
+    parts, depth, current = [], 0, []
+    for char in body:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current).strip())
+    return [p for p in parts if p]
+
+
+def _language_from_path(path: str) -> str:
+    # Imported lazily: project_index imports this module
+    from core.project_index import detect_language
+    return detect_language(path)
+
+
+def _unparse(node: ast.AST) -> str:
+    try:
+        return ast.unparse(node)
+    except Exception:
+        return "?"
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = _squash(text)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _dedupe(lines: List[str]) -> List[str]:
+    seen = set()
+    return [line for line in lines if not (line in seen or seen.add(line))]
@@ -0,0 +1,205 @@
+import difflib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(ValueError):
+    """Raised when an edit is malformed (as opposed to a hunk that cannot be placed)"""
+
+
+class PatchResult:
+    """Outcome of applying an LLM edit to a file: new content plus applied/rejected hunk counts"""
+
+    def __init__(self, content: str, applied: int = 0, rejected: Optional[List[str]] = None,
+                 fuzzy: int = 0):
+        self.content = content
+        self.applied = applied
+        self.rejected = rejected or []
+        self.fuzzy = fuzzy
+
+    @property
+    def ok(self) -> bool:
+        return not self.rejected
+
+    def __repr__(self) -> str:
+        return f"PatchResult(applied={self.applied}, rejected={len(self.rejected)}, fuzzy={self.fuzzy})"
+
+
+def apply_edit(original: Optional[str], file_info: Dict[str, Any], threshold: float = 0.85) -> PatchResult:
+    """Apply the edit carried by a files[] entry: a unified diff under "patch" and/or search/replace blocks under "edits".
+
+    original is None for a missing file; only a diff that creates the file (no context or
+    removed lines) can apply to it.
+    """
+    has_patch = bool(file_info.get("patch"))
+    has_edits = bool(file_info.get("edits"))
+    if not has_patch and not has_edits:
+        raise PatchError("entry has neither 'patch' nor 'edits'")
+    content = original if original is not None else ""
+    result = PatchResult(content)
+    if has_patch:
+        result = apply_unified_diff(content, file_info["patch"], threshold, missing=original is None)
+    if has_edits:
+        edits = apply_search_replace(result.content, file_info["edits"], threshold, missing=original is None)
+        result = PatchResult(edits.content, result.applied + edits.applied,
+                             result.rejected + edits.rejected, result.fuzzy + edits.fuzzy)
+    return result
+
+
+def apply_search_replace(original: str, edits: List[Dict[str, str]], threshold: float = 0.85,
+                         missing: bool = False) -> PatchResult:
+    """Apply search/replace blocks in order; a search text that occurs more than once is rejected as ambiguous"""
+    if not isinstance(edits, list):
+        raise PatchError("'edits' must be a list of {search, replace} objects")
+    content = original
+    applied = fuzzy = 0
+    rejected: List[str] = []
+    for index, edit in enumerate(edits, start=1):
+        if not isinstance(edit, dict) or "search" not in edit or "replace" not in edit:
+            rejected.append(f"edit {index}: expected 'search' and 'replace' keys")
+            continue
+        search, replace = str(edit["search"]), str(edit["replace"])
+        if not search:
+            if missing or not content:
+                content = replace
+                applied += 1
+            else:
+                rejected.append(f"edit {index}: empty search text on a non-empty file")
+            continue
+        count = content.count(search)
+        if count == 1:
+            content = content.replace(search, replace, 1)
+            applied += 1
+            continue
+        if count > 1:
+            rejected.append(f"edit {index}: search text matches {count} places")
+            continue
+        # No exact match: place the block by lines, tolerating whitespace drift and small differences
+        lines = content.splitlines(keepends=True)
+        old = search.splitlines(keepends=True)
+        span = _locate(lines, old, 0, threshold)
+        if span is None:
+            rejected.append(f"edit {index}: search text not found: {_preview(search)}")
+            continue
+        start, end = span
+        new = replace.splitlines(keepends=True)
+        if new and not new[-1].endswith("\n") and end < len(lines):
+            new[-1] += "\n"
+        lines[start:end] = new
+        content = "".join(lines)
+        applied += 1
+        fuzzy += 1
+    return PatchResult(content, applied, rejected, fuzzy)
+
+
+def apply_unified_diff(original: str, diff: str, threshold: float = 0.85, missing: bool = False) -> PatchResult:
+    """Apply the hunks of a single-file unified diff, searching outward from the stated line when context moved"""
+    hunks = parse_unified_diff(diff)
+    if not hunks:
+        raise PatchError("patch contains no hunks")
+    lines = original.splitlines(keepends=True)
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+        had_newline = False
+    else:
+        had_newline = True
+    offset = applied = fuzzy = 0
+    rejected: List[str] = []
+    for index, (old_start, old, new) in enumerate(hunks, start=1):
+        if not old:
+            # Pure insertion: trust the line number (clamped) since there is no context to match
+            if missing or not lines:
+                position = len(lines)
+            else:
+                position = min(max(old_start + offset, 0), len(lines))
+            lines[position:position] = new
+            offset += len(new)
+            applied += 1
+            continue
+        if missing:
+            rejected.append(f"hunk {index}: file does not exist")
+            continue
+        hint = max(old_start - 1 + offset, 0)
+        span = _locate(lines, old, hint, threshold)
+        if span is None:
+            rejected.append(f"hunk {index} (@@ -{old_start}): context not found: {_preview(''.join(old))}")
+            continue
+        start, end = span
+        if lines[start:end] != old:
+            fuzzy += 1
+        lines[start:end] = new
+        offset += len(new) - (end - start) + (start - hint)
+        applied += 1
+    content = "".join(lines)
+    if not had_newline and content.endswith("\n"):
+        content = content[:-1]
+    return PatchResult(content, applied, rejected, fuzzy)
+
+
+def parse_unified_diff(diff: str) -> List[Tuple[int, List[str], List[str]]]:
+    """Parse a unified diff into (old_start, old_lines, new_lines) hunks; file headers are ignored"""
+    hunks: List[Tuple[int, List[str], List[str]]] = []
+    current: Optional[Tuple[int, List[str], List[str]]] = None
+    for raw in diff.splitlines():
+        header = _HUNK_HEADER.match(raw)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+            continue
+        if current is None:
+            continue
+        if raw.startswith("\\"):
+            # "\ No newline at end of file"
+            continue
+        tag, text = (raw[:1], raw[1:]) if raw else (" ", "")
+        if tag == " ":
+            current[1].append(text + "\n")
+            current[2].append(text + "\n")
+        elif tag == "-":
+            current[1].append(text + "\n")
+        elif tag == "+":
+            current[2].append(text + "\n")
+        else:
+            # Context line whose leading space the model dropped
+            current[1].append(raw + "\n")
+            current[2].append(raw + "\n")
+    return [hunk for hunk in hunks if hunk[1] or hunk[2]]
+
+
+def _locate(lines: List[str], old: List[str], hint: int, threshold: float) -> Optional[Tuple[int, int]]:
+    """Find old in lines: exact near hint, then whitespace-insensitive, then best fuzzy window above threshold"""
+    size = len(old)
+    if size == 0 or size > len(lines):
+        return None
+    last = len(lines) - size
+    hint = min(hint, last)
+    order = sorted(range(last + 1), key=lambda i: abs(i - hint))
+    for i in order:
+        if lines[i:i + size] == old:
+            return i, i + size
+    stripped = [line.strip() for line in lines]
+    old_stripped = [line.strip() for line in old]
+    for i in order:
+        if stripped[i:i + size] == old_stripped:
+            return i, i + size
+    # Only score windows that share at least one non-trivial line with the hunk
+    anchors = {line for line in old_stripped if len(line) > 3}
+    candidates = {max(0, min(i - j, last)) for i, line in enumerate(stripped) if line in anchors
+                  for j, old_line in enumerate(old_stripped) if old_line == line}
+    target = "\n".join(old_stripped)
+    best, best_ratio = None, threshold
+    for i in sorted(candidates, key=lambda i: abs(i - hint)):
+        matcher = difflib.SequenceMatcher(None, "\n".join(stripped[i:i + size]), target, autojunk=False)
+        if matcher.real_quick_ratio() < best_ratio or matcher.quick_ratio() < best_ratio:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio:
+            best, best_ratio = (i, i + size), ratio
+    return best
+
+
+def _preview(text: str, limit: int = 60) -> str:
+    first = text.strip().splitlines()[0] if text.strip() else ""
+    return repr(first[:limit] + ("..." if len(first) > limit else ""))
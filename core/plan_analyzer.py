@@ -0,0 +1,297 @@
+from typing import Any, Dict, List, Optional
+
+from core.task_graph import TASK_GROUPS
+
+AGENTS = ('database', 'backend', 'frontend', 'documentation')
+
+# Issue kinds
+NOT_A_PLAN = "not_a_plan"
+EMPTY_PLAN = "empty_plan"
+MALFORMED_TASK = "malformed_task"
+MISSING_ID = "missing_id"
+DUPLICATE_ID = "duplicate_id"
+UNKNOWN_AGENT = "unknown_agent"
+UNSCHEDULED_GROUP = "unscheduled_group"
+DANGLING_DEPENDENCY = "dangling_dependency"
+SELF_DEPENDENCY = "self_dependency"
+CYCLE = "cycle"
+
+
+class PlanError(ValueError):
+    """Raised when a plan is unusable and cannot be repaired"""
+
+
+class PlanIssue:
+    """One problem found in a plan and whether it was repaired in place"""
+
+    def __init__(self, kind: str, task_id: Optional[str], detail: str, repaired: bool):
+        self.kind = kind
+        self.task_id = task_id
+        self.detail = detail
+        self.repaired = repaired
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "task": self.task_id, "detail": self.detail, "repaired": self.repaired}
+
+    def __repr__(self) -> str:
+        state = "repaired" if self.repaired else "unrepaired"
+        return f"PlanIssue({self.kind}, {self.task_id!r}, {state}: {self.detail})"
+
+
+class PlanReport:
+    """Issues found in a plan plus its topological levels and critical path"""
+
+    def __init__(self):
+        self.issues: List[PlanIssue] = []
+        self.levels: List[List[str]] = []
+        self.critical_path: List[str] = []
+        self.task_count = 0
+
+    @property
+    def ok(self) -> bool:
+        """True if every task can become ready (after any repairs)"""
+        return self.task_count > 0 and all(issue.repaired for issue in self.issues)
+
+    def add(self, kind: str, task_id: Optional[str], detail: str, repaired: bool) -> None:
+        self.issues.append(PlanIssue(kind, task_id, detail, repaired))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "tasks": self.task_count,
+            "issues": [issue.to_dict() for issue in self.issues],
+            "levels": self.levels,
+            "depth": len(self.levels),
+            "max_parallelism": max((len(level) for level in self.levels), default=0),
+            "critical_path": self.critical_path,
+        }
+
+    def describe(self) -> str:
+        repaired = sum(1 for issue in self.issues if issue.repaired)
+        return (f"{self.task_count} tasks in {len(self.levels)} levels, critical path {len(self.critical_path)}, "
+                f"{len(self.issues)} issues ({repaired} repaired)")
+
+
+def strongly_connected_components(nodes: List[str], edges: Dict[str, List[str]]) -> List[List[str]]:
+    """Tarjan's algorithm, iterative so deep dependency chains don't hit the recursion limit"""
+    index: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack = set()
+    stack: List[str] = []
+    components: List[List[str]] = []
+    counter = 0
+    for start in nodes:
+        if start in index:
+            continue
+        work = [(start, iter(edges.get(start, ())))]
+        index[start] = lowlink[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            node, successors = work[-1]
+            advanced = False
+            for succ in successors:
+                if succ not in index:
+                    index[succ] = lowlink[succ] = counter
+                    counter += 1
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(edges.get(succ, ()))))
+                    advanced = True
+                    break
+                if succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+
+def analyze_plan(plan: Any, repair: bool = True) -> PlanReport:
+    """Check a supervisor plan and, if repair is set, fix it in place.
+
+    Tasks get ids and known agents, duplicates are renamed or dropped, tasks in groups the
+    scheduler never reads are moved to their agent's group, dangling and self dependencies
+    are removed, and each dependency cycle is broken by dropping the edges that point
+    forward in plan order. Then topological levels and the critical path are computed.
+    """
+    report = PlanReport()
+    if not isinstance(plan, dict):
+        report.add(NOT_A_PLAN, None, f"plan is {type(plan).__name__}, not an object", False)
+        return report
+
+    _normalize_groups(plan, report, repair)
+    tasks: Dict[str, Dict[str, Any]] = {}
+    order: List[str] = []
+    for group in TASK_GROUPS:
+        kept = []
+        for position, task in enumerate(plan.get(group) or []):
+            if not isinstance(task, dict) or not task.get('description'):
+                report.add(MALFORMED_TASK, None, f"{group}[{position}] has no description", repair)
+                if not repair:
+                    kept.append(task)
+                continue
+            agent = group[:-len('_tasks')]
+            if str(task.get('agent', '')).lower() not in AGENTS:
+                report.add(UNKNOWN_AGENT, task.get('id'), f"agent {task.get('agent')!r} in {group}", repair)
+                if repair:
+                    task['agent'] = agent
+            if not task.get('id'):
+                new_id = _unique_id(f"{agent}_{position + 1}", tasks)
+                report.add(MISSING_ID, new_id, f"{group}[{position}] had no id", repair)
+                if not repair:
+                    continue
+                task['id'] = new_id
+            task_id = str(task['id'])
+            if repair:
+                # Dependencies are compared as strings, so ids must be strings too (LLMs often return ints)
+                task['id'] = task_id
+            if task_id in tasks:
+                if _same_task(tasks[task_id], task):
+                    report.add(DUPLICATE_ID, task_id, "identical task listed twice", repair)
+                    if repair:
+                        continue
+                else:
+                    new_id = _unique_id(task_id, tasks)
+                    report.add(DUPLICATE_ID, task_id, f"different task reuses the id, renamed to {new_id}", repair)
+                    if not repair:
+                        kept.append(task)
+                        continue
+                    task['id'] = task_id = new_id
+            tasks[task_id] = task
+            order.append(task_id)
+            kept.append(task)
+        if repair and group in plan:
+            plan[group] = kept
+
+    edges: Dict[str, List[str]] = {}
+    for task_id in order:
+        task = tasks[task_id]
+        deps = task.get('dependencies') or []
+        if not isinstance(deps, list):
+            deps = [deps]
+        valid = []
+        for dep in dict.fromkeys(str(d) for d in deps):
+            if dep == task_id:
+                report.add(SELF_DEPENDENCY, task_id, "task depends on itself", repair)
+            elif dep not in tasks:
+                report.add(DANGLING_DEPENDENCY, task_id, f"depends on unknown task {dep!r}", repair)
+            else:
+                valid.append(dep)
+        if repair:
+            task['dependencies'] = valid
+        edges[task_id] = valid
+
+    position = {task_id: i for i, task_id in enumerate(order)}
+    for component in strongly_connected_components(order, edges):
+        if len(component) < 2:
+            continue
+        members = set(component)
+        cycle = sorted(component, key=position.get)
+        report.add(CYCLE, cycle[0], f"dependency cycle between {', '.join(cycle)}", repair)
+        if repair:
+            # Keep only edges to earlier tasks inside the cycle; plan order is then a valid order
+            for task_id in cycle:
+                kept = [dep for dep in edges[task_id] if dep not in members or position[dep] < position[task_id]]
+                edges[task_id] = tasks[task_id]['dependencies'] = kept
+
+    report.task_count = len(order)
+    if not order:
+        report.add(EMPTY_PLAN, None, "plan contains no runnable tasks", False)
+        return report
+    _levels_and_critical_path(order, edges, tasks, report)
+    return report
+
+
+def validate_plan(plan: Any) -> PlanReport:
+    """Repair a plan in place, raising PlanError if it still can't run"""
+    report = analyze_plan(plan, repair=True)
+    if not report.ok:
+        unrepaired = [issue for issue in report.issues if not issue.repaired]
+        raise PlanError("; ".join(issue.detail for issue in unrepaired) or "invalid plan")
+    return report
+
+
+def _normalize_groups(plan: Dict[str, Any], report: PlanReport, repair: bool) -> None:
+    """Move tasks from groups the scheduler doesn't read (e.g. "testing_tasks") to their agent's group"""
+    for key in list(plan):
+        if not key.endswith('_tasks') or key in TASK_GROUPS or not isinstance(plan[key], list):
+            continue
+        for task in plan[key]:
+            if not isinstance(task, dict):
+                continue
+            agent = str(task.get('agent', '')).lower()
+            target = f"{agent}_tasks" if agent in AGENTS else 'backend_tasks'
+            report.add(UNSCHEDULED_GROUP, task.get('id'), f"listed under {key}, moved to {target}", repair)
+            if repair:
+                plan.setdefault(target, []).append(task)
+        if repair:
+            del plan[key]
+
+
+def _same_task(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return a.get('description') == b.get('description') and a.get('agent') == b.get('agent')
+
+
+def _unique_id(base: str, taken: Dict[str, Any]) -> str:
+    candidate, counter = base, 2
+    while candidate in taken:
+        candidate = f"{base}_{counter}"
+        counter += 1
+    return candidate
+
+
+def _levels_and_critical_path(order: List[str], edges: Dict[str, List[str]], tasks: Dict[str, Dict[str, Any]],
+                              report: PlanReport) -> None:
+    """Kahn's algorithm for levels; longest weighted path for the critical path.
+
+    Weights come from a task's "estimate" if the planner gave one, else 1. With an
+    unrepaired cycle the tasks on it get no level and are left off both results.
+    """
+    dependents: Dict[str, List[str]] = {task_id: [] for task_id in order}
+    remaining = {task_id: len(edges[task_id]) for task_id in order}
+    for task_id in order:
+        for dep in edges[task_id]:
+            dependents[dep].append(task_id)
+    level = [task_id for task_id in order if remaining[task_id] == 0]
+    finish: Dict[str, float] = {}
+    previous: Dict[str, Optional[str]] = {}
+    while level:
+        report.levels.append(level)
+        next_level = []
+        for task_id in level:
+            deps = edges[task_id]
+            best = max(deps, key=lambda dep: finish[dep], default=None)
+            previous[task_id] = best
+            finish[task_id] = (finish[best] if best else 0.0) + _weight(tasks[task_id])
+            for dependent in dependents[task_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    next_level.append(dependent)
+        level = next_level
+    node = max(finish, key=finish.get, default=None)
+    path = []
+    while node is not None:
+        path.append(node)
+        node = previous[node]
+    report.critical_path = list(reversed(path))
+
+
+def _weight(task: Dict[str, Any]) -> float:
+    try:
+        return max(float(task.get('estimate', 1)), 0.0)
+    except (TypeError, ValueError):
+        return 1.0
@@ -0,0 +1,362 @@
+import atexit
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.lexical_index import LexicalIndex
+from core.outline import cached_outline
+
+INDEX_DIR = ".multicode"
+INDEX_FILE = "index.json"
+LEXICAL_FILE = "lexical.json"
+INDEX_VERSION = 2
+
+# Generic names (env, build, dist, coverage) are only skipped at the project root, since
+# generated source may use them deeper down (src/build/, config/env/); virtualenvs elsewhere
+# are recognised by their pyvenv.cfg
+DEFAULT_IGNORE_PATTERNS = [
+    ".git", ".hg", ".svn", INDEX_DIR, ".llm_cache", "node_modules", "bower_components",
+    "__pycache__", ".pytest_cache", ".mypy_cache", ".venv", "venv", "/env/", ".tox",
+    "/dist/", "/build/", ".next", ".nuxt", "/coverage/", ".idea", ".vscode",
+    "*.pyc", "*.pyo", "*.so", "*.dylib", "*.dll", "*.class", "*.o",
+    ".DS_Store", "*.log", "*.lock", "package-lock.json",
+]
+
+LANGUAGES = {
+    ".py": "python", ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript", ".html": "html", ".htm": "html",
+    ".css": "css", ".scss": "scss", ".json": "json", ".md": "markdown", ".sql": "sql",
+    ".yml": "yaml", ".yaml": "yaml", ".toml": "toml", ".ini": "ini", ".cfg": "ini",
+    ".sh": "shell", ".txt": "text", ".env": "dotenv", ".xml": "xml", ".java": "java",
+    ".go": "go", ".rb": "ruby", ".php": "php", ".vue": "vue", ".svelte": "svelte",
+}
+
+
+def detect_language(path: str) -> str:
+    name = os.path.basename(path)
+    if name == "Dockerfile":
+        return "dockerfile"
+    if name.startswith(".env"):
+        return "dotenv"
+    return LANGUAGES.get(os.path.splitext(name)[1].lower(), "other")
+
+
+class IndexEntry:
+    """Indexed metadata for one project file"""
+
+    __slots__ = ("path", "size", "mtime_ns", "sha256", "language", "head", "outline")
+
+    def __init__(self, path: str, size: int, mtime_ns: int, sha256: str, language: str, head: str,
+                 outline: str = ""):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha256 = sha256
+        self.language = language
+        self.head = head
+        self.outline = outline
+
+    def to_list(self) -> list:
+        return [self.size, self.mtime_ns, self.sha256, self.language, self.head, self.outline]
+
+    @classmethod
+    def from_list(cls, path: str, values: list) -> "IndexEntry":
+        return cls(path, *values)
+
+    def __repr__(self) -> str:
+        return f"IndexEntry({self.path!r}, size={self.size}, language={self.language})"
+
+
+class ProjectIndex:
+    """Persistent index of a generated project's files, kept current by the write path.
+
+    Entries are validated against (size, mtime_ns) by a stat-only rescan at most every
+    rescan_interval seconds; only new or changed files are read. The index lives in
+    <root>/.multicode/index.json so later runs start warm, with the BM25 term counts
+    used by search() next to it in lexical.json.
+    """
+
+    def __init__(self, root_path: str, ignore_patterns: Optional[Iterable[str]] = None,
+                 head_bytes: int = 2048, rescan_interval: float = 30.0, save_interval: float = 5.0,
+                 max_text_bytes: int = 256 * 1024):
+        self.root_path = os.path.abspath(root_path)
+        self.base_ignore_patterns = list(DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns)
+        self.ignore_patterns = self.base_ignore_patterns + self._gitignore_patterns()
+        self.head_bytes = head_bytes
+        self.rescan_interval = rescan_interval
+        self.save_interval = save_interval
+        self.max_text_bytes = max_text_bytes
+        self.path = os.path.join(self.root_path, INDEX_DIR, INDEX_FILE)
+        self.lexical_path = os.path.join(self.root_path, INDEX_DIR, LEXICAL_FILE)
+        self.lexical = LexicalIndex()
+        self._entries: Dict[str, IndexEntry] = {}
+        self._scanned_at = 0.0
+        self._saved_at = 0.0
+        self._dirty = False
+        self._lock = threading.RLock()
+        self.stats = {"scans": 0, "files_read": 0, "bytes_read": 0, "write_updates": 0}
+        self._load()
+
+    def entries(self, extensions: Optional[List[str]] = None) -> List[IndexEntry]:
+        """Indexed files sorted by path, optionally filtered by extension"""
+        self._ensure_fresh()
+        with self._lock:
+            entries = [self._entries[path] for path in sorted(self._entries)]
+        if extensions is not None:
+            entries = [e for e in entries if any(e.path.endswith(ext) for ext in extensions)]
+        return entries
+
+    def paths(self, extensions: Optional[List[str]] = None) -> List[str]:
+        return [entry.path for entry in self.entries(extensions)]
+
+    def get(self, rel_path: str) -> Optional[IndexEntry]:
+        self._ensure_fresh()
+        with self._lock:
+            return self._entries.get(_normalize(rel_path))
+
+    def rank(self, query: str, extensions: Optional[List[str]] = None) -> List[Tuple[IndexEntry, float]]:
+        """All indexed files as (entry, BM25 score): matches best first, then the rest in path order"""
+        self._ensure_fresh()
+        with self._lock:
+            scored = [(self._entries[path], score) for path, score in self.lexical.score(query) if path in self._entries]
+            matched = {entry.path for entry, _ in scored}
+            ranked = scored + [(self._entries[path], 0.0) for path in sorted(self._entries) if path not in matched]
+        if extensions is not None:
+            ranked = [(e, score) for e, score in ranked if any(e.path.endswith(ext) for ext in extensions)]
+        return ranked
+
+    def search(self, query: str, extensions: Optional[List[str]] = None, k: int = 15,
+               budget_chars: Optional[int] = None, snippet_chars: int = 600) -> List[IndexEntry]:
+        """Top-k files for a query by BM25 relevance, stopping once their snippets fill budget_chars.
+
+        Falls back to path order when nothing matches (e.g. a query with no overlap or a fresh project).
+        """
+        selected: List[IndexEntry] = []
+        used = 0
+        for entry, _ in self.rank(query, extensions):
+            if len(selected) >= k:
+                break
+            if not entry.head:
+                continue
+            size = min(len(entry.head), snippet_chars)
+            if budget_chars is not None and selected and used + size > budget_chars:
+                break
+            selected.append(entry)
+            used += size
+        return selected
+
+    def record_write(self, rel_path: str, data: bytes, sha256: Optional[str] = None) -> None:
+        """Update an entry from content the caller just wrote, without reading it back"""
+        rel_path = _normalize(rel_path)
+        if rel_path == ".gitignore":
+            self.ignore_patterns = self.base_ignore_patterns + self._gitignore_patterns()
+        if self.is_ignored(rel_path):
+            return
+        try:
+            stat = os.stat(os.path.join(self.root_path, rel_path))
+        except OSError:
+            return
+        entry = IndexEntry(rel_path, stat.st_size, stat.st_mtime_ns, sha256 or hashlib.sha256(data).hexdigest(),
+                           detect_language(rel_path), _decode_head(data[:self.head_bytes]))
+        text = _decode_head(data[:self.max_text_bytes])
+        entry.outline = cached_outline(entry.sha256, rel_path, text, entry.language)
+        with self._lock:
+            self._entries[rel_path] = entry
+            self.lexical.update(rel_path, text, entry.sha256)
+            self._dirty = True
+            self.stats["write_updates"] += 1
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+
+    def refresh(self) -> Dict[str, int]:
+        """Stat every non-ignored file; re-read only new or changed ones and drop deleted ones"""
+        seen = set()
+        added = changed = 0
+        for rel_path, stat in self._walk():
+            seen.add(rel_path)
+            with self._lock:
+                entry = self._entries.get(rel_path)
+            if (entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns
+                    and (entry.language == "binary" or self.lexical.sha(rel_path) == entry.sha256)):
+                continue
+            fresh = self._read_entry(rel_path, stat)
+            if fresh is None:
+                continue
+            with self._lock:
+                self._entries[rel_path] = fresh
+                self._dirty = True
+            if entry is None:
+                added += 1
+            else:
+                changed += 1
+        with self._lock:
+            removed = [path for path in self._entries if path not in seen]
+            for path in removed:
+                del self._entries[path]
+                self.lexical.remove(path)
+            self._dirty = self._dirty or bool(removed)
+            self._scanned_at = time.monotonic()
+            self.stats["scans"] += 1
+        if self._dirty:
+            self.save()
+        return {"files": len(seen), "added": added, "changed": changed, "removed": len(removed)}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": INDEX_VERSION,
+                "files": {path: entry.to_list() for path, entry in self._entries.items()},
+            }
+            lexical = {"version": INDEX_VERSION, "files": self.lexical.to_dict()}
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        for path, data in ((self.path, payload), (self.lexical_path, lexical)):
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"[Project Index] Could not save {path}: {e}")
+
+    def is_ignored(self, rel_path: str) -> bool:
+        parts = rel_path.split("/")
+        for pattern in self.ignore_patterns:
+            if "/" in pattern:
+                if fnmatch.fnmatch(rel_path, pattern.strip("/")) or rel_path.startswith(pattern.strip("/") + "/"):
+                    return True
+            elif any(fnmatch.fnmatch(part, pattern) for part in parts):
+                return True
+        return False
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {"files": len(self._entries), "bytes": sum(e.size for e in self._entries.values()), **self.stats}
+
+    def _ensure_fresh(self) -> None:
+        if time.monotonic() - self._scanned_at >= self.rescan_interval:
+            self.refresh()
+
+    def _walk(self):
+        stack = [self.root_path]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    items = list(it)
+            except OSError:
+                continue
+            for item in items:
+                rel_path = os.path.relpath(item.path, self.root_path).replace(os.sep, "/")
+                if self.is_ignored(rel_path):
+                    continue
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        if not os.path.exists(os.path.join(item.path, "pyvenv.cfg")):
+                            stack.append(item.path)
+                    elif item.is_file():
+                        yield rel_path, item.stat()
+                except OSError:
+                    continue
+
+    def _read_entry(self, rel_path: str, stat) -> Optional[IndexEntry]:
+        """Hash the file in chunks, keeping only the first max_text_bytes for the head and term index"""
+        digest = hashlib.sha256()
+        text = bytearray()
+        try:
+            with open(os.path.join(self.root_path, rel_path), "rb") as f:
+                while True:
+                    chunk = f.read(1 << 16)
+                    if not chunk:
+                        break
+                    if len(text) < self.max_text_bytes:
+                        text += chunk[:self.max_text_bytes - len(text)]
+                    digest.update(chunk)
+                    self.stats["bytes_read"] += len(chunk)
+        except OSError:
+            return None
+        self.stats["files_read"] += 1
+        language = detect_language(rel_path)
+        head = bytes(text[:self.head_bytes])
+        entry = IndexEntry(rel_path, stat.st_size, stat.st_mtime_ns, digest.hexdigest(), language, _decode_head(head))
+        if b"\x00" in head:
+            entry.language, entry.head = "binary", ""
+            with self._lock:
+                self.lexical.remove(rel_path)
+        else:
+            decoded = _decode_head(bytes(text))
+            entry.outline = cached_outline(entry.sha256, rel_path, decoded, language)
+            with self._lock:
+                self.lexical.update(rel_path, decoded, entry.sha256)
+        return entry
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if payload.get("version") != INDEX_VERSION:
+            return
+        for path, values in payload.get("files", {}).items():
+            try:
+                self._entries[path] = IndexEntry.from_list(path, values)
+            except TypeError:
+                continue
+        try:
+            with open(self.lexical_path, "r", encoding="utf-8") as f:
+                lexical = json.load(f)
+        except (OSError, ValueError):
+            lexical = {}
+        if lexical.get("version") == INDEX_VERSION:
+            self.lexical.load_dict(lexical.get("files", {}), {p: e.sha256 for p, e in self._entries.items()})
+        self._saved_at = time.monotonic()
+
+    def _gitignore_patterns(self) -> List[str]:
+        try:
+            with open(os.path.join(self.root_path, ".gitignore"), "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        # Negations are not supported; plain names and globs cover what generated projects use
+        return [line.strip().rstrip("/") for line in lines
+                if line.strip() and not line.startswith(("#", "!")) and line.strip().rstrip("/")]
+
+
+def _normalize(rel_path: str) -> str:
+    return os.path.normpath(rel_path).replace(os.sep, "/")
+
+
+def _decode_head(head: bytes) -> str:
+    return head.decode("utf-8", errors="ignore")
+
+
+_indexes: Dict[str, ProjectIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_project_index(root_path: str) -> ProjectIndex:
+    """Process-wide index per project root"""
+    key = os.path.abspath(root_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = ProjectIndex(key)
+            _indexes[key] = index
+        return index
+
+
+def flush_project_indexes() -> None:
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        index.save()
+
+
+atexit.register(flush_project_indexes)
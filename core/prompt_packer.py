@@ -0,0 +1,174 @@
+import math
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+
+class TokenEstimator:
+    """chars/token ratio estimate, calibrated from the usage metadata of real calls"""
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN, alpha: float = 0.2,
+                 min_ratio: float = 2.0, max_ratio: float = 6.0):
+        self.chars_per_token = chars_per_token
+        self.alpha = alpha
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        return int(math.ceil(len(text) / self.chars_per_token)) if text else 0
+
+    def observe(self, chars: int, tokens: Optional[int]) -> None:
+        """Blend in the ratio measured on a call whose prompt was `chars` long and billed `tokens`"""
+        if not tokens or chars < 200:
+            return
+        ratio = min(self.max_ratio, max(self.min_ratio, chars / tokens))
+        with self._lock:
+            alpha = max(self.alpha, 1.0 / (self.samples + 1))
+            self.chars_per_token += alpha * (ratio - self.chars_per_token)
+            self.samples += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"chars_per_token": round(self.chars_per_token, 3), "samples": self.samples}
+
+
+_shared_estimator = TokenEstimator()
+
+
+def get_token_estimator() -> TokenEstimator:
+    """Process-wide estimator shared by all agents, so calibration carries across calls"""
+    return _shared_estimator
+
+
+class PromptSection:
+    """One packable piece of a prompt, with alternative renderings from richest to cheapest.
+
+    variants is a list of (label, text, value_fraction); a required section always gets one
+    of its variants, an optional one may be dropped.
+    """
+
+    def __init__(self, name: str, group: str, priority: float, variants: Sequence[Tuple[str, str, float]],
+                 required: bool = False):
+        self.name = name
+        self.group = group
+        self.priority = priority
+        self.variants = [v for v in variants if v[1]]
+        self.required = required
+
+
+class PackedPrompt:
+    """Result of packing: the text chosen for each group plus a per-section report"""
+
+    def __init__(self, groups: Dict[str, List[str]], composition: List[Dict[str, Any]], tokens: int,
+                 budget: int, over_budget: bool):
+        self.groups = groups
+        self.composition = composition
+        self.tokens = tokens
+        self.budget = budget
+        self.over_budget = over_budget
+
+    def text(self, group: str, separator: str = "\n\n") -> str:
+        return separator.join(self.groups.get(group, []))
+
+    def summary(self) -> Dict[str, Any]:
+        chosen: Dict[str, int] = {}
+        dropped = 0
+        for item in self.composition:
+            if item["variant"] is None:
+                dropped += 1
+            else:
+                key = f"{item['group']}:{item['variant']}"
+                chosen[key] = chosen.get(key, 0) + 1
+        return {"tokens": self.tokens, "budget": self.budget, "over_budget": self.over_budget,
+                "chosen": chosen, "dropped": dropped}
+
+    def describe(self) -> str:
+        summary = self.summary()
+        parts = ", ".join(f"{count} {key}" for key, count in summary["chosen"].items())
+        dropped = f", dropped {summary['dropped']}" if summary["dropped"] else ""
+        return f"{self.tokens}/{self.budget} tokens ({parts}{dropped})"
+
+
+class PromptPacker:
+    """Fits prompt sections into a token budget by multiple-choice knapsack.
+
+    Each section contributes priority * value_fraction for the variant chosen (or nothing if
+    dropped); weights are token estimates rounded up to `cells` buckets so the dynamic program
+    stays small regardless of the budget.
+    """
+
+    def __init__(self, budget_tokens: int, estimator: Optional[TokenEstimator] = None, cells: int = 1024):
+        self.budget_tokens = budget_tokens
+        self.estimator = estimator or get_token_estimator()
+        self.cells = cells
+
+    def pack(self, sections: List[PromptSection], fixed_tokens: int = 0) -> PackedPrompt:
+        sections = [s for s in sections if s.variants]
+        available = max(0, self.budget_tokens - fixed_tokens)
+        unit = max(1, int(math.ceil(available / self.cells)))
+        capacity = available // unit
+        costs = [[self.estimator.estimate(text) for _, text, _ in s.variants] for s in sections]
+        weights = [[int(math.ceil(cost / unit)) for cost in section_costs] for section_costs in costs]
+
+        choice = self._solve(sections, weights, capacity)
+        over_budget = choice is None
+        if over_budget:
+            # Required sections alone exceed the budget: cheapest variant of each, nothing optional
+            choice = [min(range(len(s.variants)), key=lambda i: costs[k][i]) if s.required else None
+                      for k, s in enumerate(sections)]
+
+        groups: Dict[str, List[str]] = {}
+        composition: List[Dict[str, Any]] = []
+        tokens = fixed_tokens
+        for k, section in enumerate(sections):
+            index = choice[k]
+            if index is None:
+                composition.append({"name": section.name, "group": section.group, "variant": None, "tokens": 0})
+                continue
+            label, text, _ = section.variants[index]
+            groups.setdefault(section.group, []).append(text)
+            tokens += costs[k][index]
+            composition.append({"name": section.name, "group": section.group, "variant": label,
+                                "tokens": costs[k][index]})
+        return PackedPrompt(groups, composition, tokens, self.budget_tokens, over_budget)
+
+    @staticmethod
+    def _solve(sections: List[PromptSection], weights: List[List[int]], capacity: int) -> Optional[List[Optional[int]]]:
+        negative = float("-inf")
+        best = [0.0] * (capacity + 1)
+        picks: List[List[Optional[int]]] = []
+        for k, section in enumerate(sections):
+            new = [negative] * (capacity + 1) if section.required else list(best)
+            pick: List[Optional[int]] = [None] * (capacity + 1)
+            for index, (_, _, fraction) in enumerate(section.variants):
+                weight = weights[k][index]
+                value = section.priority * fraction
+                for c in range(weight, capacity + 1):
+                    candidate = best[c - weight] + value
+                    if candidate > new[c]:
+                        new[c] = candidate
+                        pick[c] = index
+            best = new
+            picks.append(pick)
+        if best[capacity] == negative:
+            return None
+        # best[c] is monotone in c (capacity need not be filled), so backtrack from the top
+        choice: List[Optional[int]] = [None] * len(sections)
+        c = capacity
+        for k in range(len(sections) - 1, -1, -1):
+            index = picks[k][c]
+            choice[k] = index
+            if index is not None:
+                c -= weights[k][index]
+        return choice
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Head of text cut at a line boundary, marked as truncated"""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    cut = cut if cut > max_chars // 2 else max_chars
+    return text[:cut] + f"\n... [truncated {len(text) - cut} characters]"
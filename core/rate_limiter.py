@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from core.response_cache import render_messages
+
+# (requests per minute, tokens per minute) for the Gemini free tier; override with GEMINI_RATE_LIMITS
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gemini-2.5-flash": (10, 250_000),
+    "gemini-2.0-flash": (15, 1_000_000),
+    "gemini-2.0-flash-lite": (30, 1_000_000),
+    "gemini-2.0-flash-exp": (10, 250_000),
+    "gemini-1.5-flash": (15, 1_000_000),
+    "gemini-2.5-flash-lite-preview-06-17": (15, 250_000),
+}
+FALLBACK_RATE_LIMIT = (10, 250_000)
+
+
+def estimate_tokens(messages: Any) -> int:
+    """Cheap prompt size estimate (~4 characters per token) used before a request is sent"""
+    total = 0
+    for message in render_messages(messages):
+        content = message.get("content")
+        total += len(content if isinstance(content, str) else json.dumps(content, default=str))
+    return max(1, total // 4)
+
+
+class TokenBucket:
+    """Reservation-based token bucket; callers are served strictly in arrival order"""
+
+    def __init__(self, per_minute: float, headroom: float = 0.9):
+        self.capacity = max(1.0, per_minute * headroom)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount immediately (the level may go negative) and return how long to wait"""
+        self._refill(now)
+        self.level -= amount
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def adjust(self, amount: float, now: float) -> None:
+        """Charge (positive) or refund (negative) after the real usage is known"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - amount)
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """Per-model requests-per-minute and tokens-per-minute limits shared by every caller"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, int]]] = None, headroom: float = 0.9):
+        self.limits = dict(DEFAULT_RATE_LIMITS)
+        self.limits.update(limits or {})
+        self.headroom = headroom
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, model: str, tokens: int) -> float:
+        """Book one request and an estimated token count; returns the delay before sending"""
+        now = time.monotonic()
+        with self._lock:
+            requests_bucket, tokens_bucket = self._buckets_for(model)
+            wait = max(requests_bucket.reserve(1, now), tokens_bucket.reserve(tokens, now))
+            stats = self._stats[model]
+            stats["requests"] += 1
+            stats["estimated_tokens"] += tokens
+            if wait > 0:
+                stats["throttled"] += 1
+                stats["wait_seconds"] += wait
+        return wait
+
+    def acquire_sync(self, model: str, tokens: int) -> None:
+        wait = self.reserve(model, tokens)
+        if wait > 0:
+            print(f"[Rate Limiter] Waiting {wait:.1f}s for {model} quota")
+            time.sleep(wait)
+
+    async def acquire(self, model: str, tokens: int) -> None:
+        wait = self.reserve(model, tokens)
+        if wait > 0:
+            print(f"[Rate Limiter] Waiting {wait:.1f}s for {model} quota")
+            await asyncio.sleep(wait)
+
+    def reconcile(self, model: str, estimated: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once usage metadata (or a failure, actual=0) is known"""
+        if actual is None:
+            return
+        with self._lock:
+            _, tokens_bucket = self._buckets_for(model)
+            tokens_bucket.adjust(actual - estimated, time.monotonic())
+            self._stats[model]["actual_tokens"] += actual
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {model: dict(stats) for model, stats in self._stats.items()}
+
+    def _buckets_for(self, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        buckets = self._buckets.get(model)
+        if buckets is None:
+            rpm, tpm = self.limits.get(model, FALLBACK_RATE_LIMIT)
+            buckets = (TokenBucket(rpm, self.headroom), TokenBucket(tpm, self.headroom))
+            self._buckets[model] = buckets
+            self._stats[model] = {"requests": 0, "throttled": 0, "wait_seconds": 0.0,
+                                  "estimated_tokens": 0, "actual_tokens": 0}
+        return buckets
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Process-wide rate limiter; disabled with RATE_LIMIT=0"""
+    global _shared_limiter
+    if os.getenv("RATE_LIMIT", "1").lower() in ("0", "false", "off"):
+        return None
+    with _shared_limiter_lock:
+        if _shared_limiter is None:
+            overrides = json.loads(os.getenv("GEMINI_RATE_LIMITS", "{}"))
+            _shared_limiter = RateLimiter(
+                {model: tuple(limit) for model, limit in overrides.items()},
+                headroom=float(os.getenv("RATE_LIMIT_HEADROOM", "0.9")),
+            )
+        return _shared_limiter
@@ -0,0 +1,171 @@
+import difflib
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Set
+
+from core.flow_parser import FlowTree, get_flow_tree
+from core.project_index import INDEX_DIR
+from core.task_graph import TASK_GROUPS, plan_tasks
+
+PLAN_FILE = "plan.json"
+
+
+def flow_hash(flow: str) -> str:
+    return hashlib.sha256((flow or "").encode("utf-8")).hexdigest()
+
+
+def load_plan(root_path: str) -> Optional[Dict[str, Any]]:
+    """The last plan saved for a project with the flow it was made from, or None"""
+    path = os.path.join(os.path.abspath(root_path), INDEX_DIR, PLAN_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(saved, dict) or not isinstance(saved.get("plan"), dict):
+        return None
+    return saved
+
+
+def save_plan(root_path: str, flow: str, plan: Dict[str, Any]) -> None:
+    path = os.path.join(os.path.abspath(root_path), INDEX_DIR, PLAN_FILE)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"flow_sha256": flow_hash(flow), "flow": flow, "plan": plan}, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[Replanner] Could not save plan to {path}: {e}")
+
+
+class FlowDiff:
+    """Section-level difference between two flows, with the changed requirement lines"""
+
+    def __init__(self, old: FlowTree, new: FlowTree):
+        self.old = old
+        self.new = new
+        self.added: List[str] = [node_id for node_id in new.nodes if node_id not in old.nodes]
+        self.removed: List[str] = [node_id for node_id in old.nodes if node_id not in new.nodes]
+        self.changed: List[str] = [node_id for node_id, node in new.nodes.items()
+                                   if node_id in old.nodes and old.nodes[node_id].text != node.text]
+        # Text before the first heading (project intro, tech stack) behaves like a section too
+        self.intro_changed = old.root.text != new.root.text
+
+    @property
+    def empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.intro_changed)
+
+    def touched(self) -> Set[str]:
+        return set(self.added) | set(self.removed) | set(self.changed)
+
+    def requirement_changes(self, node_id: str, context: int = 1) -> str:
+        """Changed lines of one section as a compact unified diff"""
+        old_lines = self.old.nodes[node_id].text.splitlines()
+        new_lines = self.new.nodes[node_id].text.splitlines()
+        diff = difflib.unified_diff(old_lines, new_lines, lineterm="", n=context)
+        return "\n".join(line for line in diff if not line.startswith(("---", "+++")))
+
+    def describe(self, max_chars: int = 12000) -> str:
+        """Readable change list for the re-planning prompt"""
+        parts: List[str] = []
+        if self.intro_changed:
+            parts.append("CHANGED PROJECT INTRODUCTION:\n" + self.new.root.text)
+        for node_id in self.added:
+            node = self.new.nodes[node_id]
+            trail = " > ".join(a.title for a in node.ancestors() + [node])
+            parts.append(f"ADDED SECTION [{node_id}] {trail}:\n{node.text}")
+        for node_id in self.removed:
+            node = self.old.nodes[node_id]
+            parts.append(f"REMOVED SECTION [{node_id}] {node.title}")
+        for node_id in self.changed:
+            node = self.new.nodes[node_id]
+            parts.append(f"CHANGED SECTION [{node_id}] {node.title}:\n{self.requirement_changes(node_id)}")
+        text = "\n\n".join(parts)
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit("\n", 1)[0] + "\n... (more changes truncated)"
+        return text
+
+    def summary(self) -> Dict[str, Any]:
+        return {"added": self.added, "removed": self.removed, "changed": self.changed,
+                "intro_changed": self.intro_changed}
+
+
+def diff_flows(old_flow: str, new_flow: str) -> FlowDiff:
+    return FlowDiff(get_flow_tree(old_flow), get_flow_tree(new_flow))
+
+
+def affected_tasks(plan: Dict[str, Any], diff: FlowDiff) -> List[str]:
+    """Ids of tasks whose linked flow sections (or anything under them) changed.
+
+    Tasks without flow links can't be placed and count as affected, as does every task
+    when the intro (usually the tech stack) changed.
+    """
+    touched = diff.touched()
+    # A task linked to a section also covers its subsections, so propagate changes upwards
+    for node_id in list(touched):
+        tree = diff.new if node_id in diff.new.nodes else diff.old
+        touched.update(ancestor.id for ancestor in tree.nodes[node_id].ancestors())
+    affected = []
+    for task in plan_tasks(plan):
+        nodes = task.get('flow_nodes')
+        if diff.intro_changed or not nodes or touched.intersection(nodes):
+            affected.append(task['id'])
+    return affected
+
+
+def uncovered_sections(plan: Dict[str, Any], diff: FlowDiff) -> List[str]:
+    """Added or changed sections that no existing task is linked to (directly or via an ancestor)"""
+    linked = {node_id for task in plan_tasks(plan) for node_id in task.get('flow_nodes') or []}
+    uncovered = []
+    for node_id in diff.added + diff.changed:
+        node = diff.new.nodes[node_id]
+        if not linked.intersection([node_id] + [a.id for a in node.ancestors()]):
+            uncovered.append(node_id)
+    return uncovered
+
+
+def merge_revision(plan: Dict[str, Any], revision: Dict[str, Any], affected: List[str]) -> Dict[str, Any]:
+    """Apply an LLM revision (updated_tasks, new_tasks, removed_task_ids) to a copy of the plan.
+
+    Unaffected tasks are kept exactly as they were, so their ids and cache keys don't move.
+    Only affected tasks may be updated or removed; revised and new tasks lose their flow links
+    so they get relinked against the new flow.
+    """
+    merged = json.loads(json.dumps(plan))
+    affected_set = set(affected)
+    updates = {t['id']: t for t in revision.get('updated_tasks') or []
+               if isinstance(t, dict) and t.get('id') in affected_set}
+    removed = {str(i) for i in revision.get('removed_task_ids') or []} & affected_set
+    existing = {task['id'] for task in plan_tasks(plan)}
+    for group in TASK_GROUPS:
+        kept = []
+        for task in merged.get(group) or []:
+            task_id = task.get('id') if isinstance(task, dict) else None
+            if task_id in removed:
+                continue
+            if task_id in updates:
+                revised = {**task, **updates[task_id], 'id': task_id}
+                revised.pop('flow_nodes', None)
+                task = revised
+            kept.append(task)
+        if group in merged or kept:
+            merged[group] = kept
+    for task in revision.get('new_tasks') or []:
+        if not isinstance(task, dict):
+            continue
+        task = dict(task)
+        task.pop('flow_nodes', None)
+        if task.get('id') in existing:
+            # A "new" task reusing an existing id is treated as an update of that task only if affected
+            if task['id'] not in affected_set:
+                task['id'] = None
+        agent = str(task.get('agent', '')).lower()
+        group = f"{agent}_tasks" if f"{agent}_tasks" in TASK_GROUPS else 'backend_tasks'
+        merged.setdefault(group, []).append(task)
+    for task in plan_tasks(merged):
+        deps = task.get('dependencies') or []
+        task['dependencies'] = [dep for dep in deps if dep not in removed]
+    merged.pop('plan_analysis', None)
+    return merged
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_PATH = os.path.join(".llm_cache", "responses.sqlite3")
+
+
+def render_messages(messages: Any) -> List[Dict[str, Any]]:
+    """Normalize prompt values, message lists, tuples and plain strings into JSON-able dicts"""
+    if hasattr(messages, "to_messages"):
+        messages = messages.to_messages()
+    if isinstance(messages, str):
+        return [{"type": "human", "content": messages}]
+    rendered = []
+    for message in messages:
+        if isinstance(message, str):
+            rendered.append({"type": "human", "content": message})
+        elif isinstance(message, dict):
+            rendered.append({"type": message.get("role", message.get("type")), "content": message.get("content")})
+        elif isinstance(message, (list, tuple)) and len(message) == 2:
+            rendered.append({"type": message[0], "content": message[1]})
+        else:
+            rendered.append({"type": getattr(message, "type", type(message).__name__),
+                             "content": getattr(message, "content", str(message))})
+    return rendered
+
+
+def make_cache_key(model_name: str, messages: Any, params: Optional[Dict[str, Any]] = None) -> str:
+    """Content-addressed key over model name, rendered messages and generation parameters"""
+    payload = {
+        "model": model_name,
+        "messages": render_messages(messages),
+        "params": params or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Persistent SQLite cache of LLM responses with zlib-compressed payloads"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 512 * 1024 * 1024,
+                 max_age_seconds: Optional[float] = 30 * 24 * 3600, evict_every: int = 50):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.evict_every = evict_every
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for key, or None on a miss or expired entry"""
+        found = self.get_first([key])
+        return found[1] if found is not None else None
+
+    def get_first(self, keys: List[str]) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """(index, payload) of the first key with a live entry, or None.
+
+        Counts as one lookup however many keys are tried, so the hit rate reflects requests
+        rather than fallback models.
+        """
+        now = time.time()
+        with self._lock:
+            for index, key in enumerate(keys):
+                row = self._conn.execute(
+                    "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or self._expired(row[1], now):
+                    continue
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+                self.stats["hits"] += 1
+                break
+            else:
+                self.stats["misses"] += 1
+                return None
+        return index, json.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, key: str, model_name: str, payload: Dict[str, Any]) -> None:
+        """Store a payload under key, evicting old entries periodically"""
+        blob = zlib.compress(json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, payload, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, blob, len(blob), now, now),
+            )
+            self._conn.commit()
+            self.stats["writes"] += 1
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.evict_every:
+                self._writes_since_evict = 0
+                self._evict(now)
+
+    def evict(self) -> int:
+        """Apply age and size eviction now; returns number of removed entries"""
+        with self._lock:
+            return self._evict(time.time())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def summary(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current on-disk footprint"""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": count,
+            "bytes": size,
+        }
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.max_age_seconds is not None and now - created_at > self.max_age_seconds
+
+    def _evict(self, now: float) -> int:
+        removed = 0
+        if self.max_age_seconds is not None:
+            cursor = self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age_seconds,))
+            removed += cursor.rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            # Drop least recently used entries until we are back under the size budget
+            excess = total - self.max_bytes
+            keys = []
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC"):
+                keys.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+            removed += len(keys)
+        self._conn.commit()
+        self.stats["evictions"] += removed
+        return removed
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide response cache; disabled with LLM_CACHE=0"""
+    global _shared_cache
+    if os.getenv("LLM_CACHE", "1").lower() in ("0", "false", "off"):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024,
+                max_age_seconds=float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600,
+            )
+        return _shared_cache
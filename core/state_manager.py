@@ -1,7 +1,23 @@
 from dataclasses import dataclass
-from typing import Dict, List, Any, Optional, Union
+from typing import Annotated, Dict, List, Any, Optional, Union
 from pydantic import BaseModel, Field
 
+
+def merge_unique(left: Optional[List[str]], right: Optional[List[str]]) -> List[str]:
+    """Reducer: ordered union, so full lists and per-task deltas can both be returned by nodes"""
+    merged = list(left or [])
+    seen = set(merged)
+    for item in right or []:
+        if item not in seen:
+            seen.add(item)
+            merged.append(item)
+    return merged
+
+
+def merge_dict(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer: key-wise update, so concurrent task results don't overwrite each other"""
+    return {**(left or {}), **(right or {})}
+
 @dataclass
 class ProjectState:
     """Central state for the multi-agent system"""
@@ -17,6 +33,8 @@ class ProjectState:
     max_iterations: int = 500
     is_complete: bool = False
     task_plan: Optional[Dict[str, Any]] = None
+    plan_revision: Optional[str] = None
+    flow_nodes: Optional[List[str]] = None
     
     def __post_init__(self):
         if self.completed_tasks is None:
@@ -33,12 +51,17 @@ class State(BaseModel):
     flow: str = Field(description="Project flow requirements")
     design_config: str = Field(description="Design configuration")
     root_path: str = Field(description="Project root path")
+    run_id: str = Field(default="", description="Id of the generation run, kept across resumes")
     current_task: Optional[Union[str, dict]] = Field(default=None, description="Current task")
-    completed_tasks: List[str] = Field(default_factory=list, description="Completed tasks")
+    completed_tasks: Annotated[List[str], merge_unique] = Field(default_factory=list, description="Completed tasks")
     pending_tasks: List[str] = Field(default_factory=list, description="Pending tasks")
-    agent_outputs: Dict[str, Any] = Field(default_factory=dict, description="Agent outputs")
+    failed_tasks: Annotated[List[str], merge_unique] = Field(default_factory=list, description="Tasks that gave up")
+    agent_outputs: Annotated[Dict[str, Any], merge_dict] = Field(default_factory=dict, description="Agent outputs")
+    build_report: Annotated[Dict[str, Any], merge_dict] = Field(default_factory=dict, description="Per-task build cache outcome")
     validation_results: Dict[str, Any] = Field(default_factory=dict, description="Validation results")
     iteration_count: int = Field(default=0, description="Current iteration")
     max_iterations: int = Field(default=500, description="Maximum iterations")
     is_complete: bool = Field(default=False, description="Project completion status")
-    task_plan: Optional[Dict[str, Any]] = Field(default=None, description="Task plan") 
\ No newline at end of file
+    task_plan: Optional[Dict[str, Any]] = Field(default=None, description="Task plan")
+    task_status: str = Field(default="", description="Per-task status code, see TaskGraph.status_code")
+    plan_revision: str = Field(default="", description="plan_digest of task_plan, keys the cached TaskGraph") 
\ No newline at end of file
@@ -0,0 +1,192 @@
+import hashlib
+import heapq
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+TASK_GROUPS = ('database_tasks', 'backend_tasks', 'frontend_tasks', 'documentation_tasks')
+
+# One character per task in status_code(), in plan order
+WAITING = "."
+RUNNING = "r"
+DONE = "d"
+FAILED = "f"
+
+
+def plan_tasks(task_plan: Dict[str, Any], groups: Iterable[str] = TASK_GROUPS) -> List[Dict[str, Any]]:
+    """All tasks of a supervisor plan in dispatch order"""
+    tasks: List[Dict[str, Any]] = []
+    for group in groups:
+        tasks.extend(task for task in task_plan.get(group) or [] if isinstance(task, dict) and 'id' in task)
+    return tasks
+
+
+def plan_digest(task_plan: Optional[Dict[str, Any]]) -> str:
+    """Revision of a plan that survives copies: hash of its tasks and dependencies in plan order"""
+    tasks = [(str(task['id']), [str(dep) for dep in task.get('dependencies') or []])
+             for task in plan_tasks(task_plan or {})]
+    return hashlib.sha256(json.dumps(tasks, separators=(",", ":")).encode("utf-8")).hexdigest()[:16]
+
+
+class TaskGraph:
+    """Dependency graph of a supervisor plan with in-degree counters and a ready queue.
+
+    Built once per plan. Completing a task only decrements the counters of its dependants,
+    and the ready queue is a heap ordered by plan position, so picking the next task costs
+    O(log n) instead of rescanning every task and its dependencies.
+    """
+
+    def __init__(self, task_plan: Dict[str, Any], groups: Iterable[str] = TASK_GROUPS):
+        self.plan = task_plan
+        self.revision = plan_digest(task_plan)
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.position: Dict[str, int] = {}
+        for task in plan_tasks(task_plan or {}, groups):
+            if task['id'] not in self.tasks:
+                self.position[task['id']] = len(self.tasks)
+                self.tasks[task['id']] = task
+        self.dependents: Dict[str, List[str]] = {task_id: [] for task_id in self.tasks}
+        # Dependencies naming no task in the plan: such a task can never become ready
+        self.missing: Dict[str, List[str]] = {}
+        self.indegree: Dict[str, int] = {}
+        for task_id, task in self.tasks.items():
+            count = 0
+            for dep in dict.fromkeys(task.get('dependencies') or []):
+                if dep in self.dependents and dep != task_id:
+                    self.dependents[dep].append(task_id)
+                    count += 1
+                else:
+                    self.missing.setdefault(task_id, []).append(dep)
+            self.indegree[task_id] = count
+        self._reset_status()
+
+    def _reset_status(self) -> None:
+        self.completed: set = set()
+        self.running: set = set()
+        self.failed: set = set()
+        self._unmet = dict(self.indegree)
+        self._ready: List[tuple] = []
+        self._queued: set = set()
+        self._synced_completed = 0
+        self._synced_failed = 0
+        for task_id, count in self._unmet.items():
+            if count == 0:
+                self._push(task_id)
+
+    @classmethod
+    def from_state(cls, state, groups: Iterable[str] = TASK_GROUPS) -> "TaskGraph":
+        """Graph for state.task_plan with the status carried in state applied"""
+        graph = cls(state.task_plan or {}, groups)
+        graph.restore(getattr(state, 'task_status', None) or "")
+        graph.sync(state.completed_tasks or [], getattr(state, 'failed_tasks', None) or [])
+        for task_id in state.pending_tasks or []:
+            graph.claim(task_id)
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    def _push(self, task_id: str) -> None:
+        if task_id not in self._queued and task_id not in self.missing:
+            self._queued.add(task_id)
+            heapq.heappush(self._ready, (self.position[task_id], task_id))
+
+    def _settled(self, task_id: str) -> bool:
+        return task_id in self.completed or task_id in self.failed or task_id in self.running
+
+    def _prune(self) -> None:
+        # Entries are removed lazily: anything claimed or finished since it was queued
+        while self._ready and self._settled(self._ready[0][1]):
+            self._queued.discard(heapq.heappop(self._ready)[1])
+
+    def peek(self) -> Optional[Dict[str, Any]]:
+        """Next ready task in plan order, without claiming it"""
+        self._prune()
+        return self.tasks[self._ready[0][1]] if self._ready else None
+
+    def ready_count(self) -> int:
+        self._prune()
+        return sum(1 for _, task_id in self._ready if not self._settled(task_id))
+
+    def dispatch(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Claim up to `limit` ready tasks (all of them if None) and mark them running"""
+        claimed: List[Dict[str, Any]] = []
+        while limit is None or len(claimed) < limit:
+            task = self.peek()
+            if task is None:
+                break
+            self.claim(task['id'])
+            claimed.append(task)
+        return claimed
+
+    def claim(self, task_id: str) -> None:
+        if task_id in self.tasks and task_id not in self.completed and task_id not in self.failed:
+            self.running.add(task_id)
+
+    def release(self, task_id: str) -> None:
+        """Put a running task back on the ready queue, e.g. to retry it"""
+        self.running.discard(task_id)
+        if task_id in self.tasks and not self._unmet[task_id] and not self._settled(task_id):
+            self._push(task_id)
+
+    def complete(self, task_id: str) -> List[str]:
+        """Mark a task done; returns the ids it made ready"""
+        if task_id not in self.tasks or task_id in self.completed:
+            return []
+        self.running.discard(task_id)
+        self.failed.discard(task_id)
+        self.completed.add(task_id)
+        unlocked = []
+        for dependent in self.dependents[task_id]:
+            self._unmet[dependent] -= 1
+            if self._unmet[dependent] == 0 and not self._settled(dependent):
+                self._push(dependent)
+                unlocked.append(dependent)
+        return unlocked
+
+    def fail(self, task_id: str) -> None:
+        if task_id in self.tasks and task_id not in self.completed:
+            self.running.discard(task_id)
+            self.failed.add(task_id)
+
+    def sync(self, completed_tasks: List[str], failed_tasks: List[str] = ()) -> None:
+        """Apply status lists from state. They only grow, so only the new tail is processed"""
+        if len(completed_tasks) < self._synced_completed or len(failed_tasks) < self._synced_failed:
+            self._reset_status()
+        for task_id in completed_tasks[self._synced_completed:]:
+            self.complete(task_id)
+        for task_id in failed_tasks[self._synced_failed:]:
+            self.fail(task_id)
+        self._synced_completed = len(completed_tasks)
+        self._synced_failed = len(failed_tasks)
+
+    def blocked(self) -> List[str]:
+        """Tasks that can no longer run: a dependency failed, is missing, or never finishes"""
+        self._prune()
+        if self._ready or self.running:
+            return []
+        return [task_id for task_id in self.tasks if not self._settled(task_id)]
+
+    def is_finished(self) -> bool:
+        return self.peek() is None and not self.running
+
+    def status_code(self) -> str:
+        """Compact status for storing in state: one character per task in plan order"""
+        return "".join(
+            DONE if task_id in self.completed else FAILED if task_id in self.failed
+            else RUNNING if task_id in self.running else WAITING
+            for task_id in self.tasks
+        )
+
+    def restore(self, code: str) -> None:
+        """Apply a status_code() from a graph of the same plan; running tasks are rerun"""
+        if len(code) != len(self.tasks):
+            return
+        for task_id, status in zip(self.tasks, code):
+            if status == DONE:
+                self.complete(task_id)
+            elif status == FAILED:
+                self.fail(task_id)
+
+    def summary(self) -> Dict[str, int]:
+        return {"tasks": len(self.tasks), "completed": len(self.completed), "running": len(self.running),
+                "failed": len(self.failed), "ready": self.ready_count()}
@@ -1,6 +1,6 @@
 import uuid
 import operator
-from typing import Annotated, List, TypedDict
+from typing import Annotated, Any, Callable, Dict, List, Optional, TypedDict
 from langgraph.types import Command, interrupt
 from langgraph.checkpoint.memory import MemorySaver
 from chains.thinker import thinker_chain, thinker_parser
@@ -119,7 +119,14 @@ graph.add_node("end_node", end_node)
 graph.set_entry_point("Thinker_Agent")
 graph.set_finish_point("end_node")
 
-def get_idea(user_input: str):
+def ask_user(payload: Dict[str, Any]) -> str:
+    """Default answer_fn for get_idea: ask on the terminal"""
+    print(f"Thinker Agent: {payload.get('question', 'Please provide input:')}")
+    return input("Your response: ")
+
+def get_idea(user_input: str, answer_fn: Optional[Callable[[Dict[str, Any]], str]] = None):
+    """Run the idea graph; answer_fn gets each interrupt payload (question, awaiting) and returns the answer"""
+    answer_fn = answer_fn or ask_user
     checkpointer = MemorySaver()
     app = graph.compile(checkpointer=checkpointer)
 
@@ -144,11 +151,8 @@ def get_idea(user_input: str):
                 # print(f"Node ID: {node_id}")
 
                 if node_id == "__interrupt__":
-                    # Extract the question from the interrupt payload
-                    question = value[0].value.get("question", "Please provide input:")
-                    print(f"Thinker Agent: {question}")
-                    # Prompt the user for input
-                    user_feedback = input("Your response: ")
+                    # Ask for the answer to the interrupt's question (terminal by default)
+                    user_feedback = answer_fn(value[0].value)
                     # Resume the graph with the user's input using stream
                     stream = app.stream(Command(resume=user_feedback), config=thread_config)
                     # print(thread_config)
@@ -10,10 +10,23 @@
 # if __name__ == "__main__":
 #     main()
 
+import json
+import sys
+
 from graph.main_graph import get_idea
-from system.workflow_orchestrator import generate_project_with_graph
+from system.workflow_orchestrator import generate_project_with_graph, resume_project_with_graph
 
 if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--resume":
+        # Continue an interrupted run from its last checkpoint
+        print(resume_project_with_graph(sys.argv[2]))
+        sys.exit(0)
+    if len(sys.argv) == 3 and sys.argv[1] == "--batch":
+        # Generate every project in a JSONL job file (see system/batch.py for more options)
+        from system.batch import run_batch
+        print(json.dumps(run_batch(sys.argv[2])["aggregate"], indent=2))
+        sys.exit(0)
+    
     user_idea = input("Enter your project idea: ")
     result = get_idea(user_idea)
     
@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from core.build_cache import REUSED
+from core.llm_utils import LLMRegistry, get_llm_registry
+from core.rate_limiter import get_rate_limiter
+from core.response_cache import get_response_cache
+from system.workflow_orchestrator import WorkflowAutoCodeGenSystem, project_root
+
+
+class BatchJob:
+    """One project to generate: a name plus the flow and design config from the idea graph"""
+
+    def __init__(self, project_name: str, flow: str, design_config: str, output_root: Optional[str] = None):
+        self.project_name = project_name
+        self.flow = flow
+        self.design_config = design_config
+        self.output_root = output_root
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BatchJob":
+        missing = [key for key in ("project_name", "flow", "design_config") if not data.get(key)]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        design_config = data["design_config"]
+        if not isinstance(design_config, str):
+            design_config = json.dumps(design_config)
+        return cls(str(data["project_name"]), data["flow"], design_config, data.get("output_root"))
+
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """Read a JSON-lines job file: one {"project_name", "flow", "design_config"} object per line"""
+    jobs: List[BatchJob] = []
+    names = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                job = BatchJob.from_dict(json.loads(line))
+            except (ValueError, TypeError, AttributeError) as e:
+                raise ValueError(f"{path}:{line_no}: invalid job: {e}") from e
+            # The project name is the checkpoint thread, so two jobs can't share it
+            if job.project_name in names:
+                raise ValueError(f"{path}:{line_no}: duplicate project name {job.project_name!r}")
+            names.add(job.project_name)
+            jobs.append(job)
+    return jobs
+
+
+class BatchRunner:
+    """Generates many projects concurrently in one event loop.
+
+    Every project gets its own WorkflowAutoCodeGenSystem (plans and task graphs are per run),
+    but they all draw from the process-wide LLM registry, rate limiter and response cache, so
+    the limiter paces the whole batch against the model quotas. Each project keeps its own
+    output directory and checkpoint thread, so an interrupted batch can be resumed.
+    """
+
+    def __init__(self, output_root: Optional[str] = None, concurrency: Optional[int] = None,
+                 registry: Optional[LLMRegistry] = None, resume: bool = False):
+        self.output_root = output_root
+        self.concurrency = max(1, concurrency or int(os.getenv("BATCH_CONCURRENCY", "4")))
+        self.registry = registry or get_llm_registry()
+        self.resume = resume
+
+    async def run(self, jobs: List[BatchJob]) -> Dict[str, Any]:
+        print(f"📦 Batch: {len(jobs)} projects, {self.concurrency} at a time")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        llm_before = self._llm_usage()
+        started = time.perf_counter()
+
+        async def run_limited(job: BatchJob) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._run_job(job)
+
+        projects = await asyncio.gather(*(run_limited(job) for job in jobs))
+        report = self._report(projects, time.perf_counter() - started, llm_before)
+        totals = report["aggregate"]
+        print(f"📦 Batch done: {totals['succeeded']}/{totals['projects']} projects in {totals['wall_seconds']}s, "
+              f"{totals['projects_per_hour']} projects/h, {totals['tasks_per_minute']} tasks/min, "
+              f"effective concurrency {totals['effective_concurrency']}")
+        return report
+
+    async def _run_job(self, job: BatchJob) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"project_name": job.project_name}
+        started = time.perf_counter()
+        try:
+            root_path = project_root(job.project_name, job.output_root or self.output_root)
+            entry["root_path"] = root_path
+            system = WorkflowAutoCodeGenSystem(registry=self.registry)
+            result = None
+            if self.resume:
+                result = await system.resume(root_path)
+                if not result.get("success") and "No checkpoint" in str(result.get("error", "")):
+                    result = None
+            if result is None:
+                result = await system.generate_project(job.flow, job.design_config, root_path)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        elapsed = time.perf_counter() - started
+        build_report = result.get("build_report") or {}
+        write_stats = result.get("write_stats") or {}
+        completed = len(result.get("completed_tasks") or [])
+        entry.update({
+            "success": bool(result.get("success")),
+            "error": result.get("error"),
+            "seconds": round(elapsed, 2),
+            "completed_tasks": completed,
+            "failed_tasks": len(result.get("failed_tasks") or []),
+            "reused_tasks": sum(1 for build in build_report.values() if build.get("action") == REUSED),
+            "files_written": write_stats.get("files_written", 0),
+            "tasks_per_minute": round(completed * 60 / elapsed, 2) if elapsed else 0.0,
+            "resumed": bool(result.get("resumed")),
+        })
+        status = "✅" if entry["success"] else "❌"
+        print(f"{status} Batch: {job.project_name} in {entry['seconds']}s "
+              f"({completed} tasks, {entry['reused_tasks']} reused, {entry['files_written']} files)")
+        return entry
+
+    @staticmethod
+    def _llm_usage() -> Dict[str, float]:
+        limiter = get_rate_limiter()
+        usage = {"requests": 0.0, "tokens": 0.0, "throttle_wait_seconds": 0.0}
+        for stats in (limiter.stats().values() if limiter else []):
+            usage["requests"] += stats["requests"]
+            usage["tokens"] += stats["actual_tokens"] or stats["estimated_tokens"]
+            usage["throttle_wait_seconds"] += stats["wait_seconds"]
+        return usage
+
+    def _report(self, projects: List[Dict[str, Any]], wall: float, llm_before: Dict[str, float]) -> Dict[str, Any]:
+        busy = sum(project["seconds"] for project in projects)
+        tasks = sum(project["completed_tasks"] for project in projects)
+        llm_after = self._llm_usage()
+        cache = get_response_cache()
+        aggregate = {
+            "projects": len(projects),
+            "succeeded": sum(1 for project in projects if project["success"]),
+            "wall_seconds": round(wall, 2),
+            "completed_tasks": tasks,
+            "reused_tasks": sum(project["reused_tasks"] for project in projects),
+            "files_written": sum(project["files_written"] for project in projects),
+            "projects_per_hour": round(len(projects) * 3600 / wall, 2) if wall else 0.0,
+            "tasks_per_minute": round(tasks * 60 / wall, 2) if wall else 0.0,
+            # Sum of per-project time over wall time: how much the projects actually overlapped
+            "effective_concurrency": round(busy / wall, 2) if wall else 0.0,
+            "llm": {key: round(llm_after[key] - llm_before[key], 2) for key in llm_after},
+            "response_cache": cache.summary() if cache is not None else {},
+        }
+        return {"projects": projects, "aggregate": aggregate}
+
+
+def run_batch(jobs_path: str, output_root: Optional[str] = None, concurrency: Optional[int] = None,
+              resume: bool = False, report_path: Optional[str] = None) -> Dict[str, Any]:
+    """Generate every project in a JSONL job file; optionally write the report as JSON"""
+    jobs = load_jobs(jobs_path)
+    report = asyncio.run(BatchRunner(output_root, concurrency, resume=resume).run(jobs))
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate many projects from a JSONL job file")
+    parser.add_argument("jobs", help="JSONL file with project_name, flow and design_config per line")
+    parser.add_argument("--output-root", help="Directory for the generated projects (default: PROJECTS_ROOT)")
+    parser.add_argument("--concurrency", type=int, help="Projects generated at once (default: BATCH_CONCURRENCY)")
+    parser.add_argument("--resume", action="store_true", help="Continue projects that have a checkpoint")
+    parser.add_argument("--report", help="Write the throughput report to this JSON file")
+    args = parser.parse_args()
+    result = run_batch(args.jobs, args.output_root, args.concurrency, args.resume, args.report)
+    print(json.dumps(result["aggregate"], indent=2))
@@ -1,27 +1,35 @@
 import asyncio
 import os
 from typing import Dict, Any, Optional
-from core.llm_utils import get_gemini_llm
+from core.llm_utils import LLMRegistry, get_llm_registry
+from core.blob_store import get_output_log
+from core.file_manager import FileManager
+from core.project_index import get_project_index
 from core.state_manager import ProjectState
+from core.task_graph import plan_tasks
 from agents.supervisor_agent import SupervisorAgent
 from agents.database_agent import DatabaseAgent
 from agents.backend_agent import BackendAgent
 from agents.frontend_agent import FrontendAgent
+from agents.documentation_agent import DocumentationAgent
 
 class AutoCodeGenSystem:
     """Main orchestrator for the multi-agent code generation system"""
     
-    def __init__(self):
-        self.llm = get_gemini_llm()
+    def __init__(self, registry: Optional[LLMRegistry] = None):
+        self.registry = registry or get_llm_registry()
+        self.llm = self.registry.gemini_llm()
         self.supervisor = SupervisorAgent(self.llm)
         self.database_agent = DatabaseAgent(self.llm)
         self.backend_agent = BackendAgent(self.llm)
         self.frontend_agent = FrontendAgent(self.llm)
+        self.documentation_agent = DocumentationAgent(self.llm)
         self.agents = {
             'supervisor': self.supervisor,
             'database': self.database_agent,
             'backend': self.backend_agent,
-            'frontend': self.frontend_agent
+            'frontend': self.frontend_agent,
+            'documentation': self.documentation_agent
         }
     
     async def run(self, flow: str, design_config: str, project_name: str) -> Dict[str, Any]:
@@ -40,6 +48,7 @@ class AutoCodeGenSystem:
         
         # Ensure project directory exists
         os.makedirs(root_path, exist_ok=True)
+        ledger = FileManager.reset_ledger(root_path)
         
         iteration = 0
         while iteration < state.max_iterations and not state.is_complete:
@@ -68,6 +77,8 @@ class AutoCodeGenSystem:
                 continue
             
             try:
+                state.current_task = task['id']
+                state.flow_nodes = task.get('flow_nodes')
                 result = await agent.execute_task(task['description'], state)
                 
                 # Update state
@@ -77,7 +88,8 @@ class AutoCodeGenSystem:
                     state.pending_tasks.remove(task['id'])
                 
                 if state.agent_outputs is not None:
-                    state.agent_outputs[task['id']] = result
+                    state.agent_outputs[task['id']] = get_output_log(state.root_path).append(
+                        task['id'], task['agent'], result)
                 
                 print(f"[System] Task {task['id']} completed successfully")
                 print(f"[System] Summary: {result.get('summary', 'No summary provided')}")
@@ -98,6 +110,12 @@ class AutoCodeGenSystem:
         
         # Generate final summary
         summary = self._generate_summary(state)
+        get_project_index(root_path).save()
+        write_stats = ledger.summary()
+        print(f"[System] Writes: {write_stats['files_written']} written, {write_stats['files_skipped']} unchanged skipped, "
+              f"{write_stats['bytes_written']} bytes written, {write_stats['bytes_skipped']} bytes avoided")
+        if write_stats['rewritten_files']:
+            print(f"[System] Files rewritten by multiple tasks: {', '.join(sorted(write_stats['rewritten_files']))}")
         
         return {
             "project_name": project_name,
@@ -105,7 +123,8 @@ class AutoCodeGenSystem:
             "iterations": iteration,
             "completed_tasks": state.completed_tasks,
             "summary": summary,
-            "is_complete": state.is_complete
+            "is_complete": state.is_complete,
+            "write_stats": write_stats
         }
     
     def _generate_summary(self, state: ProjectState) -> Dict[str, Any]:
@@ -145,13 +164,7 @@ class AutoCodeGenSystem:
         if not hasattr(state, 'task_plan') or not state.task_plan:
             return "unknown"
         
-        all_tasks = (
-            state.task_plan.get('database_tasks', []) +
-            state.task_plan.get('backend_tasks', []) +
-            state.task_plan.get('frontend_tasks', [])
-        )
-        
-        for task in all_tasks:
+        for task in plan_tasks(state.task_plan):
             if task.get('id') == task_id:
                 return task.get('agent', 'unknown')
         
@@ -0,0 +1,549 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+from core.llm_utils import LLMRegistry, get_llm_registry
+from core.project_index import INDEX_DIR
+from graph.main_graph import get_idea
+from system.workflow_orchestrator import WorkflowAutoCodeGenSystem, project_root
+
+DEFAULT_JOB_DB = os.path.join(".jobs", "jobs.sqlite3")
+MAX_BODY_BYTES = 4 * 1024 * 1024
+KEEPALIVE_SECONDS = 15
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL = (COMPLETED, FAILED, CANCELLED)
+
+# Answer used when the thinker asks more clarifying questions than the job supplied answers for
+DEFAULT_ANSWER = "No further details. Use sensible defaults for anything unspecified."
+
+_JOB_FIELDS = ("id", "status", "project_name", "request", "flow", "design_config", "root_path",
+               "result", "error", "created", "started", "finished")
+_JSON_FIELDS = ("request", "result")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's idea thread once the job has been cancelled"""
+
+
+class JobStore:
+    """SQLite-backed job queue and per-job event log, so jobs and progress survive a restart"""
+
+    def __init__(self, path: str = DEFAULT_JOB_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, project_name TEXT, request TEXT, "
+            "flow TEXT, design_config TEXT, root_path TEXT, result TEXT, error TEXT, "
+            "created REAL, started REAL, finished REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS events (job_id TEXT, seq INTEGER, type TEXT, data TEXT, time REAL, "
+            "PRIMARY KEY (job_id, seq))"
+        )
+        self._conn.commit()
+
+    def _row(self, row) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(zip(_JOB_FIELDS, row))
+        for field in _JSON_FIELDS:
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    def create(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, project_name, request, flow, design_config, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, request.get("project_name"), json.dumps(request),
+                 request.get("flow"), request.get("design_config"), time.time()),
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row)
+
+    def status(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def recent(self, limit: int = 100, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT id, status, project_name, error, created, started, finished FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created DESC LIMIT ?", params + (limit,)).fetchall()
+        return [dict(zip(("id", "status", "project_name", "error", "created", "started", "finished"), row))
+                for row in rows]
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        values = [json.dumps(value, default=str) if key in _JSON_FIELDS and value is not None else value
+                  for key, value in fields.items()]
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", values + [job_id])
+            self._conn.commit()
+
+    def active_project(self, project_name: str, exclude: Optional[str] = None) -> Optional[str]:
+        """Id of a queued or running job for this project, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE project_name = ? AND status IN (?, ?) AND id != ?",
+                (project_name, QUEUED, RUNNING, exclude or ""),
+            ).fetchone()
+        return row[0] if row else None
+
+    def queued(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created", (QUEUED,)).fetchall()
+        return [row[0] for row in rows]
+
+    def requeue_interrupted(self) -> int:
+        """Jobs left running by a previous process go back to the queue (they resume from checkpoints)"""
+        with self._lock:
+            cursor = self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def add_event(self, job_id: str, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM events WHERE job_id = ?",
+                                     (job_id,)).fetchone()[0]
+            event = {"seq": seq, "type": event_type, "data": data, "time": round(time.time(), 3)}
+            self._conn.execute("INSERT INTO events (job_id, seq, type, data, time) VALUES (?, ?, ?, ?, ?)",
+                               (job_id, seq, event_type, json.dumps(data, default=str), event["time"]))
+            self._conn.commit()
+        return event
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT seq, type, data, time FROM events WHERE job_id = ? AND seq > ? "
+                                      "ORDER BY seq", (job_id, after)).fetchall()
+        return [{"seq": seq, "type": event_type, "data": json.loads(data), "time": at}
+                for seq, event_type, data, at in rows]
+
+
+class JobManager:
+    """Bounded pool of asyncio workers running generation jobs from the JobStore.
+
+    A job either carries an "idea" (run through get_idea, with clarifying questions answered
+    from its "answers" list) or a ready "flow" and "design_config". All jobs share the warm
+    LLM registry, rate limiter and response cache of this process.
+    """
+
+    def __init__(self, store: JobStore, workers: Optional[int] = None, output_root: Optional[str] = None,
+                 registry: Optional[LLMRegistry] = None):
+        self.store = store
+        self.workers = max(1, workers or int(os.getenv("SERVER_WORKERS", "2")))
+        self.output_root = output_root
+        self.registry = registry or get_llm_registry()
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._running: Dict[str, asyncio.Task] = {}
+        # Set on cancel; checked by the idea stage's thread, which task.cancel() can't stop
+        self._cancel_flags: Dict[str, threading.Event] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        requeued = self.store.requeue_interrupted()
+        for job_id in self.store.queued():
+            self._queue.put_nowait(job_id)
+        if requeued:
+            print(f"♻️ Server: {requeued} interrupted jobs requeued")
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        # Running jobs stay "running" in the store and are requeued by the next start()
+        self._stopping = True
+        for task in list(self._running.values()) + self._workers:
+            task.cancel()
+        await asyncio.gather(*self._running.values(), *self._workers, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"workers": self.workers, "running": len(self._running), "queued": self._queue.qsize()}
+
+    def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and enqueue a job; raises ValueError for bad requests, LookupError on conflicts"""
+        if not isinstance(request, dict):
+            raise ValueError("request body must be a JSON object")
+        if not request.get("idea") and not (request.get("flow") and request.get("design_config")):
+            raise ValueError("either 'idea' or both 'flow' and 'design_config' are required")
+        if request.get("flow") and not request.get("project_name"):
+            raise ValueError("'project_name' is required with 'flow'")
+        if not isinstance(request.get("answers", []), list):
+            raise ValueError("'answers' must be a list of strings")
+        if isinstance(request.get("design_config"), (dict, list)):
+            request["design_config"] = json.dumps(request["design_config"])
+        if request.get("project_name"):
+            project_root(request["project_name"], self.output_root)
+            conflict = self.store.active_project(request["project_name"])
+            if conflict:
+                raise LookupError(f"project {request['project_name']!r} already has active job {conflict}")
+        job = self.store.create(request)
+        self._emit(job["id"], QUEUED, {"position": self._queue.qsize() + 1})
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def cancel(self, job_id: str, wait: float = 5.0) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is None or job["status"] in TERMINAL:
+            return job
+        task = self._running.get(job_id)
+        if task is not None:
+            # Generation stops at its next await; the idea thread stops at its next question
+            flag = self._cancel_flags.get(job_id)
+            if flag is not None:
+                flag.set()
+            task.cancel()
+            await asyncio.wait([task], timeout=wait)
+        else:
+            self._finish(job_id, CANCELLED, error="cancelled")
+        return self.store.get(job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def _emit(self, job_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        # Nothing is recorded after a job's final event (e.g. late progress from an abandoned thread)
+        if self.store.status(job_id) in TERMINAL:
+            return
+        self._publish(job_id, event_type, data)
+
+    def _publish(self, job_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        event = self.store.add_event(job_id, event_type, data)
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+    def _emit_threadsafe(self, job_id: str, event_type: str, data: Dict[str, Any]) -> None:
+        self._loop.call_soon_threadsafe(self._emit, job_id, event_type, data)
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None) -> None:
+        if self.store.status(job_id) in TERMINAL:
+            return
+        self.store.update(job_id, status=status, result=result, error=error, finished=time.time())
+        self._publish(job_id, status, {"error": error} if error else {})
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self.store.get(job_id)
+            if job is None or job["status"] != QUEUED:
+                continue
+            self._cancel_flags[job_id] = threading.Event()
+            task = asyncio.create_task(self._run_job(job))
+            self._running[job_id] = task
+            try:
+                await task
+            except asyncio.CancelledError:
+                if self._stopping:
+                    raise
+                self._finish(job_id, CANCELLED, error="cancelled")
+            except Exception as e:
+                self._finish(job_id, FAILED, error=str(e))
+            finally:
+                self._running.pop(job_id, None)
+                self._cancel_flags.pop(job_id, None)
+
+    async def _run_job(self, job: Dict[str, Any]) -> None:
+        job_id, request = job["id"], job["request"]
+        self.store.update(job_id, status=RUNNING, started=time.time())
+        self._emit(job_id, RUNNING, {})
+        flow, design_config, project_name = job["flow"], job["design_config"], job["project_name"]
+        if not flow:
+            self._emit(job_id, "stage", {"stage": "idea"})
+            idea = await asyncio.to_thread(get_idea, request["idea"], self._answer_fn(job_id, request))
+            flow, design_config = idea["flow"], idea["design_config"]
+            project_name = request.get("project_name") or idea["project_name"]
+            project_root(project_name, self.output_root)
+            conflict = self.store.active_project(project_name, exclude=job_id)
+            if conflict:
+                raise LookupError(f"project {project_name!r} already has active job {conflict}")
+            self.store.update(job_id, flow=flow, design_config=design_config, project_name=project_name)
+
+        root_path = project_root(project_name, self.output_root)
+        resuming = job["root_path"] is not None
+        self.store.update(job_id, root_path=root_path)
+        self._emit(job_id, "stage", {"stage": "generate", "project_name": project_name, "resume": resuming})
+        system = WorkflowAutoCodeGenSystem(registry=self.registry)
+
+        def on_progress(event: Dict[str, Any]) -> None:
+            self._emit(job_id, "progress", event)
+
+        result = None
+        if resuming:
+            # Requeued after a restart: continue from the project's checkpoint if there is one
+            result = await system.resume(root_path, on_progress=on_progress)
+            if not result.get("success") and "No checkpoint" in str(result.get("error", "")):
+                result = None
+        if result is None:
+            result = await system.generate_project(flow, design_config, root_path, on_progress=on_progress)
+        if result.get("success"):
+            self._finish(job_id, COMPLETED, result=result)
+        else:
+            self._finish(job_id, FAILED, result=result, error=result.get("error", "generation failed"))
+
+    def _answer_fn(self, job_id: str, request: Dict[str, Any]):
+        """Non-interactive answers for get_idea's questions, taken from the job request"""
+        answers = [str(answer) for answer in request.get("answers") or []]
+        cancelled = self._cancel_flags.get(job_id) or threading.Event()
+
+        def answer(payload: Dict[str, Any]) -> str:
+            if cancelled.is_set():
+                raise JobCancelled(job_id)
+            if payload.get("awaiting") == "project_name":
+                reply = request.get("project_name") or f"project-{job_id}"
+            else:
+                reply = answers.pop(0) if answers else DEFAULT_ANSWER
+            self._emit_threadsafe(job_id, "question", {"question": payload.get("question"), "answer": reply})
+            return reply
+
+        return answer
+
+
+def zip_project(root_path: str) -> tempfile.SpooledTemporaryFile:
+    """Zip a generated project (without its .multicode metadata) into a rewound temporary file"""
+    archive = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        for directory, dirs, files in os.walk(root_path):
+            dirs[:] = sorted(d for d in dirs if d != INDEX_DIR)
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                zf.write(path, os.path.relpath(path, root_path))
+    archive.seek(0)
+    return archive
+
+
+_STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]+)(?:/(events|cancel|download))?/?$")
+
+
+class JobServer:
+    """Minimal asyncio HTTP/1.1 front end for the JobManager.
+
+    POST /jobs                    submit {"idea", "answers", "project_name"} or {"project_name", "flow", "design_config"}
+    GET  /jobs                    recent jobs (?status=...)
+    GET  /jobs/<id>               job status, flow, design config and result
+    GET  /jobs/<id>/events        server-sent events: queued, stage, question, progress, completed/failed/cancelled
+    POST /jobs/<id>/cancel        cancel a queued or running job (also DELETE /jobs/<id>)
+    GET  /jobs/<id>/download      zip of the generated project
+    GET  /health                  worker and queue counts
+    """
+
+    def __init__(self, manager: JobManager, host: str = "127.0.0.1", port: int = 8000):
+        self.manager = manager
+        self.host = host
+        self.port = port
+
+    async def serve(self) -> None:
+        self.manager.start()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"🌐 Server: listening on http://{self.host}:{self.port} with {self.manager.workers} workers")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.manager.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, _ = request_line.split(" ", 2)
+            headers: Dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            if length > MAX_BODY_BYTES:
+                await self._send_json(writer, 413, {"error": "request body too large"})
+                return
+            body = await reader.readexactly(length) if length else b""
+            await self._route(method.upper(), urlsplit(target), headers, body, writer)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self._send_json(writer, 400, {"error": f"malformed request: {e}"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"❌ Server: {e}")
+            await self._send_json(writer, 500, {"error": str(e)})
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _route(self, method: str, url, headers: Dict[str, str], body: bytes,
+                     writer: asyncio.StreamWriter) -> None:
+        store = self.manager.store
+        if url.path == "/health":
+            await self._send_json(writer, 200, {"status": "ok", **self.manager.stats()})
+            return
+        if url.path.rstrip("/") == "/jobs":
+            if method == "POST":
+                try:
+                    job = self.manager.submit(json.loads(body or b"{}"))
+                except LookupError as e:
+                    await self._send_json(writer, 409, {"error": str(e)})
+                    return
+                except ValueError as e:
+                    await self._send_json(writer, 400, {"error": str(e)})
+                    return
+                await self._send_json(writer, 202, {"id": job["id"], "status": job["status"]})
+            elif method == "GET":
+                query = parse_qs(url.query)
+                status = query.get("status", [None])[0]
+                limit = int(query.get("limit", ["100"])[0])
+                await self._send_json(writer, 200, {"jobs": store.recent(limit, status), **self.manager.stats()})
+            else:
+                await self._send_json(writer, 405, {"error": "use GET or POST"})
+            return
+
+        match = _JOB_PATH.match(url.path)
+        job = store.get(match.group(1)) if match else None
+        if job is None:
+            await self._send_json(writer, 404, {"error": "not found"})
+            return
+        action = match.group(2)
+        if (action == "cancel" and method == "POST") or (action is None and method == "DELETE"):
+            await self._send_json(writer, 200, await self.manager.cancel(job["id"]))
+        elif action is None and method == "GET":
+            await self._send_json(writer, 200, job)
+        elif action == "events" and method == "GET":
+            after = headers.get("last-event-id") or parse_qs(url.query).get("after", ["0"])[0]
+            await self._stream_events(writer, job["id"], int(after))
+        elif action == "download" and method == "GET":
+            await self._send_download(writer, job)
+        else:
+            await self._send_json(writer, 405, {"error": "method not allowed"})
+
+    async def _stream_events(self, writer: asyncio.StreamWriter, job_id: str, after: int) -> None:
+        """Replay the job's stored events after `after`, then follow live ones until it finishes"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        # Subscribe before replaying so nothing emitted in between is lost; seq drops duplicates
+        queue = self.manager.subscribe(job_id)
+        try:
+            for event in self.manager.store.events(job_id, after):
+                await self._write_event(writer, event)
+                after = event["seq"]
+            if self.manager.store.get(job_id)["status"] in TERMINAL and queue.empty():
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    continue
+                if event["seq"] <= after:
+                    continue
+                await self._write_event(writer, event)
+                after = event["seq"]
+                if event["type"] in TERMINAL:
+                    return
+        finally:
+            self.manager.unsubscribe(job_id, queue)
+
+    @staticmethod
+    async def _write_event(writer: asyncio.StreamWriter, event: Dict[str, Any]) -> None:
+        data = json.dumps({**event["data"], "time": event["time"]}, default=str)
+        writer.write(f"id: {event['seq']}\nevent: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+        await writer.drain()
+
+    async def _send_download(self, writer: asyncio.StreamWriter, job: Dict[str, Any]) -> None:
+        root_path = job.get("root_path")
+        if not root_path or not os.path.isdir(root_path):
+            await self._send_json(writer, 409, {"error": f"job is {job['status']} and has no project files yet"})
+            return
+        archive = await asyncio.to_thread(zip_project, root_path)
+        try:
+            size = archive.seek(0, os.SEEK_END)
+            archive.seek(0)
+            name = os.path.basename(root_path)
+            writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: application/zip\r\nContent-Length: {size}\r\n"
+                          f"Content-Disposition: attachment; filename=\"{name}.zip\"\r\n"
+                          f"Connection: close\r\n\r\n").encode("latin-1"))
+            while True:
+                chunk = archive.read(256 * 1024)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            archive.close()
+
+    @staticmethod
+    async def _send_json(writer: asyncio.StreamWriter, status: int, payload: Any) -> None:
+        body = json.dumps(payload, default=str).encode("utf-8")
+        writer.write((f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\nContent-Type: application/json\r\n"
+                      f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host: Optional[str] = None, port: Optional[int] = None, workers: Optional[int] = None,
+                output_root: Optional[str] = None, db_path: Optional[str] = None) -> None:
+    store = JobStore(db_path or os.getenv("JOB_DB", DEFAULT_JOB_DB))
+    manager = JobManager(store, workers, output_root)
+    server = JobServer(manager, host or os.getenv("SERVER_HOST", "127.0.0.1"),
+                       port or int(os.getenv("SERVER_PORT", "8000")))
+    await server.serve()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve project generation jobs over HTTP")
+    parser.add_argument("--host", help="Interface to bind (default: SERVER_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="Port (default: SERVER_PORT or 8000)")
+    parser.add_argument("--workers", type=int, help="Jobs run at once (default: SERVER_WORKERS or 2)")
+    parser.add_argument("--output-root", help="Directory for generated projects (default: PROJECTS_ROOT)")
+    parser.add_argument("--db", help="Job database (default: JOB_DB or .jobs/jobs.sqlite3)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.output_root, args.db))
+    except KeyboardInterrupt:
+        pass
@@ -1,10 +1,17 @@
 import asyncio
 import os
-from typing import Dict, Any, Optional
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-from core.llm_utils import get_gemini_llm
+from core.llm_utils import LLMRegistry, get_llm_registry
+from core.blob_store import get_output_log
+from core.build_cache import REBUILT, REUSED, get_build_cache, output_digest
+from core.checkpointing import (clear_thread, compact_checkpoints, has_checkpoint, open_checkpointer,
+                                project_thread_id)
+from core.project_index import get_project_index
 from core.state_manager import ProjectState, State
+from core.task_graph import TaskGraph, plan_digest
 from agents.supervisor_agent import SupervisorAgent
 from agents.database_agent import DatabaseAgent
 from agents.backend_agent import BackendAgent
@@ -12,31 +19,40 @@ from agents.frontend_agent import FrontendAgent
 from agents.documentation_agent import DocumentationAgent
 from agents.flow_validator_agent import FlowValidatorAgent
 
+SEQUENTIAL = "sequential"
+PARALLEL = "parallel"
+
+DEFAULT_PROJECTS_ROOT = "/Users/aaryagopani/Documents/MultiCode_Gen/projects"
+
 def get_next_task(state):
     """Get next available task based on dependencies"""
     if state.task_plan is None:
         return None
-    
-    all_tasks = (
-        state.task_plan.get('database_tasks', []) +
-        state.task_plan.get('backend_tasks', []) +
-        state.task_plan.get('frontend_tasks', [])
-    )
-    
-    for task in all_tasks:
-        task_id = task['id']
-        if (task_id not in state.completed_tasks and 
-            task_id not in state.pending_tasks):
-            dependencies = task.get('dependencies', [])
-            if all(dep in state.completed_tasks for dep in dependencies):
-                return task
-    return None
+    return TaskGraph.from_state(state).peek()
+
+def progress_event(step: int, node: str, data: Any) -> Dict[str, Any]:
+    """Summary of one node update from the workflow stream (updates may be deltas)"""
+    event: Dict[str, Any] = {"step": step, "node": node}
+    if isinstance(data, dict):
+        for key in ("current_task", "iteration_count", "is_complete", "task_status"):
+            if key in data:
+                event[key] = data[key]
+        for key in ("completed_tasks", "failed_tasks"):
+            if data.get(key):
+                event[key] = list(data[key])
+        if data.get("build_report"):
+            event["build"] = {task_id: build.get("action") for task_id, build in data["build_report"].items()}
+    return event
 
 class WorkflowAutoCodeGenSystem:
     """LangGraph-based multi-agent system orchestrator (matches original code.py)"""
     
-    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
-        self.llm = get_gemini_llm()
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None,
+                 registry: Optional[LLMRegistry] = None, scheduler: Optional[str] = None,
+                 max_parallel: Optional[int] = None):
+        # Clients come from the process-wide registry shared with the idea graph
+        self.registry = registry or get_llm_registry()
+        self.llm = self.registry.gemini_llm()
         
         # Initialize agents
         self.supervisor = SupervisorAgent(self.llm)
@@ -45,12 +61,26 @@ class WorkflowAutoCodeGenSystem:
         self.frontend_agent = FrontendAgent(self.llm)
         self.documentation_agent = DocumentationAgent(self.llm)
         self.flow_validator = FlowValidatorAgent(self.llm)
+        self.agents = {
+            'database': self.database_agent,
+            'backend': self.backend_agent,
+            'frontend': self.frontend_agent,
+            'documentation': self.documentation_agent,
+        }
         
-        # Create workflow graph
-        self.workflow = self._create_workflow()
+        # "parallel" runs every task whose dependencies are met concurrently (WORKFLOW_SCHEDULER)
+        self.scheduler = (scheduler or os.getenv("WORKFLOW_SCHEDULER", SEQUENTIAL)).lower()
+        self.max_parallel = max(1, max_parallel or int(os.getenv("WORKFLOW_MAX_PARALLEL", "4")))
+        self.max_task_attempts = 2
+        # Restore tasks whose inputs are unchanged since an earlier run (BUILD_CACHE=0 disables)
+        self.use_build_cache = os.getenv("BUILD_CACHE", "1").lower() in ("1", "true", "on")
+        self._graph: Optional[TaskGraph] = None
+        # Retention: keep this many super-steps per project, compacting every few steps
+        self.checkpoint_keep = int(os.getenv("CHECKPOINT_KEEP", "5"))
+        self.checkpoint_compact_every = 10
     
-    def _create_workflow(self):
-        """Create the LangGraph workflow"""
+    def _create_workflow(self, checkpointer):
+        """Create the LangGraph workflow; each run compiles it with the project's checkpointer"""
         
         # Create workflow graph
         workflow = StateGraph(State)
@@ -62,6 +92,7 @@ class WorkflowAutoCodeGenSystem:
         workflow.add_node("frontend", self._frontend_node)
         workflow.add_node("documentation", self._documentation_node)
         workflow.add_node("validator", self._validator_node)
+        workflow.add_node("parallel", self._parallel_node)
         
         # Add edges
         workflow.set_entry_point("supervisor")
@@ -74,11 +105,26 @@ class WorkflowAutoCodeGenSystem:
         workflow.add_edge("backend", "supervisor")
         workflow.add_edge("frontend", "supervisor")
         workflow.add_edge("documentation", "supervisor")
+        workflow.add_edge("parallel", "supervisor")
         
         # Validator can end or go back to supervisor
         workflow.add_conditional_edges("validator", self._route_from_validator)
         
-        return workflow.compile(checkpointer=MemorySaver())
+        return workflow.compile(checkpointer=checkpointer)
+    
+    def _task_graph(self, state: State) -> TaskGraph:
+        """Graph for the current plan, built once and then only synced with new completions.
+
+        Nodes receive copies of task_plan, so the cached graph is matched on the plan revision
+        stored in state rather than on object identity.
+        """
+        if not state.plan_revision:
+            state.plan_revision = plan_digest(state.task_plan)
+        if self._graph is None or self._graph.revision != state.plan_revision:
+            self._graph = TaskGraph.from_state(state)
+        else:
+            self._graph.sync(state.completed_tasks, state.failed_tasks)
+        return self._graph
     
     async def _supervisor_node(self, state: State) -> Dict[str, Any]:
         """Supervisor node logic"""
@@ -102,11 +148,23 @@ class WorkflowAutoCodeGenSystem:
         # If no plan, create one
         if state.task_plan is None:
             state.task_plan = await self.supervisor.analyze_and_plan(project_state)
+            state.plan_revision = plan_digest(state.task_plan)
         
         # Find next available task
-        next_task = get_next_task(state)
+        graph = self._task_graph(state)
+        next_task = graph.peek()
+        if next_task and self.scheduler == PARALLEL:
+            print("📋 Supervisor: Dispatching all ready tasks to the parallel scheduler")
+            return {
+                "current_task": PARALLEL,
+                "iteration_count": state.iteration_count + 1,
+                "task_plan": state.task_plan,
+                "plan_revision": state.plan_revision,
+                "task_status": graph.status_code(),
+            }
         if next_task:
             # Add to pending_tasks
+            graph.claim(next_task['id'])
             if next_task['id'] not in state.pending_tasks:
                 state.pending_tasks.append(next_task['id'])
             print(f"📋 Supervisor: Assigning task to {next_task['agent']}: {next_task['description'][:100]}...")
@@ -114,6 +172,8 @@ class WorkflowAutoCodeGenSystem:
                 "current_task": next_task,
                 "iteration_count": state.iteration_count + 1,
                 "task_plan": state.task_plan,
+                "plan_revision": state.plan_revision,
+                "task_status": graph.status_code(),
                 "pending_tasks": state.pending_tasks
             }
         # If no more tasks, trigger validation
@@ -124,9 +184,6 @@ class WorkflowAutoCodeGenSystem:
         """Database agent node"""
         print("🗄️ Database Agent: Executing task")
         
-        if not state.current_task:
-            return {"agent_outputs": {**state.agent_outputs, "database": "No task assigned"}}
-        
         project_state = ProjectState(
             flow=state.flow,
             design_config=state.design_config,
@@ -137,11 +194,13 @@ class WorkflowAutoCodeGenSystem:
         if isinstance(state.current_task, dict):
             task_desc = state.current_task.get('description', str(state.current_task))
             task_id = state.current_task.get('id', f"db_task_{len(state.completed_tasks)}")
+            project_state.flow_nodes = state.current_task.get('flow_nodes')
         else:
             task_desc = str(state.current_task)
             task_id = f"db_task_{len(state.completed_tasks)}"
+        project_state.current_task = task_id
         
-        result = await self.database_agent.execute_task(task_desc, project_state)
+        record, build = await self._execute_cached("database", state.current_task, task_desc, project_state, state)
         
         # Update completed tasks
         completed_tasks = state.completed_tasks + [task_id]
@@ -149,10 +208,11 @@ class WorkflowAutoCodeGenSystem:
         # Remove from pending
         pending_tasks = [t for t in state.pending_tasks if t != task_id]
         
-        print(f"✅ Database Agent: Task completed - {result.get('summary', 'Done')}")
+        print(f"✅ Database Agent: Task completed - {record.get('summary', 'Done')}")
         
         return {
-            "agent_outputs": {**state.agent_outputs, "database": result},
+            "agent_outputs": {task_id: record},
+            "build_report": {task_id: build},
             "completed_tasks": completed_tasks,
             "pending_tasks": pending_tasks,
             "current_task": None
@@ -162,9 +222,6 @@ class WorkflowAutoCodeGenSystem:
         """Backend agent node"""
         print("⚙️ Backend Agent: Executing task")
         
-        if not state.current_task:
-            return {"agent_outputs": {**state.agent_outputs, "backend": "No task assigned"}}
-        
         project_state = ProjectState(
             flow=state.flow,
             design_config=state.design_config,
@@ -175,11 +232,13 @@ class WorkflowAutoCodeGenSystem:
         if isinstance(state.current_task, dict):
             task_desc = state.current_task.get('description', str(state.current_task))
             task_id = state.current_task.get('id', f"be_task_{len(state.completed_tasks)}")
+            project_state.flow_nodes = state.current_task.get('flow_nodes')
         else:
             task_desc = str(state.current_task)
             task_id = f"be_task_{len(state.completed_tasks)}"
+        project_state.current_task = task_id
         
-        result = await self.backend_agent.execute_task(task_desc, project_state)
+        record, build = await self._execute_cached("backend", state.current_task, task_desc, project_state, state)
         
         # Update completed tasks
         completed_tasks = state.completed_tasks + [task_id]
@@ -187,10 +246,11 @@ class WorkflowAutoCodeGenSystem:
         # Remove from pending
         pending_tasks = [t for t in state.pending_tasks if t != task_id]
         
-        print(f"✅ Backend Agent: Task completed - {result.get('summary', 'Done')}")
+        print(f"✅ Backend Agent: Task completed - {record.get('summary', 'Done')}")
         
         return {
-            "agent_outputs": {**state.agent_outputs, "backend": result},
+            "agent_outputs": {task_id: record},
+            "build_report": {task_id: build},
             "completed_tasks": completed_tasks,
             "pending_tasks": pending_tasks,
             "current_task": None
@@ -200,9 +260,6 @@ class WorkflowAutoCodeGenSystem:
         """Frontend agent node"""
         print("🎨 Frontend Agent: Executing task")
         
-        if not state.current_task:
-            return {"agent_outputs": {**state.agent_outputs, "frontend": "No task assigned"}}
-        
         project_state = ProjectState(
             flow=state.flow,
             design_config=state.design_config,
@@ -213,11 +270,13 @@ class WorkflowAutoCodeGenSystem:
         if isinstance(state.current_task, dict):
             task_desc = state.current_task.get('description', str(state.current_task))
             task_id = state.current_task.get('id', f"fe_task_{len(state.completed_tasks)}")
+            project_state.flow_nodes = state.current_task.get('flow_nodes')
         else:
             task_desc = str(state.current_task)
             task_id = f"fe_task_{len(state.completed_tasks)}"
+        project_state.current_task = task_id
         
-        result = await self.frontend_agent.execute_task(task_desc, project_state)
+        record, build = await self._execute_cached("frontend", state.current_task, task_desc, project_state, state)
         
         # Update completed tasks
         completed_tasks = state.completed_tasks + [task_id]
@@ -225,10 +284,11 @@ class WorkflowAutoCodeGenSystem:
         # Remove from pending
         pending_tasks = [t for t in state.pending_tasks if t != task_id]
         
-        print(f"✅ Frontend Agent: Task completed - {result.get('summary', 'Done')}")
+        print(f"✅ Frontend Agent: Task completed - {record.get('summary', 'Done')}")
         
         return {
-            "agent_outputs": {**state.agent_outputs, "frontend": result},
+            "agent_outputs": {task_id: record},
+            "build_report": {task_id: build},
             "completed_tasks": completed_tasks,
             "pending_tasks": pending_tasks,
             "current_task": None
@@ -238,9 +298,6 @@ class WorkflowAutoCodeGenSystem:
         """Documentation agent node"""
         print("📚 Documentation Agent: Executing task")
         
-        if not state.current_task:
-            return {"agent_outputs": {**state.agent_outputs, "documentation": "No task assigned"}}
-        
         project_state = ProjectState(
             flow=state.flow,
             design_config=state.design_config,
@@ -251,11 +308,13 @@ class WorkflowAutoCodeGenSystem:
         if isinstance(state.current_task, dict):
             task_desc = state.current_task.get('description', str(state.current_task))
             task_id = state.current_task.get('id', f"doc_task_{len(state.completed_tasks)}")
+            project_state.flow_nodes = state.current_task.get('flow_nodes')
         else:
             task_desc = str(state.current_task)
             task_id = f"doc_task_{len(state.completed_tasks)}"
+        project_state.current_task = task_id
         
-        result = await self.documentation_agent.execute_task(task_desc, project_state)
+        record, build = await self._execute_cached("documentation", state.current_task, task_desc, project_state, state)
         
         # Update completed tasks
         completed_tasks = state.completed_tasks + [task_id]
@@ -263,15 +322,136 @@ class WorkflowAutoCodeGenSystem:
         # Remove from pending
         pending_tasks = [t for t in state.pending_tasks if t != task_id]
         
-        print(f"✅ Documentation Agent: Task completed - {result.get('summary', 'Done')}")
+        print(f"✅ Documentation Agent: Task completed - {record.get('summary', 'Done')}")
         
         return {
-            "agent_outputs": {**state.agent_outputs, "documentation": result},
+            "agent_outputs": {task_id: record},
+            "build_report": {task_id: build},
             "completed_tasks": completed_tasks,
             "pending_tasks": pending_tasks,
             "current_task": None
         }
     
+    async def _parallel_node(self, state: State) -> Dict[str, Any]:
+        """Worker pool: run every ready task concurrently, refilling as dependencies complete"""
+        graph = self._task_graph(state)
+        running: Dict[asyncio.Task, str] = {}
+        attempts: Dict[str, int] = {}
+        new_completed, new_failed, outputs, builds = [], [], {}, {}
+        started = time.monotonic()
+        busy = 0.0
+        
+        # After a resume, tasks this run already finished before the crash are taken from the log
+        log = get_output_log(state.root_path)
+        for task_id in list(graph.tasks):
+            record = log.latest(task_id) if task_id not in graph.completed else None
+            if record and state.run_id and record.get('run') == state.run_id:
+                graph.complete(task_id)
+                new_completed.append(task_id)
+                outputs[task_id] = record
+        if new_completed:
+            print(f"♻️ Scheduler: {len(new_completed)} tasks already finished in this run, not repeating them")
+        
+        print(f"⚡ Scheduler: {len(graph) - len(graph.completed)} tasks left, up to {self.max_parallel} in parallel")
+        while True:
+            for task in graph.dispatch(self.max_parallel - len(running)):
+                running[asyncio.create_task(self._run_task(task, state, sorted(graph.completed), outputs))] = task['id']
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                task_id = running.pop(future)
+                try:
+                    record, elapsed, build = future.result()
+                except Exception as e:
+                    attempts[task_id] = attempts.get(task_id, 0) + 1
+                    if attempts[task_id] < self.max_task_attempts:
+                        print(f"⚠️ Scheduler: Task {task_id} failed ({e}), retrying")
+                        graph.release(task_id)
+                    else:
+                        print(f"❌ Scheduler: Task {task_id} failed after {attempts[task_id]} attempts: {e}")
+                        graph.fail(task_id)
+                        new_failed.append(task_id)
+                    continue
+                busy += elapsed
+                graph.complete(task_id)
+                new_completed.append(task_id)
+                outputs[task_id] = record
+                builds[task_id] = build
+                print(f"✅ Scheduler: {task_id} {build['action']} in {elapsed:.1f}s - {record.get('summary', 'Done')}")
+        
+        wall = time.monotonic() - started
+        blocked = graph.blocked()
+        print(f"⚡ Scheduler: {len(new_completed)} tasks in {wall:.1f}s wall, {busy:.1f}s of task time "
+              f"({busy / wall if wall else 0:.1f}x parallelism)")
+        if blocked:
+            print(f"⚠️ Scheduler: {len(blocked)} tasks blocked by failed or unknown dependencies: {blocked}")
+        
+        return {
+            "agent_outputs": outputs,
+            "build_report": builds,
+            "completed_tasks": new_completed,
+            "failed_tasks": new_failed,
+            "pending_tasks": [],
+            "task_status": graph.status_code(),
+            "current_task": None
+        }
+    
+    async def _run_task(self, task: Dict[str, Any], state: State, completed_tasks,
+                        outputs: Dict[str, Any]) -> Any:
+        """Execute one plan task on its agent; returns (output record, seconds, build entry)"""
+        project_state = ProjectState(
+            flow=state.flow,
+            design_config=state.design_config,
+            root_path=state.root_path,
+            completed_tasks=list(completed_tasks)
+        )
+        project_state.current_task = task['id']
+        project_state.flow_nodes = task.get('flow_nodes')
+        started = time.monotonic()
+        record, build = await self._execute_cached(task.get('agent', '').lower(), task, task.get('description', ''),
+                                                   project_state, state, outputs)
+        return record, time.monotonic() - started, build
+    
+    async def _execute_cached(self, agent_name: str, task: Any, task_desc: str, project_state: ProjectState,
+                              state: State, outputs: Optional[Dict[str, Any]] = None):
+        """Run a task unless the build cache holds a result for identical inputs.
+        
+        Returns (output log record, build report entry). Dependency outputs come from
+        state.agent_outputs plus `outputs` (results of the running parallel pool).
+        """
+        agent = self.agents.get(agent_name)
+        if agent is None:
+            raise ValueError(f"Unknown agent type '{agent_name}'")
+        task_id = project_state.current_task
+        log = get_output_log(state.root_path)
+        if not isinstance(task, dict) or not self.use_build_cache:
+            reason = "build cache disabled" if not self.use_build_cache else "not cacheable"
+            result = await agent.execute_task(task_desc, project_state)
+            return log.append(task_id, agent_name, result, state.run_id), {"action": REBUILT, "reason": reason}
+        
+        cache = get_build_cache(state.root_path)
+        outputs = outputs or {}
+        dependency_outputs = {
+            dep: output_digest(outputs.get(dep) or state.agent_outputs.get(dep))
+            for dep in task.get('dependencies') or []
+        }
+        inputs = cache.inputs(task, agent, state.flow, state.design_config, dependency_outputs)
+        key = cache.key(inputs)
+        entry = cache.lookup(key)
+        if entry is not None:
+            result, written = cache.restore(entry, task_id)
+            print(f"🧱 Build cache: {task_id} unchanged, restored {len(result['files'])} files ({written} rewritten)")
+            record = log.append(task_id, agent_name, {**result, "cached": True}, state.run_id)
+            return record, {"action": REUSED, "reason": "inputs unchanged"}
+        
+        reason = cache.explain(task_id, inputs)
+        print(f"🧱 Build cache: rebuilding {task_id} ({reason})")
+        result = await agent.execute_task(task_desc, project_state)
+        record = log.append(task_id, agent_name, result, state.run_id)
+        cache.store(key, task_id, inputs, record)
+        return record, {"action": REBUILT, "reason": reason}
+    
     async def _validator_node(self, state: State) -> Dict[str, Any]:
         """Validator agent node"""
         print("🔍 Validator Agent: Validating implementation")
@@ -308,6 +488,8 @@ class WorkflowAutoCodeGenSystem:
         current_task = state.current_task
         if current_task == "validate":
             return "validator"
+        elif current_task == PARALLEL:
+            return "parallel"
         elif isinstance(current_task, dict):
             agent = current_task.get('agent', '').lower()
             if agent == 'database':
@@ -331,8 +513,16 @@ class WorkflowAutoCodeGenSystem:
             print("🔄 Validation failed, continuing development")
             return "supervisor"
     
-    async def generate_project(self, flow: str, design_config: str, root_path: str) -> Dict[str, Any]:
-        """Generate complete project using multi-agent system"""
+    async def generate_project(self, flow: Optional[str], design_config: Optional[str], root_path: str,
+                               resume: bool = False,
+                               on_progress: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """Generate complete project using multi-agent system.
+
+        Every super-step is checkpointed to <root>/.multicode/checkpoints.sqlite under the
+        project's name; with resume=True the run continues from the last completed node
+        instead of starting over (flow and design config then come from the checkpoint).
+        on_progress, if given, is called (or awaited) with a small event for every node that ran.
+        """
         
         print("🚀 Starting Auto Code Generation System")
         print(f"📁 Project Path: {root_path}")
@@ -340,15 +530,22 @@ class WorkflowAutoCodeGenSystem:
         # Ensure root directory exists
         from core.file_manager import FileManager
         FileManager.ensure_directory(root_path)
+        ledger = FileManager.reset_ledger(root_path)
         
         # Initialize state
         initial_state = {
             "flow": flow,
             "design_config": design_config,
             "root_path": root_path,
+            "run_id": uuid.uuid4().hex,
             "completed_tasks": [],
             "pending_tasks": [],
+            "failed_tasks": [],
+            "task_status": "",
+            "task_plan": None,
+            "plan_revision": "",
             "agent_outputs": {},
+            "build_report": {},
             "validation_results": {},
             "iteration_count": 0,
             "max_iterations": 500,
@@ -357,27 +554,69 @@ class WorkflowAutoCodeGenSystem:
         }
         
         # Run workflow
-        config = {"configurable": {"thread_id": "main"}, "recursion_limit": 150}
+        thread_id = project_thread_id(root_path)
+        config = {"configurable": {"thread_id": thread_id}, "recursion_limit": 150}
         
         try:
-            final_state = None
-            async for state in self.workflow.astream(initial_state, config=config):  # type: ignore
-                final_state = state
-                # Print progress
-                for node, data in state.items():
-                    if isinstance(data, dict) and 'iteration_count' in data:
-                        print(f"📍 Progress: Iteration {data['iteration_count']}")
+            async with open_checkpointer(root_path) as checkpointer:
+                workflow = self._create_workflow(checkpointer)
+                self._graph = None
+                if resume:
+                    if not await has_checkpoint(checkpointer, thread_id):
+                        return {"success": False, "error": f"No checkpoint to resume for {thread_id}"}
+                    snapshot = await workflow.aget_state(config)
+                    print(f"♻️ Resuming {thread_id}: {len(snapshot.values.get('completed_tasks', []))} tasks "
+                          f"already completed, next: {', '.join(snapshot.next) or 'nothing'}")
+                    stream_input = None
+                else:
+                    # A fresh run must not inherit the reduced state of an earlier one
+                    await clear_thread(checkpointer, thread_id)
+                    stream_input = initial_state
+                
+                steps = 0
+                async for state in workflow.astream(stream_input, config=config):  # type: ignore
+                    steps += 1
+                    # Print progress
+                    for node, data in state.items():
+                        if isinstance(data, dict) and 'iteration_count' in data:
+                            print(f"📍 Progress: Iteration {data['iteration_count']}")
+                        if on_progress is not None:
+                            notified = on_progress(progress_event(steps, node, data))
+                            if asyncio.iscoroutine(notified):
+                                await notified
+                    if steps % self.checkpoint_compact_every == 0:
+                        await compact_checkpoints(checkpointer, thread_id, self.checkpoint_keep)
+                
+                # Node updates may be deltas, so read the reduced state
+                last_state = (await workflow.aget_state(config)).values
+                await compact_checkpoints(checkpointer, thread_id, self.checkpoint_keep)
+            
+            get_project_index(root_path).save()
+            write_stats = ledger.summary()
+            print(f"💾 Writes: {write_stats['files_written']} files written, "
+                  f"{write_stats['files_skipped']} unchanged skipped ({write_stats['skip_ratio']:.0%} of bytes), "
+                  f"{write_stats['files_rewritten_by_multiple_tasks']} rewritten by multiple tasks")
+            
+            build_report = last_state.get('build_report', {}) if last_state else {}
+            reused = sum(1 for entry in build_report.values() if entry.get('action') == REUSED)
+            print(f"🧱 Build: {reused} tasks reused from cache, {len(build_report) - reused} rebuilt")
+            for task_id, entry in build_report.items():
+                if entry.get('action') == REBUILT:
+                    print(f"   - {task_id}: {entry.get('reason')}")
             
             # Extract final results
-            if final_state:
-                last_state = list(final_state.values())[-1]
+            if last_state:
                 return {
                     "success": True,
                     "completed_tasks": last_state.get('completed_tasks', []),
+                    "failed_tasks": last_state.get('failed_tasks', []),
                     "agent_outputs": last_state.get('agent_outputs', {}),
+                    "build_report": build_report,
                     "validation_results": last_state.get('validation_results', {}),
                     "is_complete": last_state.get('is_complete', False),
-                    "iterations": last_state.get('iteration_count', 0)
+                    "iterations": last_state.get('iteration_count', 0),
+                    "resumed": resume,
+                    "write_stats": write_stats
                 }
             else:
                 return {"success": False, "error": "No final state received"}
@@ -385,6 +624,18 @@ class WorkflowAutoCodeGenSystem:
         except Exception as e:
             print(f"❌ Error in workflow execution: {e}")
             return {"success": False, "error": str(e)}
+    
+    async def resume(self, root_path: str,
+                     on_progress: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """Continue an interrupted generation from its last checkpoint"""
+        return await self.generate_project(None, None, root_path, resume=True, on_progress=on_progress)
+
+def project_root(project_name: str, output_root: Optional[str] = None) -> str:
+    """Directory of a generated project: <output_root or PROJECTS_ROOT>/<project_name>"""
+    name = project_name.strip()
+    if not name or name in (".", "..") or os.sep in name or (os.altsep and os.altsep in name):
+        raise ValueError(f"Invalid project name: {project_name!r}")
+    return os.path.join(output_root or os.getenv("PROJECTS_ROOT", DEFAULT_PROJECTS_ROOT), name)
 
 def generate_project_with_graph(project_name: str, flow: str, design_config: str):
     """
@@ -393,6 +644,13 @@ def generate_project_with_graph(project_name: str, flow: str, design_config: str
     Returns the result of the workflow.
     """
     import asyncio
-    root_path = f"/Users/aaryagopani/Documents/MultiCode_Gen/projects/{project_name}"
+    root_path = project_root(project_name)
+    system = WorkflowAutoCodeGenSystem()
+    return asyncio.run(system.generate_project(flow, design_config, root_path))
+
+def resume_project_with_graph(project_name: str):
+    """Resume an interrupted generate_project_with_graph run for the same project name"""
+    import asyncio
+    root_path = project_root(project_name)
     system = WorkflowAutoCodeGenSystem()
-    return asyncio.run(system.generate_project(flow, design_config, root_path)) 
\ No newline at end of file
+    return asyncio.run(system.resume(root_path)) 
\ No newline at end of file